@@ -0,0 +1,314 @@
+import heapq
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import List, Dict, Set, Tuple
+from .constraints import ConstraintValidator
+from .precedence_graph import PrecedenceGraph
+
+
+class DeltaEvaluator:
+    """
+    SolutionEvaluator kept up to date under single moves and swaps, for local search.
+
+    Holds the evaluated schedule: each collaborator's tasks in dependency order, task starts and
+    ends, per-task, per-collaborator and per-project penalty terms. move and swap apply a change,
+    re-time only the tasks downstream of it (successors and later tasks of the same
+    collaborators, whose end actually moved) and return the fitness delta; commit keeps the
+    change, rollback restores the previous state. Fitness and penalties always equal
+    SolutionEvaluator.evaluate on the current solution.
+
+    Projects touched by a change are re-scored whole (gaps, deadline, start), so a move costs
+    O(affected tasks + tasks of touched projects), not O(tasks x collaborators).
+    """
+
+    # Penalties that are sums of per-task terms
+    TASK_TERMS = ("habilidades_incorretas", "cargo_incorreto", "ausencias", "work_period_violation", "vacation_conflict")
+
+    def __init__(self, solution: List[int], tasks: List[Dict], collaborators: List[Dict],
+                 project_deadlines: Dict[str, int] = None, project_start_dates: Dict[str, int] = None,
+                 makespan_weight: int = 200, graph: PrecedenceGraph = None):
+        graph = graph or PrecedenceGraph(tasks)
+        self.tasks = tasks
+        self.collaborators = {c["id"]: c for c in collaborators}
+        self.project_deadlines = project_deadlines or {}
+        self.project_start_dates = project_start_dates or {}
+        self.check_projects = bool(project_deadlines or project_start_dates)
+        self.makespan_weight = makespan_weight
+        self.validator = ConstraintValidator()
+
+        # Tasks on or behind a dependency cycle are left out of the timing, like in evaluate
+        self.order = graph.ordered_indices()
+        self.rank = {i: r for r, i in enumerate(self.order)}
+        self.predecessors = [[graph.position[p] for p in graph.predecessors.get(task["task_id"], [])
+                              if graph.position[p] in self.rank] for task in tasks]
+        self.successors = [[] for _ in tasks]
+        for i, predecessors in enumerate(self.predecessors):
+            if i in self.rank:
+                for p in predecessors:
+                    self.successors[p].append(i)
+        self.project_tasks = {}
+        for i, task in enumerate(tasks):
+            self.project_tasks.setdefault(task["projeto"], []).append(i)
+
+        # Schedule state
+        self.solution = list(solution)
+        self.starts = [None] * len(tasks)
+        self.ends = [None] * len(tasks)
+        self.sequences = {collab_id: [] for collab_id in self.collaborators}
+        self.busy = {collab_id: 0 for collab_id in self.collaborators}
+        self.collab_projects = {collab_id: Counter() for collab_id in self.collaborators}
+        self.task_terms = [None] * len(tasks)
+        self.collab_terms = {collab_id: 0 for collab_id in self.collaborators}
+        self.project_terms = {projeto: {} for projeto in self.project_tasks}
+        self.penalties = {
+            "habilidades_incorretas": 0,
+            "cargo_incorreto": 0,
+            "ausencias": 0,
+            # Tasks start after their collaborator's previous end, so intervals never overlap
+            "sobreposicoes_colaborador": 0,
+            "resource_idle_time": 0,
+            "gaps_projeto": 0,
+            "makespan": 0,
+            "deadline_violation": 0,
+            "project_start_violation": 0,
+            "work_period_violation": 0,
+            "vacation_conflict": 0
+        }
+        self.fitness = 0
+        self._undo = None
+
+        for i, task in enumerate(tasks):
+            self.collab_projects[self.solution[i]][task["projeto"]] += 1
+            if i in self.rank:
+                self.sequences[self.solution[i]].append(self.rank[i])
+        for sequence in self.sequences.values():
+            sequence.sort()
+        self._undo = {}
+        self._apply(self.order, set(), dict.fromkeys(self.collaborators, 0), set(self.project_tasks))
+        self._undo = None
+
+    def move(self, task_index: int, collaborator_id: int) -> float:
+        """Reassign one task; returns the fitness delta (pending until commit or rollback)"""
+        self._begin()
+        before = self.fitness
+        if self.solution[task_index] != collaborator_id:
+            last_ends = {}
+            seeds = self._reassign(task_index, collaborator_id, last_ends)
+            self._apply(seeds, {task_index}, last_ends, {self.tasks[task_index]["projeto"]})
+        return self.fitness - before
+
+    def swap(self, first: int, second: int) -> float:
+        """Exchange the collaborators of two tasks; returns the fitness delta (pending until commit or rollback)"""
+        self._begin()
+        before = self.fitness
+        first_collab, second_collab = self.solution[first], self.solution[second]
+        if first_collab != second_collab:
+            last_ends = {}
+            seeds = self._reassign(first, second_collab, last_ends) + self._reassign(second, first_collab, last_ends)
+            self._apply(seeds, {first, second}, last_ends,
+                        {self.tasks[first]["projeto"], self.tasks[second]["projeto"]})
+        return self.fitness - before
+
+    def commit(self):
+        """Keep the pending move"""
+        self._undo = None
+
+    def rollback(self):
+        """Restore the state before the pending move"""
+        if self._undo is None:
+            return
+        for (store, key), value in self._undo.items():
+            if store == "fitness":
+                self.fitness = value
+            else:
+                getattr(self, store)[key] = value
+        self._undo = None
+
+    def _begin(self):
+        if self._undo is not None:
+            raise ValueError("Movimento pendente: chame commit ou rollback antes do próximo")
+        self._undo = {}
+
+    def _set(self, store: str, key, value):
+        """Write one state entry, remembering its value before the pending move"""
+        container = getattr(self, store)
+        if (store, key) not in self._undo:
+            self._undo[(store, key)] = container[key]
+        container[key] = value
+
+    def _reassign(self, i: int, collab_id: int, last_ends: Dict[int, int]) -> List[int]:
+        """Move task i to another collaborator's sequence; returns the tasks to re-time"""
+        old_collab = self.solution[i]
+        projeto = self.tasks[i]["projeto"]
+        for collab in (old_collab, collab_id):
+            last_ends.setdefault(collab, self._last_end(collab))
+        self._set("solution", i, collab_id)
+        for collab, step in ((old_collab, -1), (collab_id, 1)):
+            projects = Counter(self.collab_projects[collab])
+            projects[projeto] += step
+            self._set("collab_projects", collab, +projects)
+        if i not in self.rank:
+            return []
+
+        # Its own timing, and that of the tasks now following it or no longer following it
+        rank = self.rank[i]
+        old_sequence = [r for r in self.sequences[old_collab] if r != rank]
+        new_sequence = list(self.sequences[collab_id])
+        insort(new_sequence, rank)
+        self._set("sequences", old_collab, old_sequence)
+        self._set("sequences", collab_id, new_sequence)
+        span = self.ends[i] - self.starts[i]
+        self._set("busy", old_collab, self.busy[old_collab] - span)
+        self._set("busy", collab_id, self.busy[collab_id] + span)
+
+        seeds = [i]
+        for sequence in (old_sequence, new_sequence):
+            position = bisect_left(sequence, rank + 1)
+            if position < len(sequence):
+                seeds.append(self.order[sequence[position]])
+        return seeds
+
+    def _apply(self, seeds: List[int], moved: Set[int], last_ends: Dict[int, int], projects: Set[str]):
+        """
+        Re-time the seeds and whatever their new ends push, then re-score what changed.
+
+        moved tasks changed collaborator (their penalties change even if their timing does not);
+        last_ends holds the last end, before the change, of every collaborator whose sequence changed.
+        """
+        queue = [self.rank[i] for i in seeds]
+        heapq.heapify(queue)
+        done = set()
+        while queue:
+            rank = heapq.heappop(queue)
+            if rank in done:
+                continue
+            done.add(rank)
+            i = self.order[rank]
+            collab_id = self.solution[i]
+            sequence = self.sequences[collab_id]
+            position = bisect_left(sequence, rank)
+            collaborator_end = self.ends[self.order[sequence[position - 1]]] if position > 0 else 0
+            start, end = self._timing(i, collab_id, collaborator_end)
+            if (start, end) == (self.starts[i], self.ends[i]) and i not in moved:
+                continue
+
+            if collab_id not in last_ends:
+                last_ends[collab_id] = self._last_end(collab_id)
+            old_span = self.ends[i] - self.starts[i] if self.starts[i] is not None else 0
+            self._set("busy", collab_id, self.busy[collab_id] + (end - start) - old_span)
+            end_moved = end != self.ends[i]
+            self._set("starts", i, start)
+            self._set("ends", i, end)
+            self._set_task_term(i, self._task_term(i, collab_id, start, end))
+            projects.add(self.tasks[i]["projeto"])
+
+            if end_moved:
+                for successor in self.successors[i]:
+                    heapq.heappush(queue, self.rank[successor])
+                if position + 1 < len(sequence):
+                    heapq.heappush(queue, sequence[position + 1])
+
+        # Gaps use each collaborator's last end, so every project working with a moved one changes
+        for collab_id, last_end in last_ends.items():
+            self._set_collab_term(collab_id)
+            if self._last_end(collab_id) != last_end:
+                projects.update(self.collab_projects[collab_id])
+        for projeto in projects:
+            self._set_project_term(projeto)
+
+        makespan_penalty = max((term.get("end", 0) for term in self.project_terms.values()), default=0) * self.makespan_weight
+        self._set_penalty("makespan", makespan_penalty - self.penalties["makespan"])
+
+    def _timing(self, i: int, collab_id: int, collaborator_end: int) -> Tuple[int, int]:
+        """Start and end of task i on a collaborator free from collaborator_end, as in evaluate"""
+        task = self.tasks[i]
+        collaborator = self.collaborators[collab_id]
+        predecessor_end = max((self.ends[p] for p in self.predecessors[i]), default=0)
+        project_start = self.project_start_dates.get(task["projeto"], 0)
+        start_day = max(collaborator_end, predecessor_end, project_start)
+        if collaborator.get("inicio") is not None:
+            start_day = max(start_day, collaborator["inicio"])
+
+        absences = collaborator["ausencias"]
+        while start_day in absences:
+            start_day += 1
+        end_day = start_day
+        remaining_duration = task["duracao_dias"]
+        while remaining_duration > 0:
+            if end_day not in absences:
+                remaining_duration -= 1
+            end_day += 1
+        return start_day, end_day
+
+    def _task_term(self, i: int, collab_id: int, start: int, end: int) -> Dict[str, int]:
+        """Skill, position and availability penalties of one placed task"""
+        task = self.tasks[i]
+        collaborator = self.collaborators[collab_id]
+        term = dict.fromkeys(self.TASK_TERMS, 0)
+        for violation in self.validator.validate_skills(task, collaborator):
+            term["habilidades_incorretas"] += violation.penalty
+        for violation in self.validator.validate_position(task, collaborator):
+            term["cargo_incorreto"] += violation.penalty
+        for violation in self.validator.validate_availability(collaborator, start, end, task):
+            if violation.type == "work_period_violation":
+                term["work_period_violation"] += violation.penalty
+            elif violation.type == "vacation_conflict":
+                term["vacation_conflict"] += violation.penalty
+            else:
+                term["ausencias"] += violation.penalty
+        return term
+
+    def _set_task_term(self, i: int, term: Dict[str, int]):
+        old = self.task_terms[i] or {}
+        for key in self.TASK_TERMS:
+            self._set_penalty(key, term[key] - old.get(key, 0))
+        self._set("task_terms", i, term)
+
+    def _set_collab_term(self, collab_id: int):
+        """Idle time penalty of a scarce collaborator: span of its sequence minus busy days"""
+        sequence = self.sequences[collab_id]
+        penalty = 0
+        if sequence and any(skill in ["Análise", "Analise"] for skill in self.collaborators[collab_id]["habilidades"]):
+            total_idle = self._last_end(collab_id) - self.starts[self.order[sequence[0]]] - self.busy[collab_id]
+            if total_idle > 5:
+                penalty = ConstraintValidator.PENALTIES["resource_idle_time"] * total_idle
+        self._set_penalty("resource_idle_time", penalty - self.collab_terms[collab_id])
+        self._set("collab_terms", collab_id, penalty)
+
+    def _set_project_term(self, projeto: str):
+        """Gaps, end, deadline and start penalties of one project, as in evaluate"""
+        indices = self.project_tasks[projeto]
+        intervals = sorted(
+            ((self._last_end(self.solution[i]), self._last_end(self.solution[i]) + self.tasks[i]["duracao_dias"])
+             for i in indices),
+            key=lambda x: x[0]
+        )
+        gaps = sum(max(next_start - current_end, 0) for (_, current_end), (next_start, _) in zip(intervals, intervals[1:]))
+
+        placed = [i for i in indices if i in self.rank]
+        end = max((self.ends[i] for i in placed), default=0)
+        term = {"end": end, "gaps_projeto": gaps * 50, "deadline_violation": 0, "project_start_violation": 0}
+        if placed and self.check_projects:
+            for violation in self.validator.validate_deadline(projeto, end, self.project_deadlines.get(projeto)):
+                term["deadline_violation"] += violation.penalty
+            required_start = self.project_start_dates.get(projeto)
+            actual_start = min(self.ends[i] - self.tasks[i]["duracao_dias"] for i in placed)
+            if required_start is not None and actual_start < required_start:
+                for violation in self.validator.validate_project_start(projeto, actual_start, required_start):
+                    term["project_start_violation"] += violation.penalty
+
+        old = self.project_terms[projeto]
+        for key in ("gaps_projeto", "deadline_violation", "project_start_violation"):
+            self._set_penalty(key, term[key] - old.get(key, 0))
+        self._set("project_terms", projeto, term)
+
+    def _set_penalty(self, key: str, delta: int):
+        if delta:
+            self._set("penalties", key, self.penalties[key] + delta)
+            if ("fitness", None) not in self._undo:
+                self._undo[("fitness", None)] = self.fitness
+            self.fitness += delta
+
+    def _last_end(self, collab_id: int) -> int:
+        sequence = self.sequences[collab_id]
+        return self.ends[self.order[sequence[-1]]] if sequence else 0
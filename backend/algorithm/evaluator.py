@@ -1,6 +1,11 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterable
+import numpy as np
 from .constraints import ConstraintValidator, ConstraintViolation
 from .scheduler import TaskScheduler
+from .precedence_graph import PrecedenceGraph
+
+# Per-collaborator absence days share one sorted key array, collaborator k offset by k * KEY_SPAN
+KEY_SPAN = 1 << 32
 
 class SolutionEvaluator:
     """Evaluates genetic algorithm solutions"""
@@ -11,9 +16,13 @@ class SolutionEvaluator:
     
     def evaluate(self, solution: List[int], tasks: List[Dict], 
                 collaborators: List[Dict], project_deadlines: Dict[str, int] = None, 
-                project_start_dates: Dict[str, int] = None) -> Tuple[float, Dict, Dict]:
+                project_start_dates: Dict[str, int] = None,
+                graph: PrecedenceGraph = None) -> Tuple[float, Dict, Dict]:
         """Evaluate a solution and return fitness, penalties, and violations"""
         
+        # Walk tasks in dependency order so predecessor completions are always known
+        graph = graph or PrecedenceGraph(tasks)
+        
         allocations = {col["id"]: [] for col in collaborators}
         project_ends = {task["projeto"]: 0 for task in tasks}
         task_completions = {}  # Track individual task completion times
@@ -48,7 +57,8 @@ class SolutionEvaluator:
         makespan = 0
         
         # Evaluate each task assignment
-        for i, task in enumerate(tasks):
+        for i in graph.ordered_indices():
+            task = tasks[i]
             collaborator_id = solution[i]
             collaborator = next(c for c in collaborators if c["id"] == collaborator_id)
             
@@ -223,4 +233,197 @@ class SolutionEvaluator:
         # Calculate total fitness
         fitness = sum(penalties.values())
         
-        return fitness, penalties, violations_details
\ No newline at end of file
+        return fitness, penalties, violations_details
+    
+    def compile_problem(self, tasks: List[Dict], collaborators: List[Dict],
+                        project_deadlines: Dict[str, int] = None,
+                        project_start_dates: Dict[str, int] = None,
+                        graph: PrecedenceGraph = None) -> Dict:
+        """Task and collaborator arrays for evaluate_batch (compile once, evaluate many batches)"""
+        graph = graph or PrecedenceGraph(tasks)
+        position = {task["task_id"]: i for i, task in enumerate(tasks)}
+        order = graph.ordered_indices()
+        rank = {i: r for r, i in enumerate(order)}
+        
+        collab_ids = np.array([c["id"] for c in collaborators])
+        id_order = np.argsort(collab_ids, kind="stable")
+        
+        # Absence days sorted per collaborator, and each minus its rank: the n-th free day (from 0)
+        # of a collaborator is n plus the number of its shifted absences <= n
+        absence_keys, shifted_keys, offsets = [], [], []
+        for k, collaborator in enumerate(collaborators):
+            days = np.array(sorted(collaborator["ausencias"]), dtype=np.int64)
+            offsets.append(sum(len(keys) for keys in absence_keys))
+            absence_keys.append(k * KEY_SPAN + days)
+            shifted_keys.append(k * KEY_SPAN + days - np.arange(len(days)))
+        
+        # Vacations padded with empty (0, 0) periods to a rectangle
+        vacations = [list(c.get("ferias", [])) for c in collaborators]
+        width = max((len(periods) for periods in vacations), default=0)
+        vacation_table = np.zeros((len(collaborators), width, 2), dtype=np.int64)
+        for k, periods in enumerate(vacations):
+            for v, (ferias_inicio, ferias_fim) in enumerate(periods):
+                vacation_table[k, v] = (ferias_inicio, ferias_fim)
+        
+        never = np.iinfo(np.int64).max
+        projects = sorted({task["projeto"] for task in tasks})
+        project_index = {project: j for j, project in enumerate(projects)}
+        
+        return {
+            'graph': graph,
+            'order': order,
+            'predecessors': [
+                [position[p] for p in task.get("predecessoras", []) if p in position and rank.get(position[p], len(order)) < rank.get(i, -1)]
+                for i, task in enumerate(tasks)
+            ],
+            'processed': np.array([i in rank for i in range(len(tasks))], dtype=bool),
+            'durations': np.array([task["duracao_dias"] for task in tasks], dtype=np.int64),
+            'release': np.array([(project_start_dates or {}).get(task["projeto"], 0) for task in tasks], dtype=np.int64),
+            'skills_ok': np.array([[task["habilidades_necessarias"].issubset(set(c["habilidades"])) for c in collaborators]
+                                   for task in tasks], dtype=bool).reshape(len(tasks), len(collaborators)),
+            'position_ok': np.array([[task["cargo_necessario"] == c["cargo"] for c in collaborators]
+                                     for task in tasks], dtype=bool).reshape(len(tasks), len(collaborators)),
+            'collab_ids': collab_ids,
+            'id_order': id_order,
+            'sorted_ids': collab_ids[id_order],
+            'work_starts': np.array([c.get("inicio") or 0 for c in collaborators], dtype=np.int64),
+            'period_starts': np.array([c["inicio"] if c.get("inicio") is not None and c["inicio"] > 0 else -never
+                                       for c in collaborators], dtype=np.int64),
+            'period_ends': np.array([c["termino"] if c.get("termino") is not None and c["termino"] > 0 else never
+                                     for c in collaborators], dtype=np.int64),
+            'absence_keys': np.concatenate(absence_keys) if absence_keys else np.zeros(0, dtype=np.int64),
+            'shifted_keys': np.concatenate(shifted_keys) if shifted_keys else np.zeros(0, dtype=np.int64),
+            'absence_offsets': np.array(offsets, dtype=np.int64),
+            'vacations': vacation_table,
+            'scarce': np.array([any(skill in ["Análise", "Analise"] for skill in c["habilidades"]) for c in collaborators],
+                               dtype=bool),
+            'projects': projects,
+            'project_columns': [np.array([i for i, task in enumerate(tasks) if task["projeto"] == project])
+                                for project in projects],
+            'deadlines': [(project_index[name], deadline) for name, deadline in (project_deadlines or {}).items()
+                          if name in project_index and deadline is not None],
+            'start_dates': [(project_index[name], start) for name, start in (project_start_dates or {}).items()
+                            if name in project_index and start is not None]
+        }
+    
+    def evaluate_batch(self, solutions: np.ndarray, tasks: List[Dict], collaborators: List[Dict],
+                       project_deadlines: Dict[str, int] = None,
+                       project_start_dates: Dict[str, int] = None,
+                       graph: PrecedenceGraph = None, compiled: Dict = None,
+                       details_for: Iterable[int] = ()) -> Tuple[np.ndarray, Dict[str, np.ndarray], Dict[int, Dict]]:
+        """
+        Evaluate many solutions at once: one row per solution, one collaborator id per task.
+        
+        Same penalties as evaluate, as arrays with one entry per row, computed task by task over
+        all rows with compile_problem's arrays. violations_details are only built (by evaluate)
+        for the rows listed in details_for and returned as {row: violations_details}.
+        """
+        problem = compiled or self.compile_problem(tasks, collaborators, project_deadlines, project_start_dates, graph)
+        solutions = np.atleast_2d(np.asarray(solutions))
+        num_rows = solutions.shape[0]
+        rows = np.arange(num_rows)
+        
+        found = np.searchsorted(problem['sorted_ids'], solutions).clip(max=len(problem['sorted_ids']) - 1)
+        if len(problem['sorted_ids']) == 0 or not (problem['sorted_ids'][found] == solutions).all():
+            raise ValueError("Solução com colaborador desconhecido")
+        assigned = problem['id_order'][found]
+        
+        penalties = {
+            key: np.zeros(num_rows, dtype=np.int64) for key in (
+                "habilidades_incorretas", "cargo_incorreto", "ausencias", "sobreposicoes_colaborador",
+                "resource_idle_time", "gaps_projeto", "makespan", "deadline_violation",
+                "project_start_violation", "work_period_violation", "vacation_conflict"
+            )
+        }
+        
+        durations = problem['durations']
+        ends = np.zeros(solutions.shape, dtype=np.int64)
+        collaborator_end = np.zeros((num_rows, len(collaborators)), dtype=np.int64)
+        first_start = np.full((num_rows, len(collaborators)), -1, dtype=np.int64)
+        busy = np.zeros((num_rows, len(collaborators)), dtype=np.int64)
+        
+        for i in problem['order']:
+            collab = assigned[:, i]
+            penalties["habilidades_incorretas"] += np.where(problem['skills_ok'][i, collab], 0,
+                                                            ConstraintValidator.PENALTIES["missing_skills"])
+            penalties["cargo_incorreto"] += np.where(problem['position_ok'][i, collab], 0,
+                                                     ConstraintValidator.PENALTIES["wrong_position"])
+            
+            # Timing as in evaluate: after the collaborator, predecessors, work start and project start
+            start = np.maximum(collaborator_end[rows, collab], problem['release'][i])
+            start = np.maximum(start, problem['work_starts'][collab])
+            for p in problem['predecessors'][i]:
+                start = np.maximum(start, ends[:, p])
+            
+            # Skip absence days at the start and within the duration
+            base = collab * KEY_SPAN
+            offsets = problem['absence_offsets'][collab]
+            free_index = start - (np.searchsorted(problem['absence_keys'], base + start) - offsets)
+            start = self._free_day(problem, base, offsets, free_index)
+            if durations[i] > 0:
+                end = self._free_day(problem, base, offsets, free_index + durations[i] - 1) + 1
+            else:
+                end = start
+            
+            # Availability: work period, absences inside the span, overlapping vacation days
+            penalties["work_period_violation"] += (
+                (start < problem['period_starts'][collab]).astype(np.int64)
+                + (end > problem['period_ends'][collab])
+            ) * ConstraintValidator.PENALTIES["work_period_violation"]
+            absences = (np.searchsorted(problem['absence_keys'], base + end)
+                        - np.searchsorted(problem['absence_keys'], base + start))
+            penalties["ausencias"] += np.where(absences > 0, ConstraintValidator.PENALTIES["absence_conflict"], 0)
+            vacations = problem['vacations'][collab]
+            overlap = (np.minimum(end[:, None], vacations[:, :, 1])
+                       - np.maximum(start[:, None], vacations[:, :, 0])).clip(min=0)
+            penalties["vacation_conflict"] += overlap.sum(axis=1) * ConstraintValidator.PENALTIES["vacation_conflict"]
+            
+            ends[:, i] = end
+            collaborator_end[rows, collab] = np.maximum(collaborator_end[rows, collab], end)
+            first_start[rows, collab] = np.where(first_start[rows, collab] < 0, start, first_start[rows, collab])
+            busy[rows, collab] += end - start
+        
+        # A task never starts before its collaborator's previous end, so collaborator intervals never
+        # overlap and sobreposicoes_colaborador stays 0; idle time is then span minus busy days
+        idle = np.where(first_start >= 0, collaborator_end - first_start - busy, 0)
+        idle_penalty = np.where((idle > 5) & problem['scarce'], idle * ConstraintValidator.PENALTIES["resource_idle_time"], 0)
+        penalties["resource_idle_time"] += idle_penalty.sum(axis=1)
+        
+        # Project gaps over (collaborator's last end, + duration) intervals, like evaluate
+        gap_starts = collaborator_end[rows[:, None], assigned]
+        for columns in problem['project_columns']:
+            if len(columns) < 2:
+                continue
+            order = np.argsort(gap_starts[:, columns], axis=1, kind="stable")
+            sorted_starts = np.take_along_axis(gap_starts[:, columns], order, axis=1)
+            sorted_durations = durations[columns][order]
+            gaps = sorted_starts[:, 1:] - sorted_starts[:, :-1] - sorted_durations[:, :-1]
+            penalties["gaps_projeto"] += gaps.clip(min=0).sum(axis=1) * 50
+        
+        penalties["makespan"] = ends.max(axis=1, initial=0) * self.makespan_weight
+        
+        # Project end and start (end minus duration) over the evaluated tasks
+        if problem['deadlines'] or problem['start_dates']:
+            for j, deadline in problem['deadlines']:
+                columns = problem['project_columns'][j][problem['processed'][problem['project_columns'][j]]]
+                if len(columns):
+                    late = (ends[:, columns].max(axis=1) - deadline).clip(min=0)
+                    penalties["deadline_violation"] += late * ConstraintValidator.PENALTIES["deadline_violation"]
+            for j, required_start in problem['start_dates']:
+                columns = problem['project_columns'][j][problem['processed'][problem['project_columns'][j]]]
+                if len(columns):
+                    early = (required_start - (ends[:, columns] - durations[columns]).min(axis=1)).clip(min=0)
+                    penalties["project_start_violation"] += early * ConstraintValidator.PENALTIES["project_start_violation"]
+        
+        fitness = sum(penalties.values())
+        details = {
+            row: self.evaluate(solutions[row].tolist(), tasks, collaborators, project_deadlines,
+                               project_start_dates, problem['graph'])[2]
+            for row in details_for
+        }
+        return fitness, penalties, details
+    
+    @staticmethod
+    def _free_day(problem: Dict, base: np.ndarray, offsets: np.ndarray, free_index: np.ndarray) -> np.ndarray:
+        """Day of each collaborator's free_index-th day without absence (counted from day 0)"""
+        return free_index + np.searchsorted(problem['shifted_keys'], base + free_index, side="right") - offsets
@@ -0,0 +1,150 @@
+import datetime
+import hashlib
+from typing import List, Dict, Optional, Tuple
+from .precedence_graph import PrecedenceGraph
+from .scheduler import TaskScheduler
+
+
+class IncrementalPlanner:
+    """Re-solve support: freeze tasks a baseline roadmap already placed and split out the affected subproblem"""
+
+    @staticmethod
+    def sign_tasks(tasks: List[Dict], project_deadlines: Dict[str, int] = None,
+                   project_start_dates: Dict[str, int] = None,
+                   graph: Optional[PrecedenceGraph] = None) -> Dict[int, str]:
+        """
+        Store a signature ("assinatura") on each task and return task_id -> signature.
+
+        The signature hashes the task's own data, its project's start date and deadline and the
+        signatures of its predecessors, so any change upstream also changes every task below it.
+        Task ids are not part of it: they are renumbered on every run.
+        """
+        graph = graph or PrecedenceGraph(tasks)
+        signatures = {}
+        for task in graph.ordered_tasks():
+            payload = (
+                task["projeto"],
+                task["nome"],
+                task["duracao_dias"],
+                task["cargo_necessario"],
+                tuple(sorted(task["habilidades_necessarias"])),
+                (project_start_dates or {}).get(task["projeto"]),
+                (project_deadlines or {}).get(task["projeto"]),
+                tuple(sorted(signatures.get(p, "") for p in graph.predecessors[task["task_id"]]))
+            )
+            signature = hashlib.sha1(repr(payload).encode("utf-8")).hexdigest()[:16]
+            signatures[task["task_id"]] = signature
+            task["assinatura"] = signature
+        return signatures
+
+    @staticmethod
+    def freeze_unchanged(tasks: List[Dict], collaborators: List[Dict], saved_tarefas: List[Dict],
+                         ref_date: datetime.date, graph: Optional[PrecedenceGraph] = None) -> Dict[int, Dict]:
+        """
+        task_id -> {"colaborador_id", "inicio", "fim"} (work days) for the tasks that keep their baseline placement.
+
+        A task is frozen when the baseline has the same etapa with the same signature, its saved
+        collaborator is still selected, eligible and available over the saved days, it starts on or
+        after ref_date and all of its predecessors are frozen too.
+        """
+        graph = graph or PrecedenceGraph(tasks)
+        collab_map = {c["id"]: c for c in collaborators}
+        by_etapa = {t["etapa_id"]: t for t in saved_tarefas if t.get("etapa_id") is not None}
+
+        frozen = {}
+        for task in graph.ordered_tasks():
+            task_id = task["task_id"]
+            saved = by_etapa.get(task.get("etapa_id"))
+            if saved is None or not saved.get("assinatura") or saved["assinatura"] != task.get("assinatura"):
+                continue
+            if any(pred_id not in frozen for pred_id in graph.predecessors[task_id]):
+                continue
+
+            collab = collab_map.get(saved.get("colaborador_id"))
+            if collab is None or collab["cargo"] != task["cargo_necessario"]:
+                continue
+            if not set(task["habilidades_necessarias"]).issubset(set(collab["habilidades"])):
+                continue
+
+            if not saved.get("data_inicio"):
+                continue
+            start_date = datetime.datetime.strptime(saved["data_inicio"], "%d/%m/%Y").date()
+            if start_date < ref_date:
+                continue
+            start = TaskScheduler.calendar_date_to_work_day(start_date, ref_date)
+            end = start + task["duracao_dias"]
+
+            # Predecessors are frozen, so only their saved ends can delay this task
+            if any(frozen[pred_id]["fim"] > start for pred_id in graph.predecessors[task_id]):
+                continue
+            if not IncrementalPlanner._is_available(collab, start, end):
+                continue
+
+            frozen[task_id] = {"colaborador_id": collab["id"], "inicio": start, "fim": end}
+        return frozen
+
+    @staticmethod
+    def subproblem(tasks: List[Dict], collaborators: List[Dict],
+                   frozen: Dict[int, Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Tasks left to solve and the collaborators they can use.
+
+        Edges to frozen predecessors become an earliest start ("inicio_minimo"); frozen work on a
+        collaborator becomes a blocked range ("bloqueios") the model treats like an absence.
+        """
+        frozen_ends = {task_id: placement["fim"] for task_id, placement in frozen.items()}
+
+        sub_tasks = []
+        for task in tasks:
+            if task["task_id"] in frozen:
+                continue
+            preds = task.get("predecessoras", [])
+            sub_task = dict(task, predecessoras=[p for p in preds if p not in frozen])
+            frozen_pred_ends = [frozen_ends[p] for p in preds if p in frozen_ends]
+            if frozen_pred_ends:
+                sub_task["inicio_minimo"] = max(max(frozen_pred_ends), task.get("inicio_minimo", 0))
+            sub_tasks.append(sub_task)
+
+        # Only collaborators who can take some affected task are part of the subproblem
+        sub_collaborators = []
+        for collab in collaborators:
+            if not any(
+                collab["cargo"] == task["cargo_necessario"]
+                and set(task["habilidades_necessarias"]).issubset(set(collab["habilidades"]))
+                for task in sub_tasks
+            ):
+                continue
+            busy = [(p["inicio"], p["fim"]) for p in frozen.values() if p["colaborador_id"] == collab["id"]]
+            sub_collaborators.append(dict(collab, bloqueios=list(collab.get("bloqueios", [])) + busy))
+
+        return sub_tasks, sub_collaborators
+
+    @staticmethod
+    def merge(tasks: List[Dict], frozen: Dict[int, Dict], sub_tasks: List[Dict], sub_solution: List[int],
+              sub_starts: Dict[int, int], sub_ends: Dict[int, int]) -> Tuple[List[int], Dict[int, int], Dict[int, int]]:
+        """Full solution vector (aligned with tasks) plus work-day starts and ends for every task"""
+        assignments = {task["task_id"]: collab_id for task, collab_id in zip(sub_tasks, sub_solution)}
+        starts = dict(sub_starts)
+        ends = dict(sub_ends)
+        for task_id, placement in frozen.items():
+            assignments[task_id] = placement["colaborador_id"]
+            starts[task_id] = placement["inicio"]
+            ends[task_id] = placement["fim"]
+
+        solution = [assignments[task["task_id"]] for task in tasks]
+        return solution, starts, ends
+
+    @staticmethod
+    def _is_available(collab: Dict, start: int, end: int) -> bool:
+        """Collaborator works over [start, end): inside the work period, no absence or vacation"""
+        if collab.get("inicio") is not None and start < collab["inicio"]:
+            return False
+        if collab.get("termino") is not None and end > collab["termino"]:
+            return False
+        if any(start <= day < end for day in collab.get("ausencias", set())):
+            return False
+        for ferias_item in collab.get("ferias", []):
+            if isinstance(ferias_item, (tuple, list)) and len(ferias_item) == 2:
+                if ferias_item[0] < end and start < ferias_item[1]:
+                    return False
+        return True
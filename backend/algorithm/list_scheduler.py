@@ -0,0 +1,167 @@
+import bisect
+import heapq
+from typing import List, Dict, Tuple, Optional
+from .precedence_graph import PrecedenceGraph
+
+
+class ListScheduler:
+    """Greedy list scheduling in CP work-day units (no calendar, exclusive ends)"""
+
+    # "topological": input order; "longest_path": longest remaining chain first;
+    # "earliest_deadline": earliest latest-end (from deadlines) first, ties by longest chain
+    PRIORITY_RULES = ("topological", "longest_path", "earliest_deadline")
+
+    @staticmethod
+    def topological_order(tasks: List[Dict], graph: PrecedenceGraph = None) -> Optional[List[Dict]]:
+        """Order tasks so predecessors come first (stable on input order); None if there is a cycle"""
+        graph = graph or PrecedenceGraph(tasks)
+        if graph.has_cycle:
+            return None
+        return graph.ordered_tasks()
+
+    @staticmethod
+    def priority_order(graph: PrecedenceGraph, rule: str = "topological",
+                       latest_ends: Dict[int, int] = None) -> List[Dict]:
+        """Dependency order where, among the tasks whose predecessors are placed, the rule picks first"""
+        # Longest chain of work from each task to the end of the DAG (itself included)
+        remaining = {}
+        for task_id in reversed(graph.order):
+            duration = graph.task_map[task_id]["duracao_dias"]
+            remaining[task_id] = duration + max((remaining[s] for s in graph.successors[task_id]), default=0)
+
+        def key(task_id):
+            if rule == "longest_path":
+                return (-remaining[task_id], graph.position[task_id])
+            if rule == "earliest_deadline":
+                deadline = (latest_ends or {}).get(task_id, float("inf"))
+                return (deadline, -remaining[task_id], graph.position[task_id])
+            return (graph.position[task_id],)
+
+        pending = {task_id: len(preds) for task_id, preds in graph.predecessors.items()}
+        ready = [(key(task_id), task_id) for task_id, count in pending.items() if count == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            _, task_id = heapq.heappop(ready)
+            order.append(graph.task_map[task_id])
+            for succ_id in graph.successors[task_id]:
+                pending[succ_id] -= 1
+                if pending[succ_id] == 0:
+                    heapq.heappush(ready, (key(succ_id), succ_id))
+        return order
+
+    @staticmethod
+    def earliest_fit(busy: List[Tuple[int, int]], ready: int, duration: int) -> int:
+        """Earliest start >= ready where [start, start + duration) fits between sorted busy intervals"""
+        start = ready
+        for busy_start, busy_end in busy:
+            if busy_end <= start:
+                continue
+            if busy_start >= start + duration:
+                break
+            start = busy_end
+        return start
+
+    @classmethod
+    def schedule(cls, tasks: List[Dict], collaborators: List[Dict],
+                 eligible: Dict[int, List[int]],
+                 blocked: Dict[int, List[Tuple[int, int]]] = None,
+                 release_days: Dict[int, int] = None,
+                 project_deadlines: Dict[str, int] = None,
+                 graph: PrecedenceGraph = None,
+                 order: List[Dict] = None,
+                 latest_ends: Dict[int, int] = None) -> Optional[Dict]:
+        """
+        Place each task (in dependency order, or the given order) on the eligible collaborator
+        that finishes it first.
+
+        Returns assignments, starts, ends and makespan, plus a 'feasible' flag telling whether
+        every project deadline and every task's latest end (latest_ends, e.g. "termino_maximo"
+        and the tails propagated from it) was met. Returns None when some task cannot be placed at all
+        (no eligible collaborator, cyclic precedences or work period too short).
+        """
+        order = order or cls.topological_order(tasks, graph)
+        if order is None:
+            return None
+
+        collab_map = {c["id"]: c for c in collaborators}
+        busy = {c["id"]: sorted((blocked or {}).get(c["id"], [])) for c in collaborators}
+        loads = {c["id"]: 0 for c in collaborators}
+
+        assignments, starts, ends = {}, {}, {}
+        feasible = True
+
+        for task in order:
+            task_id = task["task_id"]
+            duration = task["duracao_dias"]
+
+            ready = (release_days or {}).get(task_id, 0)
+            for pred_id in task.get("predecessoras", []):
+                if pred_id in ends:
+                    ready = max(ready, ends[pred_id])
+
+            best = None
+            for collab_id in eligible.get(task_id, []):
+                collab = collab_map[collab_id]
+                collab_ready = ready
+                if collab.get("inicio") is not None and collab["inicio"] > 0:
+                    collab_ready = max(collab_ready, collab["inicio"])
+
+                start = cls.earliest_fit(busy[collab_id], collab_ready, duration)
+                end = start + duration
+                if collab.get("termino") is not None and end > collab["termino"]:
+                    continue
+
+                key = (end, loads[collab_id])
+                if best is None or key < best[0]:
+                    best = (key, collab_id, start, end)
+
+            if best is None:
+                return None
+
+            _, collab_id, start, end = best
+            assignments[task_id] = collab_id
+            starts[task_id] = start
+            ends[task_id] = end
+            bisect.insort(busy[collab_id], (start, end))
+            loads[collab_id] += duration
+
+            if project_deadlines and task["projeto"] in project_deadlines:
+                if end > project_deadlines[task["projeto"]]:
+                    feasible = False
+            if latest_ends and task_id in latest_ends and end > latest_ends[task_id]:
+                feasible = False
+
+        return {
+            "assignments": assignments,
+            "starts": starts,
+            "ends": ends,
+            "makespan": max(ends.values(), default=0),
+            "feasible": feasible
+        }
+
+    @classmethod
+    def best_schedule(cls, tasks: List[Dict], collaborators: List[Dict],
+                      eligible: Dict[int, List[int]],
+                      blocked: Dict[int, List[Tuple[int, int]]] = None,
+                      release_days: Dict[int, int] = None,
+                      project_deadlines: Dict[str, int] = None,
+                      graph: PrecedenceGraph = None,
+                      latest_ends: Dict[int, int] = None,
+                      rules: Tuple[str, ...] = PRIORITY_RULES) -> Optional[Dict]:
+        """Run every priority rule and keep the schedule that meets deadlines and tails with the smallest makespan"""
+        graph = graph or PrecedenceGraph(tasks)
+        if graph.has_cycle:
+            return None
+
+        best = None
+        for rule in rules:
+            order = cls.priority_order(graph, rule, latest_ends)
+            result = cls.schedule(tasks, collaborators, eligible, blocked, release_days,
+                                  project_deadlines, graph, order, latest_ends)
+            if result is None:
+                continue
+            result["rule"] = rule
+            if best is None or (not result["feasible"], result["makespan"]) < (not best["feasible"], best["makespan"]):
+                best = result
+        return best
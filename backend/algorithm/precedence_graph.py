@@ -0,0 +1,126 @@
+import heapq
+from typing import List, Dict, Optional
+
+
+class PrecedenceGraph:
+    """Task precedence DAG compiled once per solve: topological order, cycles, levels and transitive reduction"""
+
+    def __init__(self, tasks: List[Dict]):
+        self.tasks = tasks
+        self.task_map = {task["task_id"]: task for task in tasks}
+        self.position = {task["task_id"]: i for i, task in enumerate(tasks)}
+
+        # Direct predecessors restricted to known tasks, without duplicates
+        self.predecessors = {}
+        self.successors = {task["task_id"]: [] for task in tasks}
+        for task in tasks:
+            preds = []
+            for pred_id in task.get("predecessoras", []):
+                if pred_id in self.task_map and pred_id not in preds and pred_id != task["task_id"]:
+                    preds.append(pred_id)
+            self.predecessors[task["task_id"]] = preds
+            for pred_id in preds:
+                self.successors[pred_id].append(task["task_id"])
+
+        self.order = self._topological_order()
+        self.cycle = self._find_cycle() if len(self.order) != len(tasks) else None
+        if self.cycle is not None:
+            # Keep every task reachable for consumers: cyclic leftovers follow in input order
+            ordered = set(self.order)
+            self.order.extend(task["task_id"] for task in tasks if task["task_id"] not in ordered)
+
+        self.levels = self._levels()
+        self.reduced_predecessors = self._transitive_reduction()
+
+    @property
+    def has_cycle(self) -> bool:
+        return self.cycle is not None
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(preds) for preds in self.predecessors.values())
+
+    @property
+    def reduced_edge_count(self) -> int:
+        return sum(len(preds) for preds in self.reduced_predecessors.values())
+
+    def ordered_tasks(self) -> List[Dict]:
+        """Tasks with predecessors first (stable on input order)"""
+        return [self.task_map[task_id] for task_id in self.order]
+
+    def ordered_indices(self) -> List[int]:
+        """Positions in the input task list, in dependency order (for solution vectors aligned with tasks)"""
+        return [self.position[task_id] for task_id in self.order]
+
+    def describe_cycle(self) -> str:
+        """Human readable cycle, e.g. 'A -> B -> A'"""
+        if self.cycle is None:
+            return ""
+        names = [self.task_map[task_id].get("nome", str(task_id)) for task_id in self.cycle]
+        return " -> ".join(names + names[:1])
+
+    def _topological_order(self) -> List[int]:
+        """Kahn's algorithm with a position-ordered ready queue; leaves out tasks on or behind a cycle"""
+        pending = {task_id: len(preds) for task_id, preds in self.predecessors.items()}
+        ready = [self.position[task_id] for task_id, count in pending.items() if count == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            task_id = self.tasks[heapq.heappop(ready)]["task_id"]
+            order.append(task_id)
+            for succ_id in self.successors[task_id]:
+                pending[succ_id] -= 1
+                if pending[succ_id] == 0:
+                    heapq.heappush(ready, self.position[succ_id])
+        return order
+
+    def _find_cycle(self) -> Optional[List[int]]:
+        """One cycle among the tasks Kahn could not order (iterative DFS over predecessors)"""
+        ordered = set(self.order)
+        remaining = [task["task_id"] for task in self.tasks if task["task_id"] not in ordered]
+        state = {}  # task_id -> 1 on the current path, 2 finished
+        for root in remaining:
+            if root in state:
+                continue
+            path = [root]
+            stack = [iter(self.predecessors[root])]
+            state[root] = 1
+            while stack:
+                pred_id = next(stack[-1], None)
+                if pred_id is None:
+                    state[path.pop()] = 2
+                    stack.pop()
+                elif state.get(pred_id) == 1:
+                    # Path runs successor -> predecessor, so reverse it to read in dependency order
+                    return list(reversed(path[path.index(pred_id):]))
+                elif pred_id not in state and pred_id not in ordered:
+                    state[pred_id] = 1
+                    path.append(pred_id)
+                    stack.append(iter(self.predecessors[pred_id]))
+        return None
+
+    def _levels(self) -> Dict[int, int]:
+        """Longest chain of predecessors in front of each task (0 = no predecessors)"""
+        levels = {}
+        for task_id in self.order:
+            levels[task_id] = max((levels.get(p, 0) + 1 for p in self.predecessors[task_id]), default=0)
+        return levels
+
+    def _transitive_reduction(self) -> Dict[int, List[int]]:
+        """Drop edges implied by a longer path, using ancestor bitsets in topological order"""
+        if self.cycle is not None:
+            return {task_id: list(preds) for task_id, preds in self.predecessors.items()}
+
+        bit = {task_id: 1 << i for i, task_id in enumerate(self.order)}
+        ancestors = {}
+        reduced = {}
+        for task_id in self.order:
+            preds = self.predecessors[task_id]
+            implied = 0
+            reach = 0
+            for pred_id in preds:
+                implied |= ancestors[pred_id]
+                reach |= ancestors[pred_id] | bit[pred_id]
+            reduced[task_id] = [p for p in preds if not bit[p] & implied]
+            ancestors[task_id] = reach
+        return reduced
@@ -1,6 +1,7 @@
 import datetime
 from typing import List, Dict, Tuple
 from utils.calendar_utils import is_business_day, is_holiday, is_weekend
+from .precedence_graph import PrecedenceGraph
 
 class TaskScheduler:
     """Handles task scheduling logic"""
@@ -157,21 +158,34 @@ class TaskScheduler:
         NOT work days, so they should NOT be converted.
         """
         
-        schedule = []
-        
-        for i, task in enumerate(tasks):
+        starts, ends = {}, {}
+        for task in tasks:
             task_id = task["task_id"]
-            collaborator_id = solution[i]
-            collaborator = next(c for c in collaborators if c["id"] == collaborator_id)
             
             # USE EXACT VALUES FROM SOLVER - DO NOT RECALCULATE
             if task_id in variables['task_starts'] and task_id in variables['task_ends']:
-                start_work_day = solver.Value(variables['task_starts'][task_id])
-                end_work_day = solver.Value(variables['task_ends'][task_id])
+                starts[task_id] = solver.Value(variables['task_starts'][task_id])
+                ends[task_id] = solver.Value(variables['task_ends'][task_id])
             else:
                 # Fallback to standard calculation if solver values not available
                 print(f"WARNING: Task {task_id} not found in solver variables, using fallback")
                 return TaskScheduler.build_schedule(solution, tasks, collaborators, ref_date, project_start_dates)
+        
+        return TaskScheduler.build_schedule_from_work_days(solution, tasks, collaborators, ref_date, starts, ends)
+    
+    @staticmethod
+    def build_schedule_from_work_days(solution: List[int], tasks: List[Dict], collaborators: List[Dict],
+                                      ref_date: datetime.date, starts: Dict[int, int],
+                                      ends: Dict[int, int]) -> List[Dict]:
+        """Build schedule from abstract work-day starts and exclusive ends (CP solver or list heuristic)"""
+        schedule = []
+        
+        for i, task in enumerate(tasks):
+            task_id = task["task_id"]
+            collaborator_id = solution[i]
+            collaborator = next(c for c in collaborators if c["id"] == collaborator_id)
+            start_work_day = starts[task_id]
+            end_work_day = ends[task_id]
             
             # Convert abstract work days to calendar dates (skipping weekends and holidays)
             # start_work_day = 0 means first business day from ref_date
@@ -220,6 +234,8 @@ class TaskScheduler:
             
             schedule.append({
                 "projeto": task["projeto"],
+                "etapa_id": task.get("etapa_id"),
+                "assinatura": task.get("assinatura"),
                 "nome_tarefa": task["nome"],
                 "inicio_dias": start_work_day,
                 "data_inicio": start_date,
@@ -237,13 +253,16 @@ class TaskScheduler:
     @staticmethod
     def build_schedule(solution: List[int], tasks: List[Dict], 
                       collaborators: List[Dict], ref_date: datetime.date,
-                      project_start_dates: Dict[str, int] = None) -> List[Dict]:
+                      project_start_dates: Dict[str, int] = None,
+                      graph: PrecedenceGraph = None) -> List[Dict]:
         """Build complete schedule from solution (standard method for GA/ACO)"""
         allocations = {col["id"]: [] for col in collaborators}
         task_completions = {}  # Track individual task completion times
-        schedule = []
+        schedule = [None] * len(tasks)  # Filled in dependency order, returned in task order
         
-        for i, task in enumerate(tasks):
+        graph = graph or PrecedenceGraph(tasks)
+        for i in graph.ordered_indices():
+            task = tasks[i]
             collaborator_id = solution[i]
             collaborator = next(c for c in collaborators if c["id"] == collaborator_id)
             
@@ -290,8 +309,10 @@ class TaskScheduler:
                     "data": ausencia_date
                 })
             
-            schedule.append({
+            schedule[i] = {
                 "projeto": task["projeto"],
+                "etapa_id": task.get("etapa_id"),
+                "assinatura": task.get("assinatura"),
                 "nome_tarefa": task["nome"],
                 "inicio_dias": start_day,
                 "data_inicio": start_date,
@@ -302,6 +323,6 @@ class TaskScheduler:
                 "duracao_dias": task["duracao_dias"],
                 "ferias": ferias_info,
                 "ausencias": ausencias_info
-            })
+            }
             
         return schedule
\ No newline at end of file
@@ -0,0 +1,106 @@
+from typing import Dict, Tuple, Iterator
+
+import numpy as np
+
+from population_search import PopulationSearch
+
+# Pheromone bounds (MAX-MIN style): the floor keeps every eligible collaborator reachable
+TAU_MIN = 0.1
+TAU_MAX = 1.0
+
+
+class AntColonyOptimization(PopulationSearch):
+    """
+    Ant colony optimisation over task assignments, with pheromone and heuristic as task x collaborator arrays.
+
+    Both arrays are zero wherever a collaborator is not eligible, so ants never pick one. Each
+    iteration the whole colony is built at once: per task, an ant takes the best-scoring
+    collaborator (tau^alpha * eta^beta) with probability q0 and otherwise samples one in
+    proportion to that score. eta favours collaborators with fewer unavailable days. The colony is
+    scored by PopulationSearch; pheromone then evaporates by rho and is deposited on
+    the iteration's best and the best-so-far assignments (elitist ant), in proportion to quality.
+    """
+
+    REPORT_KEY = "ant_colony"
+    LOG_TAG = "ACO"
+    ITERATION_LABEL = "Iteração"
+    START_MESSAGE = "Construindo soluções com a colônia de formigas..."
+
+    def __init__(self, num_ants: int = 50, iterations: int = 200, alpha: float = 1.0, beta: float = 2.0,
+                 rho: float = 0.5, q0: float = 0.9, seed: int = None, **kwargs):
+        super().__init__(iterations=iterations, seed=seed, **kwargs)
+        if num_ants < 1 or not 0 < rho <= 1 or not 0 <= q0 <= 1:
+            raise ValueError(f"Parâmetros da colônia inválidos: {num_ants} formigas, rho={rho}, q0={q0} "
+                             f"(ao menos 1 formiga, 0 < rho <= 1 e 0 <= q0 <= 1)")
+        self.num_ants = num_ants
+        self.alpha = alpha
+        self.beta = beta
+        self.rho = rho
+        self.q0 = q0
+
+    def _search(self, instance: Dict) -> Iterator[Tuple[np.ndarray, float, int]]:
+        """Best of the seed assignments (or of a first colony), then the best ant of each iteration"""
+        mask = instance['eligible_mask']
+        eta = self._heuristic(instance)
+        tau = np.where(mask, TAU_MAX, 0.0)
+
+        seeds = self._seed_individuals(instance)
+        ants = np.array(seeds) if seeds else self._construct(tau, eta, mask)
+        fitness, makespans = self._evaluate(instance, ants)
+        best = int(np.argmin(fitness))
+        best_ant, best_fitness = ants[best].copy(), float(fitness[best])
+        yield ants[best], fitness[best], makespans[best]
+
+        # The seeds lay the first trail, so exploitation starts from the greedy assignment
+        tau = self._update(tau, mask, ants[best], best_ant, float(fitness[best]), best_fitness)
+        while True:
+            ants = self._construct(tau, eta, mask)
+            fitness, makespans = self._evaluate(instance, ants)
+            leader = int(np.argmin(fitness))
+            if fitness[leader] < best_fitness:
+                best_ant, best_fitness = ants[leader].copy(), float(fitness[leader])
+            tau = self._update(tau, mask, ants[leader], best_ant, float(fitness[leader]), best_fitness)
+            yield ants[leader], fitness[leader], makespans[leader]
+
+    def _search_settings(self) -> Dict:
+        return {
+            'num_ants': self.num_ants,
+            'alpha': self.alpha,
+            'beta': self.beta,
+            'rho': self.rho,
+            'q0': self.q0
+        }
+
+    def _heuristic(self, instance: Dict) -> np.ndarray:
+        """eta: horizon / (horizon + days the collaborator cannot work within it), on eligible cells only"""
+        greedy = instance['greedy']
+        horizon = max(greedy["makespan"] if greedy is not None else int(instance['durations'].sum()), 1)
+        unavailable = np.array([
+            sum(end - start for start, end in self._collaborator_blocked_ranges(c, horizon))
+            for c in instance['collaborators']
+        ], dtype=np.float64)
+        return np.where(instance['eligible_mask'], horizon / (horizon + unavailable), 0.0)
+
+    def _update(self, tau: np.ndarray, mask: np.ndarray, leader: np.ndarray, best_ant: np.ndarray,
+                leader_fitness: float, best_fitness: float) -> np.ndarray:
+        """Evaporate, then deposit on the iteration's best (scaled by its quality) and the best-so-far"""
+        rows = np.arange(tau.shape[0])
+        tau = tau * (1 - self.rho)
+        tau[rows, leader] += self.rho * TAU_MAX * best_fitness / max(leader_fitness, 1.0)
+        tau[rows, best_ant] += self.rho * TAU_MAX
+        return np.where(mask, np.clip(tau, TAU_MIN, TAU_MAX), 0.0)
+
+    def _construct(self, tau: np.ndarray, eta: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """num_ants x tasks matrix of collaborator indices, every ant built at once"""
+        weights = np.where(mask, tau ** self.alpha * eta ** self.beta, 0.0)
+        exploit = np.argmax(weights, axis=1)
+
+        # Roulette per task: the first collaborator whose cumulative share reaches the draw. Only
+        # eligible columns raise the sum, and the last one reaches exactly 1, so draws in (0, 1]
+        # always land on an eligible collaborator
+        cumulative = np.cumsum(weights, axis=1)
+        cumulative /= cumulative[:, -1:]
+        draws = 1.0 - self.rng.random((self.num_ants, weights.shape[0]))
+        explore = np.argmax(cumulative[None, :, :] >= draws[:, :, None], axis=2)
+
+        return np.where(self.rng.random(explore.shape) < self.q0, exploit[None, :], explore)
@@ -0,0 +1,232 @@
+import time
+from typing import List, Dict, Tuple, AsyncGenerator, Optional
+
+try:
+    from ortools.sat.python import cp_model
+except ImportError:
+    cp_model = None
+
+from constraint_programming import ConstraintProgramming
+
+# Share of the remaining time a master (assignment) solve may take, and its cap in seconds
+MASTER_TIME_SHARE = 0.2
+MASTER_MAX_SECONDS = 10
+
+# Share of the total time limit each sequencing solve gets (the last one takes what is left)
+SEQUENCING_TIME_SHARE = 0.25
+
+# Below this many seconds left no new iteration is started
+MIN_ITERATION_SECONDS = 1
+
+# Weights on each collaborator's load in the master: all start at BASE_PENALTY and a bottleneck's
+# weight rises by a flat PENALTY_STEP per hit (a tenth of the starting weight, whatever its load)
+BASE_PENALTY = 10
+PENALTY_STEP = 1
+
+
+class AssignmentSequencingCP(ConstraintProgramming):
+    """
+    Two-stage engine: a master model assigns tasks, a sequencing model times them; repeat with feedback.
+
+    The master only has assignment literals: it balances each collaborator's load plus unavailable
+    days, weighted by per-collaborator penalties. The sequencing stage is the regular CP model with
+    every assignment fixed, which presolve reduces to intervals, precedences and no-overlap. After
+    each schedule the collaborator holding most of its critical chain gets a higher penalty and the assignment is
+    cut from the master, until the time limit or max_iterations is reached. The best schedule wins.
+    """
+
+    def __init__(self, max_iterations: int = 8, **kwargs):
+        super().__init__(**kwargs)
+        self.max_iterations = max_iterations
+        # Plain ConstraintProgramming settings for the sequencing models (frozen tasks are handled here)
+        self._stage_options = {k: v for k, v in kwargs.items() if k not in ("warm_start", "frozen")}
+
+    async def run_with_progress(self, tasks: List[Dict], collaborators: List[Dict],
+                                project_deadlines: Dict[str, int] = None,
+                                project_start_dates: Dict[str, int] = None) -> AsyncGenerator[Dict, None]:
+        """Run the assignment/sequencing loop off the event loop, then report like the single model"""
+        async for event in self._run_off_loop("Atribuindo e sequenciando em etapas...", tasks, collaborators,
+                                              project_deadlines, project_start_dates):
+            yield event
+
+    def _solve_model(self, tasks: List[Dict], collaborators: List[Dict],
+                     project_deadlines: Dict[str, int] = None,
+                     project_start_dates: Dict[str, int] = None) -> Tuple[Optional[List[int]], float, Dict, Optional['cp_model.CpSolver'], Dict]:
+        """Iterate master and sequencing stages; falls back to the joint model when no assignment sequences"""
+        started_at = time.monotonic()
+        eligible = self._compute_eligibility(tasks, collaborators)
+        collab_ids = [c["id"] for c in collaborators]
+
+        # Days each collaborator cannot work before a rough horizon weigh like assigned work
+        horizon = sum(task["duracao_dias"] for task in tasks)
+        unavailable = {
+            c["id"]: sum(end - start for start, end in self._collaborator_blocked_ranges(c, horizon))
+            for c in collaborators
+        }
+
+        penalties = {collab_id: BASE_PENALTY for collab_id in collab_ids}
+        tried = []
+        history = []
+        best = None
+        hints = dict(self.warm_start)
+
+        for iteration in range(1, self.max_iterations + 1):
+            remaining = self.time_limit_seconds - (time.monotonic() - started_at)
+            if remaining < MIN_ITERATION_SECONDS:
+                break
+
+            # 1. Master: assignments only
+            master_limit = min(MASTER_MAX_SECONDS, max(remaining * MASTER_TIME_SHARE, 0.5))
+            assignments, master_status = self._solve_master(tasks, eligible, collab_ids, unavailable,
+                                                            penalties, tried, hints, master_limit)
+            if assignments is None:
+                history.append({'iteration': iteration, 'master_status': master_status})
+                print(f"[CP 2-STAGE] Iteration {iteration}: master {master_status}, stopping")
+                break
+            tried.append(assignments)
+
+            # 2. Sequencing: the joint model with every assignment fixed
+            remaining = self.time_limit_seconds - (time.monotonic() - started_at)
+            sequencing_limit = max(MIN_ITERATION_SECONDS, min(remaining, self.time_limit_seconds * SEQUENCING_TIME_SHARE))
+            sequencing_tasks = [dict(task, colaborador_fixo=assignments[task["task_id"]]) for task in tasks]
+            sequencer = ConstraintProgramming(**dict(
+                self._stage_options,
+                use_capacity_pools=False,
+                time_limit_seconds=sequencing_limit,
+                warm_start={t: h for t, h in hints.items() if h.get("colaborador_id") == assignments.get(t)}
+            ))
+            try:
+                result = sequencer._solve_model(sequencing_tasks, collaborators, project_deadlines, project_start_dates)
+            except ValueError as e:
+                # e.g. a deadline this assignment cannot meet: cut it and move on
+                print(f"[CP 2-STAGE] Iteration {iteration}: sequencing rejected: {e}")
+                history.append({'iteration': iteration, 'master_status': master_status, 'status': 'INVALID'})
+                continue
+
+            solution, fitness, solve_info, solver, variables = result
+            entry = {'iteration': iteration, 'master_status': master_status,
+                     'status': solve_info.get('status'), 'makespan': solve_info.get('makespan'), 'fitness': fitness}
+            history.append(entry)
+            print(f"[CP 2-STAGE] Iteration {iteration}: {entry['status']}, makespan={entry['makespan']}, fitness={fitness}")
+            if solution is None:
+                continue
+
+            # 3. Feedback: penalise the collaborator holding most of this schedule's critical chain
+            starts, ends = self.solution_timings(tasks, solver, variables)
+            bottleneck = self._bottleneck_collaborator(tasks, solution, starts, ends)
+            if bottleneck is not None:
+                penalties[bottleneck] = penalties.get(bottleneck, BASE_PENALTY) + PENALTY_STEP
+                entry['bottleneck'] = bottleneck
+
+            # The next master and sequencing solves start from the best schedule so far
+            if best is None or fitness < best[1]:
+                best = result
+                entry['best'] = True
+                hints = {
+                    task["task_id"]: {"colaborador_id": collab_id, "inicio": starts[task["task_id"]]}
+                    for task, collab_id in zip(tasks, solution)
+                }
+
+        report = {
+            'iterations': len(history),
+            'history': history,
+            'penalties': {c: w for c, w in penalties.items() if w > BASE_PENALTY}
+        }
+
+        if best is None:
+            # No assignment could be sequenced: the joint model gets whatever time is left
+            print("[CP 2-STAGE] No sequenced assignment, falling back to the joint model")
+            remaining = self.time_limit_seconds - (time.monotonic() - started_at)
+            fallback = ConstraintProgramming(**dict(
+                self._stage_options,
+                time_limit_seconds=max(MIN_ITERATION_SECONDS, remaining),
+                warm_start=self.warm_start
+            ))
+            best = fallback._solve_model(tasks, collaborators, project_deadlines, project_start_dates)
+            report['fallback'] = True
+
+        solution, fitness, solve_info, solver, variables = best
+        if not report.get('fallback') and solve_info.get('status') == 'OPTIMAL':
+            # Optimal for its fixed assignments only, not over all assignments
+            solve_info['status'] = 'FEASIBLE'
+        report['solve_time'] = round(time.monotonic() - started_at, 2)
+        variables.setdefault('model_stats', {})['assignment_sequencing'] = report
+        solve_info.setdefault('model_stats', variables['model_stats'])
+        return solution, fitness, solve_info, solver, variables
+
+    def _solve_master(self, tasks: List[Dict], eligible: Dict[int, List[int]], collab_ids: List[int],
+                      unavailable: Dict[int, int], penalties: Dict[int, int], tried: List[Dict[int, int]],
+                      hints: Dict[int, Dict], time_limit: float) -> Tuple[Optional[Dict[int, int]], str]:
+        """Assignment model: one eligible collaborator per task, minimising the penalised peak and total load"""
+        model = cp_model.CpModel()
+        literals = {}
+        for task in tasks:
+            task_id = task["task_id"]
+            literals[task_id] = {c: model.NewBoolVar(f'm_{task_id}_{c}') for c in eligible[task_id]}
+            model.AddExactlyOne(literals[task_id].values())
+            hinted = hints.get(task_id, {}).get("colaborador_id")
+            if hinted in literals[task_id]:
+                for collab_id, literal in literals[task_id].items():
+                    model.AddHint(literal, collab_id == hinted)
+
+        total = sum(task["duracao_dias"] for task in tasks)
+        max_penalty = max(penalties.values(), default=BASE_PENALTY)
+        peak = model.NewIntVar(0, (total + max(unavailable.values(), default=0)) * max_penalty, 'peak')
+        weighted_loads = []
+        for collab_id in collab_ids:
+            terms = [(literals[t["task_id"]][collab_id], t["duracao_dias"]) for t in tasks
+                     if collab_id in literals[t["task_id"]]]
+            if not terms:
+                continue
+            load = cp_model.LinearExpr.WeightedSum([lit for lit, _ in terms], [dur for _, dur in terms])
+            weighted = penalties.get(collab_id, BASE_PENALTY) * (load + unavailable.get(collab_id, 0))
+            model.Add(peak >= weighted)
+            weighted_loads.append(weighted)
+
+        # No-good cuts: never hand the sequencing stage an assignment it has already seen
+        for assignments in tried:
+            model.Add(sum(literals[task_id][collab_id] for task_id, collab_id in assignments.items()) <= len(assignments) - 1)
+
+        # The peak dominates; the total keeps the other collaborators from drifting
+        model.Minimize(peak * len(collab_ids) + sum(weighted_loads))
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = time_limit
+        solver.parameters.num_search_workers = self.num_search_workers
+        status = solver.Solve(model)
+        status_name = solver.StatusName(status)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return None, status_name
+
+        assignments = {}
+        for task_id, options in literals.items():
+            assignments[task_id] = next(c for c, literal in options.items() if solver.Value(literal))
+        return assignments, status_name
+
+    @staticmethod
+    def _bottleneck_collaborator(tasks: List[Dict], solution: List[int],
+                                 starts: Dict[int, int], ends: Dict[int, int]) -> Optional[int]:
+        """
+        Collaborator with the most work days on a critical chain of the schedule.
+
+        The chain is followed back from the task that ends last, through back-to-back links: a
+        predecessor, or a task of the same collaborator, ending exactly when the current one starts.
+        """
+        task_map = {task["task_id"]: task for task in tasks}
+        assigned = {task["task_id"]: collab_id for task, collab_id in zip(tasks, solution)}
+        ending_at = {}
+        for task_id, end in ends.items():
+            ending_at.setdefault(end, []).append(task_id)
+
+        current = max(ends, key=lambda task_id: ends[task_id], default=None)
+        chain_days = {}
+        seen = set()
+        while current is not None and current not in seen:
+            seen.add(current)
+            chain_days[assigned[current]] = chain_days.get(assigned[current], 0) + task_map[current]["duracao_dias"]
+            candidates = [
+                t for t in ending_at.get(starts[current], [])
+                if t in task_map[current].get("predecessoras", []) or assigned[t] == assigned[current]
+            ]
+            current = candidates[0] if candidates else None
+        return max(chain_days, key=lambda collab_id: chain_days[collab_id], default=None)
@@ -0,0 +1,165 @@
+import time
+from typing import List, Dict, Tuple, AsyncGenerator, Optional
+
+from constraint_programming import ConstraintProgramming
+
+# CP days are work days: one week is five of them
+WEEK_DAYS = 5
+
+# Share of the time limit spent on the weekly model
+COARSE_TIME_SHARE = 0.3
+
+
+class CoarseToFineCP(ConstraintProgramming):
+    """
+    Two-level CP-SAT: a weekly model picks assignments and approximate windows, a daily model refines them.
+
+    The weekly model rounds durations up to whole weeks and blocks the weeks in which a collaborator
+    is away for most of the days. The daily model then keeps each task on its weekly collaborator and
+    within window_slack_days of its weekly window (opened earlier by the rounding stretch), so each
+    collaborator's sequence is settled at day granularity over small domains. When the restricted
+    daily model finds nothing, the unrestricted one is solved instead, hinted with the weekly solution.
+    """
+
+    def __init__(self, window_slack_days: int = WEEK_DAYS, **kwargs):
+        super().__init__(**kwargs)
+        self.window_slack_days = window_slack_days
+        # Plain ConstraintProgramming settings for the two level models (frozen tasks are handled here)
+        self._level_options = {k: v for k, v in kwargs.items() if k not in ("warm_start", "frozen")}
+
+    async def run_with_progress(self, tasks: List[Dict], collaborators: List[Dict],
+                                project_deadlines: Dict[str, int] = None,
+                                project_start_dates: Dict[str, int] = None) -> AsyncGenerator[Dict, None]:
+        """Run both levels off the event loop, then report like the single model"""
+        async for event in self._run_off_loop("Resolvendo em semanas e refinando em dias...", tasks, collaborators,
+                                              project_deadlines, project_start_dates):
+            yield event
+
+    def _solve_model(self, tasks: List[Dict], collaborators: List[Dict],
+                     project_deadlines: Dict[str, int] = None,
+                     project_start_dates: Dict[str, int] = None) -> Tuple[Optional[List[int]], float, Dict, Optional['cp_model.CpSolver'], Dict]:
+        """Weekly model, then the daily model restricted to the weekly assignments and windows"""
+        project_deadlines = project_deadlines or {}
+        project_start_dates = project_start_dates or {}
+        started_at = time.monotonic()
+        report = {'week_days': WEEK_DAYS, 'window_slack_days': self.window_slack_days}
+
+        # 1. Weekly model
+        coarse_tasks, coarse_collaborators = self._weekly_instance(tasks, collaborators)
+        coarse = ConstraintProgramming(**dict(
+            self._level_options,
+            time_limit_seconds=max(1, self.time_limit_seconds * COARSE_TIME_SHARE),
+            warm_start={
+                t: dict(h, inicio=h["inicio"] // WEEK_DAYS if h.get("inicio") is not None else None)
+                for t, h in self.warm_start.items()
+            }
+        ))
+        try:
+            coarse_solution, _, coarse_info, coarse_solver, coarse_variables = coarse.solve_instance(
+                coarse_tasks, coarse_collaborators,
+                {p: -(-d // WEEK_DAYS) for p, d in project_deadlines.items()},
+                {p: d // WEEK_DAYS for p, d in project_start_dates.items()}
+            )
+        except ValueError as e:
+            # Rounding can make the weekly instance infeasible; the daily model decides
+            print(f"[CP COARSE] Weekly model rejected: {e}")
+            coarse_solution, coarse_info = None, {'status': 'INVALID', 'error': str(e)}
+        report.update({
+            'coarse_status': coarse_info.get('status'),
+            'coarse_makespan_weeks': coarse_info.get('makespan'),
+            'coarse_horizon_weeks': coarse_info.get('model_stats', {}).get('horizon'),
+            'coarse_solve_time': round(time.monotonic() - started_at, 2)
+        })
+
+        fine_options = dict(
+            self._level_options,
+            # Fixed collaborators are named individually, so no capacity pools in the daily model
+            use_capacity_pools=False,
+            time_limit_seconds=max(1, self.time_limit_seconds - (time.monotonic() - started_at))
+        )
+
+        # 2. Daily model around the weekly solution
+        solution, fitness, solve_info, solver, variables = None, None, {}, None, {}
+        if coarse_solution is not None:
+            coarse_starts, coarse_ends = self.solution_timings(coarse_tasks, coarse_solver, coarse_variables)
+            # Rounding up to weeks stretches every chain; let windows open earlier by the same ratio
+            stretch = sum(t["duracao_dias"] for t in tasks) / max(sum(t["duracao_dias"] for t in coarse_tasks) * WEEK_DAYS, 1)
+            report['stretch'] = round(stretch, 3)
+            fine_tasks = []
+            for task, collab_id in zip(tasks, coarse_solution):
+                window_start = int(coarse_starts[task["task_id"]] * WEEK_DAYS * stretch) - self.window_slack_days
+                window_end = coarse_ends[task["task_id"]] * WEEK_DAYS + self.window_slack_days
+                fine_tasks.append(dict(
+                    task,
+                    colaborador_fixo=collab_id,
+                    inicio_minimo=max(window_start, task.get("inicio_minimo", 0), 0),
+                    termino_maximo=min(window_end, task["termino_maximo"]) if task.get("termino_maximo") is not None else window_end
+                ))
+            hints = {
+                task["task_id"]: {"colaborador_id": collab_id, "inicio": coarse_starts[task["task_id"]] * WEEK_DAYS}
+                for task, collab_id in zip(tasks, coarse_solution)
+            }
+            try:
+                fine = ConstraintProgramming(**dict(fine_options, warm_start=hints))
+                solution, fitness, solve_info, solver, variables = fine._solve_model(
+                    fine_tasks, collaborators, project_deadlines, project_start_dates
+                )
+            except ValueError as e:
+                print(f"[CP COARSE] Daily windows rejected: {e}")
+                solve_info = {'status': 'INVALID', 'error': str(e)}
+            report['fine_status'] = solve_info.get('status')
+            report['fine_horizon'] = solve_info.get('model_stats', {}).get('horizon')
+        else:
+            hints = self.warm_start
+
+        # 3. Fallback: the unrestricted daily model, hinted with whatever the weekly model found
+        report['fallback'] = solution is None
+        if solution is None:
+            print("[CP COARSE] Falling back to the unrestricted daily model")
+            fallback = ConstraintProgramming(**dict(
+                fine_options,
+                use_capacity_pools=self.use_capacity_pools,
+                time_limit_seconds=max(1, self.time_limit_seconds - (time.monotonic() - started_at)),
+                warm_start=hints
+            ))
+            solution, fitness, solve_info, solver, variables = fallback._solve_model(
+                tasks, collaborators, project_deadlines, project_start_dates
+            )
+
+        report['solve_time'] = round(time.monotonic() - started_at, 2)
+        variables.setdefault('model_stats', {})['coarse_to_fine'] = report
+        solve_info.setdefault('model_stats', variables['model_stats'])
+        return solution, fitness, solve_info, solver, variables
+
+    @classmethod
+    def _weekly_instance(cls, tasks: List[Dict], collaborators: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Tasks and collaborators on a weekly grid (durations rounded up, mostly-absent weeks blocked)"""
+        coarse_tasks = []
+        for task in tasks:
+            coarse_task = dict(task, duracao_dias=-(-task["duracao_dias"] // WEEK_DAYS))
+            # Windows inherited from an incremental or rolling run are relaxed to whole weeks
+            if task.get("inicio_minimo") is not None:
+                coarse_task["inicio_minimo"] = task["inicio_minimo"] // WEEK_DAYS
+            if task.get("termino_maximo") is not None:
+                coarse_task["termino_maximo"] = -(-task["termino_maximo"] // WEEK_DAYS)
+            coarse_tasks.append(coarse_task)
+
+        horizon = max(
+            [end for c in collaborators for _, end in cls._merge_unavailable_ranges(c, 10 ** 6)] + [0]
+        ) + WEEK_DAYS
+        coarse_collaborators = []
+        for collab in collaborators:
+            away = {}
+            for start, end in cls._merge_unavailable_ranges(collab, horizon):
+                for day in range(start, end):
+                    away[day // WEEK_DAYS] = away.get(day // WEEK_DAYS, 0) + 1
+            blocked_weeks = [(week, week + 1) for week, days in sorted(away.items()) if days * 2 > WEEK_DAYS]
+            coarse_collaborators.append(dict(
+                collab,
+                ausencias=set(),
+                ferias=[],
+                bloqueios=blocked_weeks,
+                inicio=collab["inicio"] // WEEK_DAYS if collab.get("inicio") is not None else None,
+                termino=-(-collab["termino"] // WEEK_DAYS) if collab.get("termino") is not None else None
+            ))
+        return coarse_tasks, coarse_collaborators
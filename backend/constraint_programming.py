@@ -9,61 +9,75 @@ except ImportError:
     ORTOOLS_AVAILABLE = False
     cp_model = None
 
-from algorithm.evaluator import SolutionEvaluator
-from algorithm.scheduler import TaskScheduler
+from algorithm.list_scheduler import ListScheduler
+from algorithm.precedence_graph import PrecedenceGraph
+from algorithm.incremental import IncrementalPlanner
+from scheduling_engine import SchedulingEngine, sanitize_for_json
 
-def sanitize_for_json(value):
-    """Convert infinite or NaN values to safe numbers for JSON serialization"""
-    if value == float('inf') or value != value:  # NaN check
-        return 999999999
-    return value
-
-class ConstraintProgramming:
+class ConstraintProgramming(SchedulingEngine):
     def __init__(self, makespan_weight: int = 200, time_limit_seconds: int = 600, 
                  load_balancing_weight: int = 50, parallelization_bonus: int = 100,
-                 enable_idle_time_penalty: bool = False, idle_time_weight: int = 80):
+                 enable_idle_time_penalty: bool = True, idle_time_weight: int = 80,
+                 prune_ineligible: bool = True, roadmap_end_day: Optional[int] = None,
+                 load_balancing_mode: str = "l1", break_symmetry: bool = True,
+                 use_capacity_pools: bool = False, presolve: bool = True,
+                 warm_start: Optional[Dict[int, Dict]] = None,
+                 frozen: Optional[Dict[int, Dict]] = None, num_search_workers: int = 4):
         if not ORTOOLS_AVAILABLE:
             raise ImportError("Google OR-Tools não está instalado. Execute: pip install ortools")
+        super().__init__(makespan_weight=makespan_weight, time_limit_seconds=time_limit_seconds,
+                         load_balancing_weight=load_balancing_weight, load_balancing_mode=load_balancing_mode,
+                         roadmap_end_day=roadmap_end_day, warm_start=warm_start, frozen=frozen)
         
-        self.evaluator = SolutionEvaluator(makespan_weight)
-        self.scheduler = TaskScheduler()
-        self.time_limit_seconds = time_limit_seconds
-        self.makespan_weight = makespan_weight
-        self.load_balancing_weight = load_balancing_weight
+        self.break_symmetry = break_symmetry
+        self.use_capacity_pools = use_capacity_pools
+        self.presolve = presolve
         self.parallelization_bonus = parallelization_bonus
         self.enable_idle_time_penalty = enable_idle_time_penalty
         self.idle_time_weight = idle_time_weight
-        
-        # Internal state for solver and variables (not serialized)
-        self._last_solver = None
-        self._last_variables = None
-    
-    def get_last_solver_info(self):
-        """Get the last solver and variables for internal use"""
-        return self._last_solver, self._last_variables
+        self.prune_ineligible = prune_ineligible
+        self.num_search_workers = num_search_workers
     
     def create_cp_model(self, tasks: List[Dict], collaborators: List[Dict], 
                        project_deadlines: Dict[str, int] = None,
-                       project_start_dates: Dict[str, int] = None) -> Tuple[cp_model.CpModel, Dict]:
+                       project_start_dates: Dict[str, int] = None) -> Tuple['cp_model.CpModel', Dict]:
         """Create optimized CP-SAT model focusing on makespan reduction and load balancing"""
+        # Check for empty inputs before any pool, graph or heuristic work
+        if not tasks:
+            raise ValueError("No tasks provided to CP model")
+        if not collaborators:
+            raise ValueError("No collaborators provided to CP model")
+        
         model = cp_model.CpModel()
         
         # Variables dictionary to store all decision variables
         variables = {
             'task_assignments': {},  # task_id -> collaborator_id
+            'assignment_literals': {},  # task_id -> {collaborator_id: BoolVar}
             'task_starts': {},       # task_id -> start_day
             'task_ends': {},         # task_id -> end_day
             'makespan': None,        # total project duration
             'project_makespans': {}, # makespan per project
             'collaborator_loads': {},# workload per collaborator
             'soft_violations': {},   # soft constraint violations
-            'parallelization_vars': {} # variables to encourage parallelization
+            'parallelization_vars': {}, # variables to encourage parallelization
+            'model_stats': {},       # model size / pruning report
+            'precedence_graph': None # compiled PrecedenceGraph shared with the evaluator
         }
         
         # Create collaborator mapping and analyze capabilities
         collab_ids = [c["id"] for c in collaborators]
         collab_map = {c["id"]: c for c in collaborators}
         
+        # Capacity pools: each group of interchangeable collaborators becomes one cumulative
+        # resource, represented by its lowest id; members are named after solving
+        capacity_pools = {}
+        if self.use_capacity_pools:
+            capacity_pools = {group[0]: group for group in self._group_interchangeable_collaborators(collaborators, tasks)}
+        pooled_members = {collab_id for group in capacity_pools.values() for collab_id in group[1:]}
+        resource_ids = [collab_id for collab_id in collab_ids if collab_id not in pooled_members]
+        variables['capacity_pools'] = capacity_pools
+        
         # Analyze task requirements and collaborator capabilities
         skill_demand = {}
         position_demand = {}
@@ -89,7 +103,7 @@ class ConstraintProgramming:
         if project_start_dates:
             max_start_date = max(project_start_dates.values())
         
-        # Set horizon as the maximum of several estimates with safety margins
+        # Loose horizon, only used when the greedy list schedule cannot produce a feasible bound
         horizon_estimates = [
             theoretical_min * 3,      # More conservative estimate based on resources
             total_duration * 2,       # Sequential execution with buffer
@@ -97,13 +111,67 @@ class ConstraintProgramming:
             max_start_date + total_duration + 100,  # Start date plus work duration
             1000                      # Minimum reasonable horizon
         ]
+        fallback_horizon = max(h for h in horizon_estimates if h > 0)
+        fallback_horizon = max(fallback_horizon, max_start_date + max_task_duration * 3)
         
-        max_horizon = max(h for h in horizon_estimates if h > 0)
+        # Tight horizon: makespan of a greedy list schedule of the real instance
+        # (same eligibility, release days, work periods and absences as the model)
+        eligible = self._compute_eligibility(tasks, collaborators)
         
-        # Ensure horizon can accommodate the longest task from any start date
-        max_horizon = max(max_horizon, max_start_date + max_task_duration * 3)
+        # Precedence DAG compiled once: dependency order, levels and transitive reduction
+        graph = PrecedenceGraph(tasks)
+        if graph.has_cycle:
+            raise ValueError(f"Dependências cíclicas entre tarefas: {graph.describe_cycle()}")
+        variables['precedence_graph'] = graph
+        
+        # Heads (earliest starts) and tails (latest ends) propagated over the precedence DAG;
+        # raises ValueError when a project deadline cannot be met even with unlimited staff
+        release_days, latest_ends = self._propagate_time_windows(
+            graph, collaborators, eligible, project_start_dates, project_deadlines
+        )
+        blocked = {c["id"]: self._merge_unavailable_ranges(c, fallback_horizon * 2) for c in collaborators}
+        # Best of the priority rules; also the instant first solution, the CP hint and the
+        # fallback when the solver stops without a solution
+        greedy = ListScheduler.best_schedule(tasks, collaborators, eligible, blocked, release_days,
+                                             project_deadlines, graph, latest_ends)
+        variables['heuristic_solution'] = None
+        if greedy is not None:
+            variables['heuristic_solution'] = dict(
+                greedy, solution=[greedy["assignments"][task["task_id"]] for task in tasks]
+            )
+        makespan_lower_bound = self._makespan_lower_bound(tasks, release_days, total_duration, num_collaborators)
         
-        print(f"CP Model: Using horizon = {max_horizon} days (total_duration={total_duration}, max_task={max_task_duration})")
+        # Energy bound per cargo: each cargo is an aggregated resource, so its total work
+        # cannot finish before its collaborators have had that many available days
+        cargo_collabs = self._cargo_collaborators(tasks, collaborators, eligible)
+        cargo_energy_bounds = self._cargo_energy_bounds(tasks, cargo_collabs, collab_map, blocked, fallback_horizon * 2)
+        energy_lower_bound = max(cargo_energy_bounds.values(), default=0)
+        makespan_lower_bound = max(makespan_lower_bound, energy_lower_bound)
+        
+        if greedy is not None and greedy["feasible"]:
+            # Keep one longest-task of slack so load balancing can still trade a little makespan
+            max_horizon = greedy["makespan"] + max_task_duration
+            if self.roadmap_end_day is not None and self.roadmap_end_day >= greedy["makespan"]:
+                max_horizon = min(max_horizon, self.roadmap_end_day)
+            horizon_source = "list_schedule"
+        else:
+            max_horizon = fallback_horizon
+            horizon_source = "fallback"
+        max_horizon = max(max_horizon, makespan_lower_bound)
+        
+        variables['model_stats'].update({
+            'horizon': max_horizon,
+            'horizon_source': horizon_source,
+            'greedy_makespan': greedy["makespan"] if greedy is not None else None,
+            'greedy_rule': greedy["rule"] if greedy is not None else None,
+            'makespan_lower_bound': makespan_lower_bound,
+            'energy_lower_bound': energy_lower_bound,
+            'tail_bounded_tasks': len(latest_ends),
+            'cargo_energy_bounds': cargo_energy_bounds
+        })
+        
+        print(f"CP Model: Using horizon = {max_horizon} days ({horizon_source}, lower bound={makespan_lower_bound}, "
+              f"total_duration={total_duration}, max_task={max_task_duration})")
         
         # Group tasks by project for better organization
         projects = {}
@@ -116,12 +184,6 @@ class ConstraintProgramming:
         # Validate input data before creating variables
         print(f"CP Model validation: {len(tasks)} tasks, {len(collaborators)} collaborators, horizon={max_horizon}")
         
-        # Check for empty inputs
-        if not tasks:
-            raise ValueError("No tasks provided to CP model")
-        if not collaborators:
-            raise ValueError("No collaborators provided to CP model")
-        
         # Validate task data
         for task in tasks:
             if task["duracao_dias"] <= 0:
@@ -134,68 +196,85 @@ class ConstraintProgramming:
         if len(collab_ids_set) != len(collab_ids):
             raise ValueError("Duplicate collaborator IDs found")
         
-        # 1. Task assignment variables with intelligent domain restriction
+        # Presolve: fix tasks that have a single candidate (mandatory intervals, no literals)
+        # and leave out collaborators who are eligible for none of the selected tasks
+        forced_assignments, dropped_collaborators = {}, []
+        if self.presolve:
+            forced_assignments, dropped_collaborators = self._presolve(tasks, eligible, resource_ids)
+            resource_ids = [c for c in resource_ids if c not in dropped_collaborators]
+        variables['forced_assignments'] = forced_assignments
+        variables['model_stats']['presolve'] = {
+            'enabled': self.presolve,
+            'forced_assignments': len(forced_assignments),
+            'forced_ratio': round(len(forced_assignments) / len(tasks), 4),
+            'dropped_collaborators': dropped_collaborators
+        }
+        if self.presolve:
+            print(f"CP Presolve: {len(forced_assignments)}/{len(tasks)} assignments fixed, "
+                  f"{len(dropped_collaborators)} collaborators without eligible tasks dropped {dropped_collaborators}")
+        
+        # 1. Task assignment variables restricted to eligible collaborators
         for task in tasks:
             task_id = task["task_id"]
             
-            # Create preference-based domain (prefer suitable collaborators)
-            suitable_collabs = []
-            less_suitable_collabs = []
-            
-            for collab_id in collab_ids:
-                collab = collab_map[collab_id]
-                
-                # Check skill match
-                has_skills = task["habilidades_necessarias"].issubset(set(collab["habilidades"]))
-                has_position = task["cargo_necessario"] == collab["cargo"]
-                
-                if has_skills and has_position:
-                    suitable_collabs.append(collab_id)
-                elif has_skills or has_position:
-                    less_suitable_collabs.append(collab_id)
-                else:
-                    less_suitable_collabs.append(collab_id)
-            
-            # Prefer suitable collaborators but allow all (for feasibility)
-            domain_collabs = suitable_collabs + less_suitable_collabs
-            if not domain_collabs:
-                domain_collabs = collab_ids
+            if task_id in forced_assignments:
+                # Presolve: single candidate, the assignment is fixed
+                domain_collabs = [forced_assignments[task_id]]
+            elif self.prune_ineligible and eligible[task_id]:
+                # Pruned mode: only materialise candidates that meet skills AND position
+                domain_collabs = [c for c in eligible[task_id] if c not in pooled_members]
+            else:
+                # Full mode (or no eligible collaborator - section 9 makes it infeasible)
+                domain_collabs = resource_ids
             
             variables['task_assignments'][task_id] = model.NewIntVarFromDomain(
                 cp_model.Domain.FromValues(domain_collabs),
                 f'assign_task_{task_id}'
             )
+            
+            # Shared presence literals: x[t][c] <=> task t assigned to collaborator c.
+            # Every constraint family below reuses these instead of reifying
+            # task_assignments == c on its own.
+            literals = {}
+            if task_id in forced_assignments:
+                literals[domain_collabs[0]] = model.NewConstant(1)
+            else:
+                for collab_id in domain_collabs:
+                    literals[collab_id] = model.NewBoolVar(f'x_{task_id}_{collab_id}')
+                model.AddExactlyOne(literals.values())
+            model.Add(variables['task_assignments'][task_id] == cp_model.LinearExpr.WeightedSum(
+                list(literals.values()), list(literals.keys())
+            ))
+            variables['assignment_literals'][task_id] = literals
+        
+        # Candidate tasks per collaborator (only pairs that have a literal)
+        collab_tasks = {collab_id: [] for collab_id in resource_ids}
+        for task in tasks:
+            for collab_id in variables['assignment_literals'][task["task_id"]]:
+                collab_tasks[collab_id].append(task)
+        
+        total_pairs = len(tasks) * len(collab_ids)
+        candidate_pairs = sum(len(lits) for lits in variables['assignment_literals'].values())
+        variables['model_stats'].update({
+            'prune_ineligible': self.prune_ineligible,
+            'total_pairs': total_pairs,
+            'candidate_pairs': candidate_pairs,
+            'pruning_ratio': round(1 - candidate_pairs / total_pairs, 4) if total_pairs else 0.0,
+            'capacity_pools': list(capacity_pools.values()),
+            'pooled_collaborators': len(pooled_members)
+        })
+        print(f"CP Model: {candidate_pairs}/{total_pairs} task/collaborator pairs materialised "
+              f"(pruning ratio {variables['model_stats']['pruning_ratio']:.1%})")
+        if capacity_pools:
+            print(f"CP Model: {len(capacity_pools)} capacity pools replace {len(pooled_members)} individual collaborators")
         
         # 2. Enhanced task timing variables with project-aware scheduling
         for task in tasks:
             task_id = task["task_id"]
             duration = task["duracao_dias"]
             
-            # Smart start time bounds
-            min_start = 0
-            
-            # Apply project start date constraint (hard)
-            if project_start_dates and task["projeto"] in project_start_dates:
-                project_min_start = project_start_dates[task["projeto"]]
-                min_start = max(min_start, project_min_start)
-                print(f"Task {task_id} ({task['projeto']}): Applied project start constraint, min_start = {min_start} (project requires >= {project_min_start})")
-            
-            # Apply collaborator start date constraints (hard) - NEW FIX
-            # Find the minimum start date among all potential collaborators
-            earliest_collab_start = None
-            for collab_id in collab_ids:
-                collab = collab_map[collab_id]
-                if collab.get("inicio") is not None and collab["inicio"] > 0:
-                    if earliest_collab_start is None:
-                        earliest_collab_start = collab["inicio"]
-                    else:
-                        earliest_collab_start = min(earliest_collab_start, collab["inicio"])
-            
-            # If all collaborators have start dates, enforce the earliest one as minimum
-            # This ensures the task cannot start before any collaborator is available
-            if earliest_collab_start is not None:
-                min_start = max(min_start, earliest_collab_start)
-                print(f"Task {task_id}: Applying collaborator start constraint, min_start = {min_start}")
+            # Head from project start, eligible collaborators' start dates and predecessor chains
+            min_start = release_days[task_id]
             
             # Calculate max_start ensuring valid domain - FIXED LOGIC
             # Ensure we have enough horizon for this task
@@ -217,6 +296,11 @@ class ConstraintProgramming:
                 max_start = min_start
                 max_horizon = max_start + duration + 100
             
+            # Tail from deadlines, successor chains and eligible collaborators' end dates
+            # (_propagate_time_windows already guarantees it leaves room for the head)
+            if task_id in latest_ends:
+                max_start = min(max_start, latest_ends[task_id] - duration)
+            
             # Ensure we have a positive domain size
             if max_start < min_start:
                 print(f"WARNING: Invalid domain for task {task_id}: min_start={min_start}, max_start={max_start}")
@@ -247,7 +331,7 @@ class ConstraintProgramming:
                      variables['task_starts'][task_id] + duration)
         
         # 3. Global and per-project makespan variables
-        variables['makespan'] = model.NewIntVar(0, max_horizon * 2, 'global_makespan')
+        variables['makespan'] = model.NewIntVar(makespan_lower_bound, max_horizon, 'global_makespan')
         
         # Global makespan constraint
         for task in tasks:
@@ -256,7 +340,7 @@ class ConstraintProgramming:
         
         # Per-project makespan tracking
         for proj_name, proj_tasks in projects.items():
-            proj_makespan = model.NewIntVar(0, max_horizon * 2, f'makespan_{proj_name}')
+            proj_makespan = model.NewIntVar(0, max_horizon, f'makespan_{proj_name}')
             variables['project_makespans'][proj_name] = proj_makespan
             
             for task in proj_tasks:
@@ -266,7 +350,7 @@ class ConstraintProgramming:
         # Per-project start time tracking (for early start incentive)
         variables['project_starts'] = {}
         for proj_name, proj_tasks in projects.items():
-            proj_start = model.NewIntVar(0, max_horizon * 2, f'start_{proj_name}')
+            proj_start = model.NewIntVar(0, max_horizon, f'start_{proj_name}')
             variables['project_starts'][proj_name] = proj_start
             
             # Project starts when its first task starts
@@ -274,77 +358,155 @@ class ConstraintProgramming:
                 task_id = task["task_id"]
                 model.Add(proj_start <= variables['task_starts'][task_id])
         
-        # 4. Collaborator workload variables for load balancing
-        for collab_id in collab_ids:
-            variables['collaborator_loads'][collab_id] = model.NewIntVar(
-                0, total_duration, f'load_{collab_id}'
-            )
+        # 4. Collaborator workload: weighted sum of the shared assignment literals
+        # (for a capacity pool this is the workload of the whole group)
+        for collab_id in resource_ids:
+            candidate_tasks = collab_tasks[collab_id]
+            max_load = sum(task["duracao_dias"] for task in candidate_tasks)
+            variables['collaborator_loads'][collab_id] = model.NewIntVar(0, max_load, f'load_{collab_id}')
+            model.Add(variables['collaborator_loads'][collab_id] == cp_model.LinearExpr.WeightedSum(
+                [variables['assignment_literals'][task["task_id"]][collab_id] for task in candidate_tasks],
+                [task["duracao_dias"] for task in candidate_tasks]
+            ))
         
-        # Calculate actual workloads
-        for collab_id in collab_ids:
-            workload_terms = []
-            for task in tasks:
-                task_id = task["task_id"]
-                is_assigned = model.NewBoolVar(f'assigned_{task_id}_{collab_id}')
-                model.Add(variables['task_assignments'][task_id] == collab_id).OnlyEnforceIf(is_assigned)
-                model.Add(variables['task_assignments'][task_id] != collab_id).OnlyEnforceIf(is_assigned.Not())
-                
-                workload_contribution = model.NewIntVar(0, task["duracao_dias"], f'contrib_{task_id}_{collab_id}')
-                model.Add(workload_contribution == task["duracao_dias"]).OnlyEnforceIf(is_assigned)
-                model.Add(workload_contribution == 0).OnlyEnforceIf(is_assigned.Not())
-                
-                workload_terms.append(workload_contribution)
-            
-            if workload_terms:
-                model.Add(variables['collaborator_loads'][collab_id] == sum(workload_terms))
+        # Symmetry breaking: interchangeable collaborators (same cargo and skills, no
+        # absences, vacations or work period) are ordered by non-increasing load.
+        # Capacity pools already collapse these groups, so there is nothing left to break.
+        symmetry_groups = []
+        if self.break_symmetry and not self.use_capacity_pools:
+            symmetry_groups = [
+                group for group in self._group_interchangeable_collaborators(collaborators, tasks)
+                if group[0] in variables['collaborator_loads']
+            ]
+        symmetry_constraints = 0
+        for group in symmetry_groups:
+            for collab_a, collab_b in zip(group, group[1:]):
+                model.Add(variables['collaborator_loads'][collab_a] >= variables['collaborator_loads'][collab_b])
+                symmetry_constraints += 1
         
-        # 5. Predecessor constraints (hard) with intelligent scheduling
-        task_levels = self._calculate_task_levels(tasks)
-        for task in tasks:
-            task_id = task["task_id"]
-            if "predecessoras" in task and task["predecessoras"]:
-                for pred_id in task["predecessoras"]:
-                    if pred_id in variables['task_ends']:
-                        # Add small buffer between dependent tasks for better scheduling
-                        model.Add(variables['task_starts'][task_id] >= 
-                                variables['task_ends'][pred_id])
+        variables['model_stats'].update({
+            'symmetry_groups': symmetry_groups,
+            'symmetry_constraints': symmetry_constraints
+        })
+        
+        # The heuristic schedule (hint, LNS incumbent, fallback) must respect that load order too
+        heuristic = variables['heuristic_solution']
+        if symmetry_groups and heuristic is not None:
+            heuristic["assignments"] = self._relabel_symmetric(heuristic["assignments"], tasks, symmetry_groups)
+            heuristic["solution"] = [heuristic["assignments"][task["task_id"]] for task in tasks]
+        if symmetry_groups:
+            print(f"CP Model: {len(symmetry_groups)} groups of interchangeable collaborators, "
+                  f"{symmetry_constraints} symmetry-breaking constraints")
+        
+        # 5. Predecessor constraints (hard), only the edges left after transitive reduction
+        task_levels = graph.levels
+        for task_id in graph.order:
+            for pred_id in graph.reduced_predecessors[task_id]:
+                model.Add(variables['task_starts'][task_id] >= variables['task_ends'][pred_id])
+        
+        variables['model_stats'].update({
+            'precedence_edges': graph.edge_count,
+            'reduced_precedence_edges': graph.reduced_edge_count
+        })
+        if graph.reduced_edge_count < graph.edge_count:
+            print(f"CP Model: transitive reduction dropped {graph.edge_count - graph.reduced_edge_count} "
+                  f"of {graph.edge_count} precedence edges")
         
         # 6. Enhanced collaborator non-overlap constraints with optimization hints
-        for collab_id in collab_ids:
+        unavailable_blocks = 0
+        for collab_id in resource_ids:
             intervals = []
-            for task in tasks:
+            for task in collab_tasks[collab_id]:
                 task_id = task["task_id"]
                 duration = task["duracao_dias"]
                 
-                # Create optional interval
-                is_assigned = model.NewBoolVar(f'interval_assigned_{task_id}_{collab_id}')
-                model.Add(variables['task_assignments'][task_id] == collab_id).OnlyEnforceIf(is_assigned)
-                model.Add(variables['task_assignments'][task_id] != collab_id).OnlyEnforceIf(is_assigned.Not())
+                # Create optional interval (mandatory when presolve fixed the assignment)
+                is_assigned = variables['assignment_literals'][task_id][collab_id]
+                is_forced = task_id in forced_assignments
                 
                 # HARD CONSTRAINT: If assigned to this collaborator, respect their start date
                 collab = collab_map[collab_id]
                 if collab.get("inicio") is not None and collab["inicio"] > 0:
                     # Task cannot start before collaborator's start date if assigned to them
-                    model.Add(variables['task_starts'][task_id] >= collab["inicio"]).OnlyEnforceIf(is_assigned)
+                    constraint = model.Add(variables['task_starts'][task_id] >= collab["inicio"])
+                    if not is_forced:
+                        constraint.OnlyEnforceIf(is_assigned)
                     print(f"Added hard constraint: Task {task_id} assigned to collab {collab_id} must start >= day {collab['inicio']}")
                 
                 # HARD CONSTRAINT: If assigned to this collaborator, respect their end date
                 if collab.get("termino") is not None and collab["termino"] < max_horizon:
                     # Task must end before collaborator's end date if assigned to them
-                    model.Add(variables['task_ends'][task_id] <= collab["termino"]).OnlyEnforceIf(is_assigned)
+                    constraint = model.Add(variables['task_ends'][task_id] <= collab["termino"])
+                    if not is_forced:
+                        constraint.OnlyEnforceIf(is_assigned)
                     print(f"Added hard constraint: Task {task_id} assigned to collab {collab_id} must end <= day {collab['termino']}")
                 
-                interval = model.NewOptionalIntervalVar(
-                    variables['task_starts'][task_id],
-                    duration,
-                    variables['task_ends'][task_id],
-                    is_assigned,
-                    f'interval_{task_id}_{collab_id}'
-                )
+                if is_forced:
+                    interval = model.NewIntervalVar(
+                        variables['task_starts'][task_id],
+                        duration,
+                        variables['task_ends'][task_id],
+                        f'interval_{task_id}_{collab_id}'
+                    )
+                else:
+                    interval = model.NewOptionalIntervalVar(
+                        variables['task_starts'][task_id],
+                        duration,
+                        variables['task_ends'][task_id],
+                        is_assigned,
+                        f'interval_{task_id}_{collab_id}'
+                    )
                 intervals.append(interval)
             
-            # No overlap constraint
-            model.AddNoOverlap(intervals)
+            if not intervals:
+                continue
+            
+            # HARD CONSTRAINT: absences and vacations are fixed, always-present
+            # intervals in the same NoOverlap, so tasks simply cannot overlap them
+            collab = collab_map[collab_id]
+            for block_start, block_end in self._merge_unavailable_ranges(collab, max_horizon * 2):
+                intervals.append(model.NewFixedSizeIntervalVar(
+                    block_start, block_end - block_start, f'unavailable_{collab_id}_{block_start}'
+                ))
+                unavailable_blocks += 1
+            
+            if collab_id in capacity_pools:
+                # Pool: at most len(group) of its tasks at any time (pools have no absences or work periods)
+                model.AddCumulative(intervals, [1] * len(intervals), len(capacity_pools[collab_id]))
+            else:
+                # No overlap constraint
+                model.AddNoOverlap(intervals)
+        
+        variables['model_stats']['unavailable_blocks'] = unavailable_blocks
+        
+        # 6b. Redundant per-cargo cumulative: every task of a cargo runs on one of that
+        # cargo's collaborators, who are each unavailable on their blocked days and outside
+        # their work period. Implied by section 6, but propagates much earlier.
+        cargo_cumulatives = 0
+        for cargo, cargo_ids in cargo_collabs.items():
+            cargo_tasks = [task for task in tasks if task["cargo_necessario"] == cargo]
+            if len(cargo_tasks) < 2:
+                continue
+            
+            cargo_intervals = [
+                model.NewIntervalVar(
+                    variables['task_starts'][task["task_id"]],
+                    task["duracao_dias"],
+                    variables['task_ends'][task["task_id"]],
+                    f'cargo_interval_{task["task_id"]}'
+                )
+                for task in cargo_tasks
+            ]
+            for collab_id in cargo_ids:
+                for block_start, block_end in self._collaborator_blocked_ranges(collab_map[collab_id], max_horizon):
+                    cargo_intervals.append(model.NewFixedSizeIntervalVar(
+                        block_start, block_end - block_start, f'cargo_block_{collab_id}_{block_start}'
+                    ))
+            
+            model.AddCumulative(cargo_intervals, [1] * len(cargo_intervals), len(cargo_ids))
+            cargo_cumulatives += 1
+        
+        variables['model_stats']['cargo_cumulatives'] = cargo_cumulatives
         
         # 7. PROJECT DEADLINE CONSTRAINTS (HARD) - MUST BE ADDED DURING MODEL CREATION
         # Add hard deadline constraints for each project BEFORE solving
@@ -373,55 +535,60 @@ class ConstraintProgramming:
                     print(f"  Available projects: {list(projects.keys())}")
         
         # 8. Parallelization encouragement variables
-        # Encourage tasks to run in parallel when possible
-        for level in range(max(task_levels.values()) + 1):
-            level_tasks = [t for t in tasks if task_levels.get(t["task_id"], 0) == level]
-            if len(level_tasks) > 1:
-                # Create variables to track parallel execution
-                parallel_bonus = model.NewIntVar(0, len(level_tasks) * self.parallelization_bonus, 
-                                               f'parallel_bonus_level_{level}')
-                variables['parallelization_vars'][level] = parallel_bonus
-                
-                # Bonus for tasks starting at similar times
-                for i, task1 in enumerate(level_tasks):
-                    for task2 in level_tasks[i+1:]:
-                        task1_id = task1["task_id"]
-                        task2_id = task2["task_id"]
-                        
-                        # Check if tasks can run in parallel (different collaborators)
-                        different_collabs = model.NewBoolVar(f'diff_collab_{task1_id}_{task2_id}')
-                        model.Add(variables['task_assignments'][task1_id] != 
-                                variables['task_assignments'][task2_id]).OnlyEnforceIf(different_collabs)
-                        model.Add(variables['task_assignments'][task1_id] == 
-                                variables['task_assignments'][task2_id]).OnlyEnforceIf(different_collabs.Not())
-        
-        # 8. Idle time penalties - OPTIONAL (can slow down solver significantly)
-        # Only enable if explicitly requested for better makespan optimization
+        # Encourage tasks of the same dependency level to run in parallel by minimising
+        # each level's span (last end - first start). Linear in the number of tasks.
+        levels = {}
+        for task in tasks:
+            levels.setdefault(task_levels.get(task["task_id"], 0), []).append(task)
+        
+        parallel_levels = {level: level_tasks for level, level_tasks in levels.items() if len(level_tasks) > 1}
+        variables['parallelization_weight'] = max(1, self.parallelization_bonus // max(1, len(parallel_levels)))
+        
+        for level, level_tasks in parallel_levels.items():
+            level_start = model.NewIntVar(0, max_horizon, f'level_start_{level}')
+            level_end = model.NewIntVar(0, max_horizon, f'level_end_{level}')
+            for task in level_tasks:
+                model.Add(level_start <= variables['task_starts'][task["task_id"]])
+                model.Add(level_end >= variables['task_ends'][task["task_id"]])
+            
+            level_span = model.NewIntVar(0, max_horizon, f'level_span_{level}')
+            model.Add(level_span == level_end - level_start)
+            variables['parallelization_vars'][level] = level_span
+        
+        # 8. Idle time penalties: span of each collaborator's work minus their load.
+        # Reuses the NoOverlap presence literals, so it only adds O(collaborators) variables.
         if self.enable_idle_time_penalty:
             print("CP Model: Adding idle time minimization constraints...")
             
             variables['idle_time_penalties'] = {}
             
-            for collab_id in collab_ids:
-                # Track last end for this collaborator
-                collab_last_end = model.NewIntVar(0, max_horizon * 2, f'last_end_{collab_id}')
+            for collab_id in resource_ids:
+                # Span minus load is meaningless for a pool working several tasks at once
+                if not collab_tasks[collab_id] or collab_id in capacity_pools:
+                    continue
+                
+                # First start / last end over the tasks assigned to this collaborator
+                collab_first_start = model.NewIntVar(0, max_horizon, f'first_start_{collab_id}')
+                collab_last_end = model.NewIntVar(0, max_horizon, f'last_end_{collab_id}')
                 
-                for task in tasks:
+                for task in collab_tasks[collab_id]:
                     task_id = task["task_id"]
-                    is_assigned = model.NewBoolVar(f'idle_check_{task_id}_{collab_id}')
-                    model.Add(variables['task_assignments'][task_id] == collab_id).OnlyEnforceIf(is_assigned)
-                    model.Add(variables['task_assignments'][task_id] != collab_id).OnlyEnforceIf(is_assigned.Not())
+                    is_assigned = variables['assignment_literals'][task_id][collab_id]
                     
-                    model.Add(collab_last_end >= variables['task_ends'][task_id]).OnlyEnforceIf(is_assigned)
+                    first_start = model.Add(collab_first_start <= variables['task_starts'][task_id])
+                    last_end = model.Add(collab_last_end >= variables['task_ends'][task_id])
+                    if task_id not in forced_assignments:
+                        first_start.OnlyEnforceIf(is_assigned)
+                        last_end.OnlyEnforceIf(is_assigned)
                 
-                # Idle time = last_end - total_work_days
-                idle_penalty = model.NewIntVar(0, max_horizon * 2, f'idle_penalty_{collab_id}')
-                model.Add(idle_penalty == collab_last_end - variables['collaborator_loads'][collab_id])
+                # Idle time = (last_end - first_start) - total_work_days (gaps between tasks)
+                idle_penalty = model.NewIntVar(0, max_horizon, f'idle_penalty_{collab_id}')
+                model.Add(idle_penalty >= collab_last_end - collab_first_start - variables['collaborator_loads'][collab_id])
                 
                 variables['idle_time_penalties'][collab_id] = idle_penalty
             
             # Sum all idle time penalties
-            variables['total_idle_penalty'] = model.NewIntVar(0, max_horizon * 2 * len(collab_ids), 'total_idle_penalty')
+            variables['total_idle_penalty'] = model.NewIntVar(0, max_horizon * len(collab_ids), 'total_idle_penalty')
             model.Add(variables['total_idle_penalty'] == sum(variables['idle_time_penalties'].values()))
         else:
             # Disabled - set to zero
@@ -442,19 +609,8 @@ class ConstraintProgramming:
             required_skills = task["habilidades_necessarias"]
             required_position = task["cargo_necessario"]
             
-            # Find collaborators who meet BOTH skill and position requirements
-            suitable_collabs = []
-            for collab_id in collab_ids:
-                collab = collab_map[collab_id]
-                collab_skills = set(collab["habilidades"])
-                collab_position = collab["cargo"]
-                
-                # Check if collaborator has required skills AND position
-                has_skills = required_skills.issubset(collab_skills)
-                has_position = collab_position == required_position
-                
-                if has_skills and has_position:
-                    suitable_collabs.append(collab_id)
+            # Collaborators who meet BOTH skill and position requirements
+            suitable_collabs = eligible[task_id]
             
             if not suitable_collabs:
                 # No suitable collaborator found - this will make the problem infeasible
@@ -472,16 +628,12 @@ class ConstraintProgramming:
                 # HARD CONSTRAINT: Task can only be assigned to suitable collaborators
                 print(f"Task {task_id} ({task['nome']}) can be assigned to: {[collab_map[c]['nome'] for c in suitable_collabs]}")
                 
-                # Create constraint that task assignment must be one of the suitable collaborators
-                suitable_assignments = []
-                for collab_id in suitable_collabs:
-                    is_suitable = model.NewBoolVar(f'suitable_{task_id}_{collab_id}')
-                    model.Add(variables['task_assignments'][task_id] == collab_id).OnlyEnforceIf(is_suitable)
-                    model.Add(variables['task_assignments'][task_id] != collab_id).OnlyEnforceIf(is_suitable.Not())
-                    suitable_assignments.append(is_suitable)
-                
-                # Exactly one of the suitable assignments must be true
-                model.Add(sum(suitable_assignments) == 1)
+                # Exactly-one is already posted on the shared literals, so it is
+                # enough to switch off every unsuitable collaborator (none in pruned mode)
+                suitable_set = set(suitable_collabs)
+                for collab_id, literal in variables['assignment_literals'][task_id].items():
+                    if collab_id not in suitable_set:
+                        model.Add(literal == 0)
         
         # Remove soft skill and position penalties since they are now hard constraints
         variables['soft_violations']['skill_penalty'] = model.NewIntVar(0, 0, 'skill_penalty')
@@ -494,136 +646,168 @@ class ConstraintProgramming:
         variables['soft_violations']['load_imbalance'] = model.NewIntVar(0, 100000, 'load_imbalance')
         if len(collab_ids) > 1:
             avg_load = total_duration // len(collab_ids)
-            load_deviations = []
             
-            for collab_id in collab_ids:
-                load_var = variables['collaborator_loads'][collab_id]
-                deviation_pos = model.NewIntVar(0, total_duration, f'dev_pos_{collab_id}')
-                deviation_neg = model.NewIntVar(0, total_duration, f'dev_neg_{collab_id}')
-                
-                model.Add(deviation_pos >= load_var - avg_load)
-                model.Add(deviation_neg >= avg_load - load_var)
+            if self.load_balancing_mode == "peak":
+                # Min-max: penalise how far the busiest collaborator is above the average
+                peak_load = model.NewIntVar(avg_load, total_duration, 'peak_load')
+                for collab_id in resource_ids:
+                    pool_size = len(capacity_pools.get(collab_id, [collab_id]))
+                    model.Add(peak_load * pool_size >= variables['collaborator_loads'][collab_id])
+                variables['peak_load'] = peak_load
+                model.Add(variables['soft_violations']['load_imbalance'] == peak_load - avg_load)
+            else:
+                # L1: sum of |load - average|, one deviation variable per collaborator
+                # (a pool of k members is compared against k times the average)
+                load_deviations = []
+                for collab_id in resource_ids:
+                    load_var = variables['collaborator_loads'][collab_id]
+                    pool_size = len(capacity_pools.get(collab_id, [collab_id]))
+                    deviation = model.NewIntVar(0, total_duration, f'dev_{collab_id}')
+                    model.Add(deviation >= load_var - avg_load * pool_size)
+                    model.Add(deviation >= avg_load * pool_size - load_var)
+                    load_deviations.append(deviation)
                 
-                total_deviation = model.NewIntVar(0, total_duration, f'total_dev_{collab_id}')
-                model.Add(total_deviation == deviation_pos + deviation_neg)
-                load_deviations.append(total_deviation)
-            
-            model.Add(variables['soft_violations']['load_imbalance'] == sum(load_deviations))
+                model.Add(variables['soft_violations']['load_imbalance'] == sum(load_deviations))
         else:
             model.Add(variables['soft_violations']['load_imbalance'] == 0)
         
-        # Absence and vacation constraints with updated horizon
-        self._add_availability_constraints(model, variables, tasks, collaborators, collab_map, max_horizon * 2)
+        # Absences and vacations are hard (fixed intervals in section 6): no vacation penalty is left
+        variables['soft_violations']['vacation_penalty'] = model.NewIntVar(0, 0, 'vacation_penalty')
         
         return model, variables
     
-    def _calculate_task_levels(self, tasks: List[Dict]) -> Dict[int, int]:
-        """Calculate the dependency level of each task for better scheduling"""
-        task_levels = {}
-        task_map = {task["task_id"]: task for task in tasks}
-        
-        def get_level(task_id):
-            if task_id in task_levels:
-                return task_levels[task_id]
-            
-            task = task_map.get(task_id)
-            if not task or not task.get("predecessoras"):
-                task_levels[task_id] = 0
-                return 0
-            
-            max_pred_level = 0
-            for pred_id in task["predecessoras"]:
-                if pred_id in task_map:
-                    pred_level = get_level(pred_id)
-                    max_pred_level = max(max_pred_level, pred_level)
-            
-            task_levels[task_id] = max_pred_level + 1
-            return task_levels[task_id]
-        
+    @staticmethod
+    def _presolve(tasks: List[Dict], eligible: Dict[int, List[int]],
+                  resource_ids: List[int]) -> Tuple[Dict[int, int], List[int]]:
+        """Forced assignments (tasks with one candidate resource) and resources eligible for no task"""
+        resource_set = set(resource_ids)
+        forced = {}
+        used = set()
         for task in tasks:
-            get_level(task["task_id"])
+            candidates = [c for c in eligible[task["task_id"]] if c in resource_set]
+            used.update(candidates)
+            if len(candidates) == 1:
+                forced[task["task_id"]] = candidates[0]
         
-        return task_levels
+        dropped = [c for c in resource_ids if c not in used]
+        return forced, dropped
     
-    def _add_availability_constraints(self, model, variables, tasks, collaborators, collab_map, max_horizon):
-        """Add constraints for collaborator availability with flexible handling"""
+    @staticmethod
+    def _group_interchangeable_collaborators(collaborators: List[Dict], tasks: List[Dict] = None) -> List[List[int]]:
+        """Groups (size > 1, sorted ids) of collaborators the model cannot tell apart"""
+        # A collaborator some task is fixed to ("colaborador_fixo") is no longer interchangeable
+        fixed_ids = {task.get("colaborador_fixo") for task in tasks or []}
+        groups = {}
+        for collab in collaborators:
+            if collab.get("ausencias") or collab.get("ferias") or collab.get("bloqueios"):
+                continue
+            if collab["id"] in fixed_ids:
+                continue
+            if (collab.get("inicio") or 0) > 0 or collab.get("termino") is not None:
+                continue
+            key = (collab["cargo"], frozenset(collab["habilidades"]))
+            groups.setdefault(key, []).append(collab["id"])
         
-        # Collect vacation penalties for soft constraint handling
-        vacation_penalties = []
+        return [sorted(ids) for ids in groups.values() if len(ids) > 1]
+    
+    @staticmethod
+    def _relabel_symmetric(assignments: Dict[int, int], tasks: List[Dict],
+                           symmetry_groups: List[List[int]]) -> Dict[int, int]:
+        """Permute each group's task sets so loads are non-increasing in id order, as symmetry breaking requires"""
+        durations = {task["task_id"]: task["duracao_dias"] for task in tasks}
+        relabel = {}
+        for group in symmetry_groups:
+            loads = {member_id: 0 for member_id in group}
+            for task_id, collab_id in assignments.items():
+                if collab_id in loads:
+                    loads[collab_id] += durations.get(task_id, 0)
+            # Members are interchangeable, so handing the heaviest task set to the lowest id keeps the schedule valid
+            ranked = sorted(group, key=lambda member_id: (-loads[member_id], member_id))
+            relabel.update(zip(ranked, group))
+        return {task_id: relabel.get(collab_id, collab_id) for task_id, collab_id in assignments.items()}
+    
+    @staticmethod
+    def _assign_pool_members(solution: List[int], tasks: List[Dict], starts: Dict[int, int],
+                             ends: Dict[int, int], capacity_pools: Dict[int, List[int]]) -> List[int]:
+        """Interval colouring: give each pool task (by start) to the least loaded member free at its start"""
+        solution = list(solution)
+        for pool_id, members in capacity_pools.items():
+            pool_indices = [i for i, collab_id in enumerate(solution) if collab_id == pool_id]
+            pool_indices.sort(key=lambda i: (starts[tasks[i]["task_id"]], ends[tasks[i]["task_id"]]))
+            
+            free_at = {member_id: 0 for member_id in members}
+            loads = {member_id: 0 for member_id in members}
+            for i in pool_indices:
+                task_id = tasks[i]["task_id"]
+                # The cumulative capacity guarantees a free member at every start
+                free = [m for m in members if free_at[m] <= starts[task_id]]
+                member_id = min(free, key=lambda m: (loads[m], m))
+                solution[i] = member_id
+                free_at[member_id] = ends[task_id]
+                loads[member_id] += tasks[i]["duracao_dias"]
+        return solution
+    
+    @staticmethod
+    def _makespan_lower_bound(tasks: List[Dict], release_days: Dict[int, int],
+                              total_duration: int, num_collaborators: int) -> int:
+        """Valid makespan lower bound: latest head + duration (chains included) vs. total work / headcount"""
+        chain_bound = max((release_days.get(task["task_id"], 0) + task["duracao_dias"] for task in tasks), default=0)
         
+        resource_bound = -(-total_duration // num_collaborators) if num_collaborators > 0 else 0
+        return max(chain_bound, resource_bound)
+    
+    @staticmethod
+    def _cargo_collaborators(tasks: List[Dict], collaborators: List[Dict],
+                             eligible: Dict[int, List[int]]) -> Dict[str, List[int]]:
+        """Collaborators eligible for at least one task of each cargo, in input order"""
+        cargo_members = {}
         for task in tasks:
-            task_id = task["task_id"]
+            cargo_members.setdefault(task["cargo_necessario"], set()).update(eligible[task["task_id"]])
+        return {
+            cargo: [c["id"] for c in collaborators if c["id"] in members]
+            for cargo, members in cargo_members.items() if members
+        }
+    
+    @staticmethod
+    def _cargo_energy_bounds(tasks: List[Dict], cargo_collabs: Dict[str, List[int]], collab_map: Dict[int, Dict],
+                             blocked: Dict[int, List[Tuple[int, int]]], max_day: int) -> Dict[str, int]:
+        """Earliest day by which each cargo's collaborators have enough available days for all its work"""
+        bounds = {}
+        for cargo, cargo_ids in cargo_collabs.items():
+            energy = sum(task["duracao_dias"] for task in tasks if task["cargo_necessario"] == cargo)
+            # Without absences or work periods this is total cargo duration / headcount
+            bounds[cargo] = -(-energy // len(cargo_ids))
             
-            for collab_id in [c["id"] for c in collaborators]:
+            # Available collaborator-days per day, after blocked ranges and work periods
+            capacity = [0] * max_day
+            for collab_id in cargo_ids:
                 collab = collab_map[collab_id]
-                
-                is_assigned = model.NewBoolVar(f'avail_check_{task_id}_{collab_id}')
-                model.Add(variables['task_assignments'][task_id] == collab_id).OnlyEnforceIf(is_assigned)
-                model.Add(variables['task_assignments'][task_id] != collab_id).OnlyEnforceIf(is_assigned.Not())
-                
-                # Work period constraints - now handled as hard constraints above
-                # Only add soft penalties for edge cases or preferences
-                if collab.get("inicio") is not None and collab["inicio"] > 0:
-                    # This is now a hard constraint, so no soft penalty needed
-                    pass
-                
-                if collab.get("termino") is not None and collab["termino"] < max_horizon:
-                    # This is now a hard constraint, so no soft penalty needed
-                    pass
-                
-                # Absence constraints (hard - cannot work during absences)
-                ausencias = collab.get("ausencias", set())
-                if ausencias:
-                    for absence_day in ausencias:
-                        if 0 <= absence_day < max_horizon:
-                            # Task cannot overlap with absence day
-                            # Either task ends before or equal to absence, or starts after absence
-                            no_overlap_abs = model.NewBoolVar(f'no_abs_overlap_{task_id}_{collab_id}_{absence_day}')
-                            
-                            # Task ends before or at absence day OR task starts after absence day
-                            ends_before = model.NewBoolVar(f'ends_before_abs_{task_id}_{collab_id}_{absence_day}')
-                            model.Add(variables['task_ends'][task_id] <= absence_day).OnlyEnforceIf(ends_before)
-                            model.Add(variables['task_ends'][task_id] > absence_day).OnlyEnforceIf(ends_before.Not())
-                            
-                            starts_after = model.NewBoolVar(f'starts_after_abs_{task_id}_{collab_id}_{absence_day}')
-                            model.Add(variables['task_starts'][task_id] > absence_day).OnlyEnforceIf(starts_after)
-                            model.Add(variables['task_starts'][task_id] <= absence_day).OnlyEnforceIf(starts_after.Not())
-                            
-                            # At least one must be true
-                            model.AddBoolOr([ends_before, starts_after]).OnlyEnforceIf(is_assigned)
-                
-                # Vacation constraints (hard - cannot work during vacation periods)
-                ferias_list = collab.get("ferias", [])
-                for ferias_inicio, ferias_fim in ferias_list:
-                    if 0 <= ferias_inicio < max_horizon and 0 <= ferias_fim < max_horizon:
-                        # Task cannot overlap with vacation period
-                        # Either task ends before vacation starts, or task starts after vacation ends
-                        
-                        # Task ends before or at vacation start OR task starts after or at vacation end
-                        ends_before_vac = model.NewBoolVar(f'ends_before_vac_{task_id}_{collab_id}_{ferias_inicio}')
-                        model.Add(variables['task_ends'][task_id] <= ferias_inicio).OnlyEnforceIf(ends_before_vac)
-                        model.Add(variables['task_ends'][task_id] > ferias_inicio).OnlyEnforceIf(ends_before_vac.Not())
-                        
-                        starts_after_vac = model.NewBoolVar(f'starts_after_vac_{task_id}_{collab_id}_{ferias_inicio}')
-                        model.Add(variables['task_starts'][task_id] >= ferias_fim).OnlyEnforceIf(starts_after_vac)
-                        model.Add(variables['task_starts'][task_id] < ferias_fim).OnlyEnforceIf(starts_after_vac.Not())
-                        
-                        # At least one must be true when assigned to this collaborator
-                        model.AddBoolOr([ends_before_vac, starts_after_vac]).OnlyEnforceIf(is_assigned)
-        
-        # Add vacation penalty variable
-        variables['soft_violations']['vacation_penalty'] = model.NewIntVar(0, 200000, 'vacation_penalty')
-        if vacation_penalties:
-            model.Add(variables['soft_violations']['vacation_penalty'] == sum(vacation_penalties))
-        else:
-            model.Add(variables['soft_violations']['vacation_penalty'] == 0)
+                first_day = max(collab.get("inicio") or 0, 0)
+                last_day = min(collab["termino"], max_day) if collab.get("termino") is not None else max_day
+                available = [0] * max_day
+                for day in range(first_day, last_day):
+                    available[day] = 1
+                for block_start, block_end in blocked.get(collab_id, []):
+                    for day in range(block_start, min(block_end, max_day)):
+                        available[day] = 0
+                for day in range(max_day):
+                    capacity[day] += available[day]
+            
+            done = 0
+            for day in range(max_day):
+                done += capacity[day]
+                if done >= energy:
+                    bounds[cargo] = max(bounds[cargo], day + 1)
+                    break
+        return bounds
     
-    def solve_cp_model(self, model: cp_model.CpModel, variables: Dict, 
+    def solve_cp_model(self, model: 'cp_model.CpModel', variables: Dict, 
                       tasks: List[Dict], project_start_dates: Dict[str, int] = None,
-                      project_deadlines: Dict[str, int] = None) -> Tuple[Optional[List[int]], float, Dict, Optional['cp_model.CpSolver']]:
+                      project_deadlines: Dict[str, int] = None,
+                      time_limit_seconds: float = None) -> Tuple[Optional[List[int]], float, Dict, Optional['cp_model.CpSolver']]:
         """Solve the CP model with enhanced objective focusing on makespan and load balancing"""
         solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = self.time_limit_seconds
+        solver.parameters.max_time_in_seconds = time_limit_seconds or self.time_limit_seconds
         solver.parameters.log_search_progress = True
         
         # Enhanced multi-objective optimization with project start date priority
@@ -649,27 +833,25 @@ class ConstraintProgramming:
         load_balance_term = variables['soft_violations']['load_imbalance'] * self.load_balancing_weight
         objective_terms.append(load_balance_term)
         
-        # 5. Minimize idle time: Penalize gaps in collaborator schedules (OPTIONAL)
-        # This encourages continuous work and early project starts
-        # Note: This adds significant complexity and can slow down the solver
+        # 5. Minimize idle time: Penalize gaps in collaborator schedules
+        # This encourages continuous work (span-minus-load, cheap enough to stay on)
         
         if self.enable_idle_time_penalty and 'total_idle_penalty' in variables:
             print(f"[CP] Adding idle time minimization to objective (weight={self.idle_time_weight})")
             idle_time_term = variables['total_idle_penalty'] * self.idle_time_weight
             objective_terms.append(idle_time_term)
         else:
-            print(f"[CP] Idle time penalty DISABLED for faster solving")
+            print(f"[CP] Idle time penalty DISABLED")
         
         # 6. Vacation penalties (only soft constraint remaining for skills/positions)
         # Note: Skills and positions are now HARD constraints, so no penalties needed
         vacation_term = variables['soft_violations']['vacation_penalty']
         objective_terms.append(vacation_term)
         
-        # 7. Parallelization bonus (encourage parallel execution)
-        # 7. Parallelization bonus (encourage parallel execution)
-        for level, parallel_var in variables.get('parallelization_vars', {}).items():
-            # Subtract bonus (negative term to encourage parallelization)
-            objective_terms.append(-parallel_var)
+        # 7. Parallelization (encourage parallel execution within each dependency level)
+        parallelization_weight = variables.get('parallelization_weight', 1)
+        for level, level_span in variables.get('parallelization_vars', {}).items():
+            objective_terms.append(level_span * parallelization_weight)
         
         # Set the objective
         model.Minimize(sum(objective_terms))
@@ -678,7 +860,7 @@ class ConstraintProgramming:
         self._add_search_hints(model, variables, tasks)
         
         # Solve with enhanced parameters
-        solver.parameters.num_search_workers = 4  # Use multiple threads
+        solver.parameters.num_search_workers = self.num_search_workers  # Use multiple threads
         solver.parameters.cp_model_presolve = True
         solver.parameters.cp_model_probing_level = 2
         
@@ -716,45 +898,7 @@ class ConstraintProgramming:
         print(f"CP Solver: Finished with status {status}")
         
         if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-            # Extract solution
-            solution = []
-            for task in tasks:
-                task_id = task["task_id"]
-                assigned_collab = solver.Value(variables['task_assignments'][task_id])
-                solution.append(assigned_collab)
-            
-            makespan = solver.Value(variables['makespan'])
-            skill_penalty = solver.Value(variables['soft_violations']['skill_penalty'])
-            position_penalty = solver.Value(variables['soft_violations']['position_penalty'])
-            load_imbalance = solver.Value(variables['soft_violations']['load_imbalance'])
-            vacation_penalty = solver.Value(variables['soft_violations']['vacation_penalty'])
-            
-            # Calculate fitness similar to GA for comparison
-            fitness = sanitize_for_json(makespan * self.makespan_weight + 
-                      skill_penalty + position_penalty + 
-                      load_imbalance * self.load_balancing_weight + 
-                      vacation_penalty)
-            
-            # Collect detailed solve information
-            solve_info = {
-                'status': 'OPTIMAL' if status == cp_model.OPTIMAL else 'FEASIBLE',
-                'makespan': makespan,
-                'skill_penalty': skill_penalty,
-                'position_penalty': position_penalty,
-                'load_imbalance': load_imbalance,
-                'vacation_penalty': vacation_penalty,
-                'solve_time': solver.WallTime(),
-                'objective_value': solver.ObjectiveValue(),
-                'num_branches': solver.NumBranches(),
-                'num_conflicts': solver.NumConflicts(),
-                'collaborator_loads': {}
-            }
-            
-            # Extract collaborator workloads
-            for collab_id in variables['collaborator_loads']:
-                load_value = solver.Value(variables['collaborator_loads'][collab_id])
-                solve_info['collaborator_loads'][collab_id] = load_value
-            
+            solution, fitness, solve_info = self._extract_solution(solver, status, variables, tasks)
             return solution, fitness, solve_info, solver
         else:
             status_name = {
@@ -765,6 +909,21 @@ class ConstraintProgramming:
             
             print(f"CP Solver failed with status: {status_name}")
             
+            # Time limit hit before any solution: fall back to the list-scheduling heuristic
+            heuristic = variables.get('heuristic_solution')
+            if status == cp_model.UNKNOWN and heuristic is not None and heuristic["feasible"]:
+                print(f"CP Solver: using heuristic solution ({heuristic['rule']}, makespan={heuristic['makespan']})")
+                return heuristic["solution"], sanitize_for_json(heuristic["makespan"] * self.makespan_weight), {
+                    'status': 'HEURISTIC',
+                    'solver_status': status_name,
+                    'makespan': heuristic["makespan"],
+                    'heuristic_rule': heuristic["rule"],
+                    'solve_time': solver.WallTime(),
+                    'num_branches': solver.NumBranches(),
+                    'num_conflicts': solver.NumConflicts(),
+                    'model_stats': variables.get('model_stats', {})
+                }, None
+            
             return None, sanitize_for_json(999999999), {
                 'status': status_name,
                 'solve_time': solver.WallTime(),
@@ -773,19 +932,156 @@ class ConstraintProgramming:
                 'error': f'Solver returned {status_name}'
             }, None
     
-    def _add_search_hints(self, model: cp_model.CpModel, variables: Dict, tasks: List[Dict]):
-        """Add search hints to guide the solver towards better solutions"""
+    def _extract_solution(self, solver: 'cp_model.CpSolver', status: int, variables: Dict,
+                          tasks: List[Dict]) -> Tuple[List[int], float, Dict]:
+        """Solution vector, fitness and solve report from a solver that found a solution of the model"""
+        # Extract solution
+        solution = []
+        for task in tasks:
+            task_id = task["task_id"]
+            assigned_collab = solver.Value(variables['task_assignments'][task_id])
+            solution.append(assigned_collab)
+        
+        # Capacity pools: map each pool's tasks back to named members
+        capacity_pools = variables.get('capacity_pools') or {}
+        if capacity_pools:
+            starts = {task["task_id"]: solver.Value(variables['task_starts'][task["task_id"]]) for task in tasks}
+            ends = {task["task_id"]: solver.Value(variables['task_ends'][task["task_id"]]) for task in tasks}
+            solution = self._assign_pool_members(solution, tasks, starts, ends, capacity_pools)
+        
+        makespan = solver.Value(variables['makespan'])
+        skill_penalty = solver.Value(variables['soft_violations']['skill_penalty'])
+        position_penalty = solver.Value(variables['soft_violations']['position_penalty'])
+        load_imbalance = solver.Value(variables['soft_violations']['load_imbalance'])
+        vacation_penalty = solver.Value(variables['soft_violations']['vacation_penalty'])
+        
+        # Calculate fitness similar to GA for comparison
+        fitness = sanitize_for_json(makespan * self.makespan_weight + 
+                  skill_penalty + position_penalty + 
+                  load_imbalance * self.load_balancing_weight + 
+                  vacation_penalty)
+        
+        # Collect detailed solve information
+        solve_info = {
+            'status': 'OPTIMAL' if status == cp_model.OPTIMAL else 'FEASIBLE',
+            'makespan': makespan,
+            'skill_penalty': skill_penalty,
+            'position_penalty': position_penalty,
+            'load_imbalance': load_imbalance,
+            'vacation_penalty': vacation_penalty,
+            'idle_time': solver.Value(variables['total_idle_penalty']),
+            'makespan_lower_bound': variables.get('model_stats', {}).get('makespan_lower_bound'),
+            'energy_lower_bound': variables.get('model_stats', {}).get('energy_lower_bound'),
+            'solve_time': solver.WallTime(),
+            'objective_value': solver.ObjectiveValue(),
+            'num_branches': solver.NumBranches(),
+            'num_conflicts': solver.NumConflicts(),
+            'model_stats': variables.get('model_stats', {}),
+            'collaborator_loads': {}
+        }
+        
+        # Extract collaborator workloads
+        for collab_id in variables['collaborator_loads']:
+            load_value = solver.Value(variables['collaborator_loads'][collab_id])
+            solve_info['collaborator_loads'][collab_id] = load_value
+        
+        # Collaborators dropped by presolve have no load variable
+        for collab_id in variables.get('model_stats', {}).get('presolve', {}).get('dropped_collaborators', []):
+            solve_info['collaborator_loads'][collab_id] = 0
+        
+        # Pool loads are per group; report them per member instead
+        for members in capacity_pools.values():
+            for member_id in members:
+                solve_info['collaborator_loads'][member_id] = sum(
+                    task["duracao_dias"] for task, collab_id in zip(tasks, solution) if collab_id == member_id
+                )
+        
+        return solution, fitness, solve_info
+    
+    def _add_search_hints(self, model: 'cp_model.CpModel', variables: Dict, tasks: List[Dict]):
+        """
+        Hint a complete solution: assignments, literals, starts and ends (plus makespan when every
+        task got a start). Warm-start values from a saved roadmap win over the list-scheduling
+        heuristic wherever they still fit the new model; the heuristic fills the rest.
+        """
+        heuristic = variables.get('heuristic_solution')
+        if heuristic is None and not self.warm_start:
+            print("[CP HINT] No heuristic solution, solving without hints")
+            return
+        
+        # Pooled members are represented by their pool in the model
+        pool_of = {member_id: pool_id for pool_id, members in variables.get('capacity_pools', {}).items()
+                   for member_id in members}
+        forced = variables.get('forced_assignments', {})
+        model_proto = model.Proto()
         
-        # Hint: Start tasks as early as possible (greedy approach)
-        # This helps reduce makespan by starting work immediately
+        warm_report = {'matched_tasks': 0, 'assignment_hints': 0, 'start_hints': 0}
+        hinted_collabs, hinted_starts = {}, {}
         for task in tasks:
             task_id = task["task_id"]
-            if task_id in variables['task_starts']:
-                # Hint to start early if no dependencies
-                if not task.get("predecessoras") or len(task.get("predecessoras", [])) == 0:
-                    # Tasks without predecessors should start as early as possible
-                    model.AddHint(variables['task_starts'][task_id], 0)
-                    print(f"[CP HINT] Task {task_id} ({task['nome']}): hint to start at day 0")
+            collab_id, start = None, None
+            if heuristic is not None:
+                collab_id = heuristic["assignments"][task_id]
+                start = heuristic["starts"][task_id]
+            
+            saved = self.warm_start.get(task_id)
+            if saved is not None:
+                warm_report['matched_tasks'] += 1
+                saved_collab = saved.get("colaborador_id")
+                if pool_of.get(saved_collab, saved_collab) in variables['assignment_literals'][task_id]:
+                    collab_id = saved_collab
+                    warm_report['assignment_hints'] += 1
+                
+                # Keep the saved start only if it is still inside the task's propagated window
+                domain = list(model_proto.variables[variables['task_starts'][task_id].Index()].domain)
+                if saved.get("inicio") is not None and domain[0] <= saved["inicio"] <= domain[-1]:
+                    start = saved["inicio"]
+                    warm_report['start_hints'] += 1
+            
+            if start is not None:
+                hinted_starts[task_id] = start
+            if collab_id is not None:
+                hinted_collabs[task_id] = pool_of.get(collab_id, collab_id)
+        
+        # Saved assignments can mix with the heuristic's, so the symmetry order is restored on the merge
+        symmetry_groups = variables['model_stats'].get('symmetry_groups')
+        if symmetry_groups:
+            hinted_collabs = self._relabel_symmetric(hinted_collabs, tasks, symmetry_groups)
+        
+        hinted_ends = []
+        for task in tasks:
+            task_id = task["task_id"]
+            start = hinted_starts.get(task_id)
+            if start is not None:
+                model.AddHint(variables['task_starts'][task_id], start)
+                model.AddHint(variables['task_ends'][task_id], start + task["duracao_dias"])
+                hinted_ends.append(start + task["duracao_dias"])
+            
+            collab_id = hinted_collabs.get(task_id)
+            if collab_id is None or task_id in forced:
+                continue
+            model.AddHint(variables['task_assignments'][task_id], collab_id)
+            for literal_collab, literal in variables['assignment_literals'][task_id].items():
+                model.AddHint(literal, 1 if literal_collab == collab_id else 0)
+        
+        if len(hinted_ends) == len(tasks):
+            model.AddHint(variables['makespan'], max(hinted_ends, default=0))
+        
+        if heuristic is not None:
+            print(f"[CP HINT] Hinted {heuristic['rule']} list schedule (makespan={heuristic['makespan']}, "
+                  f"meets deadlines={heuristic['feasible']})")
+        if self.warm_start:
+            variables['model_stats']['warm_start'] = warm_report
+            print(f"[CP HINT] Warm start: {warm_report['assignment_hints']} assignments and "
+                  f"{warm_report['start_hints']} starts kept of {len(self.warm_start)} saved tasks")
+    
+    def _solve_model(self, tasks: List[Dict], collaborators: List[Dict],
+                     project_deadlines: Dict[str, int] = None,
+                     project_start_dates: Dict[str, int] = None) -> Tuple[Optional[List[int]], float, Dict, Optional['cp_model.CpSolver'], Dict]:
+        """One CP-SAT model over the given tasks (engines override this to change how the instance is solved)"""
+        model, variables = self.create_cp_model(tasks, collaborators, project_deadlines, project_start_dates)
+        solution, fitness, solve_info, solver = self.solve_cp_model(model, variables, tasks, project_start_dates, project_deadlines)
+        return solution, fitness, solve_info, solver, variables
     
     async def run_with_progress(self, tasks: List[Dict], collaborators: List[Dict], 
                                project_deadlines: Dict[str, int] = None,
@@ -803,111 +1099,84 @@ class ConstraintProgramming:
             }
             await asyncio.sleep(0.1)
             
-            # Create model
-            model, variables = self.create_cp_model(tasks, collaborators, project_deadlines, project_start_dates)
-            
-            yield {
-                "type": "progress", 
-                "generation": 1,
-                "total_generations": 1,
-                "best_fitness": 999999999,
-                "progress_percent": 30,
-                "message": "Resolvendo com CP-SAT..."
-            }
-            await asyncio.sleep(0.1)
-            
-            # Solve model
-            solution, fitness, solve_info, solver = self.solve_cp_model(model, variables, tasks, project_start_dates, project_deadlines)
-            
-            if solution is not None:
-                # Evaluate with standard evaluator for consistency
-                eval_fitness, penalties, violations = self.evaluator.evaluate(
-                    solution, tasks, collaborators, project_deadlines, project_start_dates
-                )
+            # Create model (over the tasks left to re-solve, when some are frozen)
+            model_tasks, model_collaborators = self._model_instance(tasks, collaborators)
+            if model_tasks:
+                model, variables = self.create_cp_model(model_tasks, model_collaborators, project_deadlines, project_start_dates)
+                if self.frozen:
+                    variables['model_stats']['incremental'] = self._incremental_stats(tasks, model_tasks, model_collaborators)
                 
-                # Ensure fitness is a valid number
-                eval_fitness = sanitize_for_json(eval_fitness)
+                # Send the list-scheduling heuristic right away, before the solver starts
+                heuristic = variables.get('heuristic_solution')
+                if heuristic is not None:
+                    heuristic_solution, heuristic_starts, heuristic_ends = IncrementalPlanner.merge(
+                        tasks, self.frozen, model_tasks, heuristic["solution"], heuristic["starts"], heuristic["ends"]
+                    )
+                    heuristic_fitness, _, _ = self.evaluator.evaluate(
+                        heuristic_solution, tasks, collaborators, project_deadlines, project_start_dates,
+                        None if self.frozen else variables.get('precedence_graph')
+                    )
+                    yield {
+                        "type": "progress",
+                        "generation": 1,
+                        "total_generations": 1,
+                        "best_fitness": sanitize_for_json(heuristic_fitness),
+                        "progress_percent": 20,
+                        "message": f"Solução inicial heurística (makespan {max(heuristic_ends.values(), default=0)} dias)",
+                        "heuristic_solution": {
+                            "solution": heuristic_solution,
+                            "starts": heuristic_starts,
+                            "ends": heuristic_ends,
+                            "makespan": max(heuristic_ends.values(), default=0),
+                            "feasible": heuristic["feasible"],
+                            "rule": heuristic["rule"]
+                        }
+                    }
+                    await asyncio.sleep(0.1)
                 
                 yield {
-                    "type": "progress",
+                    "type": "progress", 
                     "generation": 1,
-                    "total_generations": 1, 
-                    "best_fitness": eval_fitness,
-                    "progress_percent": 90,
-                    "message": f"Solução encontrada ({solve_info.get('status', 'UNKNOWN')})"
+                    "total_generations": 1,
+                    "best_fitness": 999999999,
+                    "progress_percent": 30,
+                    "message": "Resolvendo com CP-SAT..."
                 }
                 await asyncio.sleep(0.1)
                 
-                # Store solver and variables for internal use
-                self._last_solver = solver
-                self._last_variables = variables
-                
-                yield {
-                    "type": "complete",
-                    "best_solution": solution,
-                    "best_fitness": eval_fitness,
-                    "best_penalties": penalties,
-                    "best_violations": violations,
-                    "solve_info": solve_info
-                }
+                # Solve model
+                solution, fitness, solve_info, solver = self.solve_cp_model(model, variables, model_tasks, project_start_dates, project_deadlines)
+                if solution is not None and self.frozen:
+                    solution = self._merge_frozen(tasks, model_tasks, solution, solve_info, solver, variables)
             else:
-                # Clear internal state on failure
-                self._last_solver = None
-                self._last_variables = None
-                
-                yield {
-                    "type": "complete",
-                    "best_solution": None,
-                    "best_fitness": sanitize_for_json(999999999),
-                    "best_penalties": {},
-                    "best_violations": {},
-                    "solve_info": solve_info,
-                    "error": f"Nenhuma solução encontrada ({solve_info.get('status', 'UNKNOWN')})"
-                }
-                
-        except Exception as e:
-            # Clear internal state on error
-            self._last_solver = None
-            self._last_variables = None
+                solution, fitness, solve_info, solver, variables = self._frozen_result(tasks)
             
-            yield {
-                "type": "complete",
-                "best_solution": None,
-                "best_fitness": sanitize_for_json(999999999),
-                "best_penalties": {},
-                "best_violations": {},
-                "solve_info": {"status": "ERROR", "solve_time": 0},
-                "error": f"Erro na execução do CP: {str(e)}"
-            }
-    
-    def run(self, tasks: List[Dict], collaborators: List[Dict], 
-           project_deadlines: Dict[str, int] = None,
-           project_start_dates: Dict[str, int] = None) -> Tuple[List[int], float, List[float], Dict, Dict, Optional['cp_model.CpSolver'], Dict]:
-        """Run CP algorithm (synchronous version)"""
-        
-        try:
-            # Create and solve model
-            model, variables = self.create_cp_model(tasks, collaborators, project_deadlines, project_start_dates)
-            solution, fitness, solve_info, solver = self.solve_cp_model(model, variables, tasks, project_start_dates, project_deadlines)
-            
-            if solution is not None:
-                # Evaluate with standard evaluator for consistency
-                eval_fitness, penalties, violations = self.evaluator.evaluate(
-                    solution, tasks, collaborators, project_deadlines, project_start_dates
-                )
-                
-                # Ensure fitness is a valid number
-                eval_fitness = sanitize_for_json(eval_fitness)
-                
-                # CP doesn't have generations, so return single fitness value
-                fitness_history = [eval_fitness]
-                
-                return solution, eval_fitness, fitness_history, penalties, violations, solver, variables
-            else:
-                return [], sanitize_for_json(999999999), [sanitize_for_json(999999999)], {}, {}, None, {}
+            for event in self._completion_events(tasks, collaborators, project_deadlines, project_start_dates,
+                                                 solution, solve_info, solver, variables):
+                yield event
+                await asyncio.sleep(0.1)
                 
         except Exception as e:
-            print(f"Erro no CP: {e}")
-            import traceback
-            traceback.print_exc()
-            return [], sanitize_for_json(999999999), [sanitize_for_json(999999999)], {}, {}, None, {}
\ No newline at end of file
+            yield self._error_event(e)
+    
+def solve_component(tasks: List[Dict], collaborators: List[Dict], project_deadlines: Dict[str, int],
+                    project_start_dates: Dict[str, int], options: Dict, engine: type = None) -> Dict:
+    """Process-pool entry point: solve one independent component and return picklable results"""
+    try:
+        cp = (engine or ConstraintProgramming)(**options)
+        solution, fitness, solve_info, solver, variables = cp.solve_instance(
+            tasks, collaborators, project_deadlines, project_start_dates
+        )
+    except Exception as e:
+        return {"solution": None, "solve_info": {"status": "ERROR", "solve_time": 0}, "error": str(e)}
+    
+    if solution is None:
+        return {"solution": None, "solve_info": solve_info, "error": f"Solver returned {solve_info.get('status')}"}
+    
+    starts, ends = ConstraintProgramming.solution_timings(tasks, solver, variables)
+    return {
+        "solution": solution,
+        "starts": starts,
+        "ends": ends,
+        "solve_info": solve_info
+    }
@@ -412,6 +412,9 @@ def get_periodos_roadmaps(db: Session) -> List[models.PeriodoRoadmap]:
 def get_periodo_roadmap(db: Session, periodo_id: int):
     return db.query(models.PeriodoRoadmap).filter(models.PeriodoRoadmap.id == periodo_id).first()
 
+def get_periodo_roadmap_by_ano(db: Session, ano: int):
+    return db.query(models.PeriodoRoadmap).filter(models.PeriodoRoadmap.ano == ano).first()
+
 def create_periodo_roadmap(db: Session, periodo: schemas.PeriodoRoadmapCreate):
     db_periodo = models.PeriodoRoadmap(**periodo.dict())
     db.add(db_periodo)
@@ -0,0 +1,88 @@
+from typing import Dict, Tuple, Iterator
+
+import numpy as np
+
+from population_search import PopulationSearch
+
+# Expected number of genes a mutated child redraws
+MUTATED_GENES = 2
+
+
+class GeneticAlgorithm(PopulationSearch):
+    """
+    Genetic algorithm over task assignments, with the population held as a NumPy matrix.
+
+    Rows are individuals, columns are tasks and values index the assigned collaborator. Initial
+    genes, mutations and uniform crossovers only ever pick eligible collaborators; the greedy list
+    schedule and the warm start seed the first rows. Scoring and the schedule are PopulationSearch's.
+    """
+
+    REPORT_KEY = "genetic_algorithm"
+    LOG_TAG = "GA"
+    ITERATION_LABEL = "Geração"
+    START_MESSAGE = "Evoluindo população..."
+
+    def __init__(self, population_size: int = 100, generations: int = 500, crossover_prob: float = 0.8,
+                 mutation_prob: float = 0.15, tournament_size: int = 3, elite_size: int = 2,
+                 seed: int = None, **kwargs):
+        super().__init__(iterations=generations, seed=seed, **kwargs)
+        if population_size < 2 or not 1 <= elite_size < population_size:
+            raise ValueError(f"População inválida: {population_size} indivíduos com elite de {elite_size} "
+                             f"(a elite deve ter ao menos 1 e ser menor que a população)")
+        self.population_size = population_size
+        self.generations = generations
+        self.crossover_prob = crossover_prob
+        self.mutation_prob = mutation_prob
+        self.tournament_size = max(1, tournament_size)
+        self.elite_size = elite_size
+
+    def _search(self, instance: Dict) -> Iterator[Tuple[np.ndarray, float, int]]:
+        """Best individual of the initial population, then of each generation"""
+        population = self._initial_population(instance)
+        fitness, makespans = self._evaluate(instance, population)
+        best = int(np.argmin(fitness))
+        yield population[best], fitness[best], makespans[best]
+
+        num_children = self.population_size - self.elite_size
+        num_tasks = population.shape[1]
+        while True:
+            # Elitism, then tournament selection, uniform crossover and mutation for the rest
+            ranked = np.argsort(fitness, kind="stable")
+            elite = ranked[:self.elite_size]
+            first = self._tournament(fitness, num_children)
+            second = self._tournament(fitness, num_children)
+            crossed = (self.rng.random(num_children) < self.crossover_prob)[:, None]
+            from_second = crossed & (self.rng.random((num_children, num_tasks)) < 0.5)
+            children = np.where(from_second, population[second], population[first])
+
+            mutated = (self.rng.random(num_children) < self.mutation_prob)[:, None]
+            redraw = mutated & (self.rng.random((num_children, num_tasks)) < min(1.0, MUTATED_GENES / num_tasks))
+            children = np.where(redraw, self._random_genes(instance, num_children), children)
+
+            child_fitness, child_makespans = self._evaluate(instance, children)
+            population = np.vstack([population[elite], children])
+            fitness = np.concatenate([fitness[elite], child_fitness])
+            makespans = np.concatenate([makespans[elite], child_makespans])
+
+            best = int(np.argmin(fitness))
+            yield population[best], fitness[best], makespans[best]
+
+    def _search_settings(self) -> Dict:
+        return {
+            'population_size': self.population_size,
+            'crossover_prob': self.crossover_prob,
+            'mutation_prob': self.mutation_prob
+        }
+
+    def _initial_population(self, instance: Dict) -> np.ndarray:
+        """Random eligible individuals, seeded with the greedy list schedule and the warm start when present"""
+        population = self._random_genes(instance, self.population_size)
+        seeds = self._seed_individuals(instance)[:self.population_size]
+        if seeds:
+            population[:len(seeds)] = seeds
+        return population
+
+    def _tournament(self, fitness: np.ndarray, count: int) -> np.ndarray:
+        """Indices of count tournament winners (lowest fitness among tournament_size random individuals)"""
+        entrants = self.rng.integers(0, len(fitness), size=(count, self.tournament_size))
+        return entrants[np.arange(count), np.argmin(fitness[entrants], axis=1)]
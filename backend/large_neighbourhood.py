@@ -0,0 +1,217 @@
+import random
+import time
+from typing import List, Dict, Tuple, AsyncGenerator, Optional, Set
+
+try:
+    from ortools.sat.python import cp_model
+except ImportError:
+    cp_model = None
+
+from constraint_programming import ConstraintProgramming
+
+# Share of the time limit the first full-model solve gets before the neighbourhoods take over
+INITIAL_TIME_SHARE = 0.2
+
+# Below this many seconds left no new neighbourhood is solved
+MIN_ITERATION_SECONDS = 0.5
+
+
+class LargeNeighbourhoodCP(ConstraintProgramming):
+    """
+    Large-neighbourhood search around the regular CP-SAT model.
+
+    The full model is built once and solved for a short slice; its solution (or the greedy list
+    schedule when the slice found none) is the incumbent. Each iteration then frees a neighbourhood
+    of about neighbourhood_size tasks, fixes every other task's collaborator and start, hints the
+    incumbent and re-solves a copy of the model for iteration_seconds. Better objectives replace
+    the incumbent. Neighbourhoods are picked with probability growing with their success rate.
+
+    A neighbourhood is a "_free_<name>" method returning the task ids to free; subclasses add their
+    own and list them in neighbourhoods.
+    """
+
+    NEIGHBOURHOODS = ("project", "collaborator", "time_window", "random")
+
+    def __init__(self, neighbourhood_size: int = 60, iteration_seconds: float = 5,
+                 neighbourhoods: List[str] = None, seed: int = None, **kwargs):
+        super().__init__(**kwargs)
+        self.neighbourhoods = list(neighbourhoods or self.NEIGHBOURHOODS)
+        unknown = [name for name in self.neighbourhoods if not hasattr(self, f"_free_{name}")]
+        if unknown:
+            raise ValueError(f"Vizinhança desconhecida: {', '.join(unknown)} "
+                             f"(disponíveis: {', '.join(self.NEIGHBOURHOODS)})")
+        self.neighbourhood_size = max(1, neighbourhood_size)
+        self.iteration_seconds = iteration_seconds
+        self.rng = random.Random(seed)
+
+    async def run_with_progress(self, tasks: List[Dict], collaborators: List[Dict],
+                                project_deadlines: Dict[str, int] = None,
+                                project_start_dates: Dict[str, int] = None) -> AsyncGenerator[Dict, None]:
+        """Run the search off the event loop, then report like the single model"""
+        async for event in self._run_off_loop("Melhorando a solução por vizinhanças...", tasks, collaborators,
+                                              project_deadlines, project_start_dates):
+            yield event
+
+    def _solve_model(self, tasks: List[Dict], collaborators: List[Dict],
+                     project_deadlines: Dict[str, int] = None,
+                     project_start_dates: Dict[str, int] = None) -> Tuple[Optional[List[int]], float, Dict, Optional['cp_model.CpSolver'], Dict]:
+        """Short full solve, then neighbourhood re-solves until the time limit"""
+        started_at = time.monotonic()
+        model, variables = self.create_cp_model(tasks, collaborators, project_deadlines, project_start_dates)
+        initial = self.solve_cp_model(model, variables, tasks, project_start_dates, project_deadlines,
+                                      time_limit_seconds=max(1, self.time_limit_seconds * INITIAL_TIME_SHARE))
+        solution, fitness, solve_info, solver = initial
+        # Proven optimal or infeasible (or unbuildable): no neighbourhood can change the outcome
+        if solve_info.get('status') in ('OPTIMAL', 'INFEASIBLE', 'MODEL_INVALID'):
+            return solution, fitness, solve_info, solver, variables
+
+        incumbent = self._incumbent(tasks, solver, variables)
+        best_objective = solver.ObjectiveValue() if solver is not None else None
+        best_solver, best_status = solver, cp_model.FEASIBLE
+        stats = {name: {'attempts': 0, 'improvements': 0} for name in self.neighbourhoods}
+        history = []
+
+        while True:
+            remaining = self.time_limit_seconds - (time.monotonic() - started_at)
+            if remaining < MIN_ITERATION_SECONDS:
+                break
+
+            if incumbent is None:
+                # Neither the slice nor the heuristic gave a schedule: the whole model gets the time left
+                sub_solver, status = self._solve_copy(model, variables, tasks, {}, {}, remaining)
+                history.append({'neighbourhood': None, 'status': sub_solver.StatusName(status)})
+                if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                    best_solver, best_status, best_objective = sub_solver, status, sub_solver.ObjectiveValue()
+                    incumbent = self._incumbent(tasks, sub_solver, variables)
+                continue
+
+            name = self._pick_neighbourhood(stats)
+            free = getattr(self, f"_free_{name}")(tasks, incumbent)
+            stats[name]['attempts'] += 1
+            sub_solver, status = self._solve_copy(model, variables, tasks, incumbent, free,
+                                                  min(self.iteration_seconds, remaining))
+            improved = (
+                status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+                and (best_objective is None or sub_solver.ObjectiveValue() < best_objective)
+            )
+            history.append({'neighbourhood': name, 'free_tasks': len(free), 'status': sub_solver.StatusName(status),
+                            'objective': sub_solver.ObjectiveValue() if improved else best_objective})
+            if improved:
+                stats[name]['improvements'] += 1
+                best_solver, best_objective = sub_solver, sub_solver.ObjectiveValue()
+                best_status = cp_model.FEASIBLE
+                incumbent = self._incumbent(tasks, sub_solver, variables)
+                print(f"[CP LNS] {name}: {len(free)} tasks freed, objective {best_objective}")
+
+        report = {
+            'neighbourhood_size': self.neighbourhood_size,
+            'iteration_seconds': self.iteration_seconds,
+            'iterations': len(history),
+            'improvements': sum(s['improvements'] for s in stats.values()),
+            'initial_status': solve_info.get('status'),
+            'initial_objective': solve_info.get('objective_value'),
+            'best_objective': best_objective,
+            'neighbourhoods': {
+                name: dict(s, success_rate=round(s['improvements'] / s['attempts'], 3) if s['attempts'] else None)
+                for name, s in stats.items()
+            }
+        }
+        variables['model_stats']['lns'] = report
+        print(f"[CP LNS] {report['iterations']} iterations, {report['improvements']} improvements, "
+              f"objective {report['initial_objective']} -> {best_objective}")
+
+        if best_solver is None:
+            # Only the heuristic schedule: nothing the neighbourhoods could improve on
+            return solution, fitness, solve_info, None, variables
+
+        solution, fitness, solve_info = self._extract_solution(best_solver, best_status, variables, tasks)
+        solve_info['solve_time'] = round(time.monotonic() - started_at, 2)
+        return solution, fitness, solve_info, best_solver, variables
+
+    def _solve_copy(self, model: 'cp_model.CpModel', variables: Dict, tasks: List[Dict],
+                    incumbent: Dict[int, Tuple[int, int]], free: Set[int],
+                    time_limit: float) -> Tuple['cp_model.CpSolver', int]:
+        """Solve a copy of the model with every task outside free fixed to the incumbent, hinted with it"""
+        sub_model = model.Clone()
+        sub_model.ClearHints()
+        task_map = {task["task_id"]: task for task in tasks}
+        for task_id, (collab_id, start) in incumbent.items():
+            assignment = sub_model.GetIntVarFromProtoIndex(variables['task_assignments'][task_id].Index())
+            start_var = sub_model.GetIntVarFromProtoIndex(variables['task_starts'][task_id].Index())
+            end_var = sub_model.GetIntVarFromProtoIndex(variables['task_ends'][task_id].Index())
+            if task_id not in free:
+                sub_model.Add(assignment == collab_id)
+                sub_model.Add(start_var == start)
+            sub_model.AddHint(assignment, collab_id)
+            sub_model.AddHint(start_var, start)
+            sub_model.AddHint(end_var, start + task_map[task_id]["duracao_dias"])
+            for literal_collab, literal in variables['assignment_literals'][task_id].items():
+                if task_id not in variables.get('forced_assignments', {}):
+                    sub_model.AddHint(sub_model.GetBoolVarFromProtoIndex(literal.Index()), literal_collab == collab_id)
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = time_limit
+        solver.parameters.num_search_workers = self.num_search_workers
+        status = solver.Solve(sub_model)
+        return solver, status
+
+    @staticmethod
+    def _incumbent(tasks: List[Dict], solver: Optional['cp_model.CpSolver'],
+                   variables: Dict) -> Optional[Dict[int, Tuple[int, int]]]:
+        """task_id -> (model collaborator, start) from the solver, else from a feasible heuristic schedule"""
+        if solver is not None:
+            return {
+                task["task_id"]: (solver.Value(variables['task_assignments'][task["task_id"]]),
+                                  solver.Value(variables['task_starts'][task["task_id"]]))
+                for task in tasks
+            }
+        heuristic = variables.get('heuristic_solution')
+        if heuristic is None or not heuristic["feasible"]:
+            return None
+        # The model names a capacity pool by its lowest id
+        pool_of = {member_id: pool_id for pool_id, members in variables.get('capacity_pools', {}).items()
+                   for member_id in members}
+        return {
+            task["task_id"]: (pool_of.get(heuristic["assignments"][task["task_id"]], heuristic["assignments"][task["task_id"]]),
+                              heuristic["starts"][task["task_id"]])
+            for task in tasks
+        }
+
+    def _pick_neighbourhood(self, stats: Dict[str, Dict]) -> str:
+        """Roulette over the neighbourhoods, weighted by their (smoothed) success rate"""
+        weights = [(stats[name]['improvements'] + 1) / (stats[name]['attempts'] + 2) for name in self.neighbourhoods]
+        return self.rng.choices(self.neighbourhoods, weights=weights)[0]
+
+    def _sample(self, task_ids: List[int]) -> Set[int]:
+        """At most neighbourhood_size of the given tasks"""
+        if len(task_ids) <= self.neighbourhood_size:
+            return set(task_ids)
+        return set(self.rng.sample(task_ids, self.neighbourhood_size))
+
+    def _free_project(self, tasks: List[Dict], incumbent: Dict[int, Tuple[int, int]]) -> Set[int]:
+        """Tasks of one project (its earliest ones, when it is larger than the neighbourhood)"""
+        projeto = self.rng.choice(sorted({task["projeto"] for task in tasks}))
+        project_tasks = sorted((t["task_id"] for t in tasks if t["projeto"] == projeto), key=lambda t: incumbent[t][1])
+        return set(project_tasks[:self.neighbourhood_size])
+
+    def _free_collaborator(self, tasks: List[Dict], incumbent: Dict[int, Tuple[int, int]]) -> Set[int]:
+        """Tasks of a random collaborator, plus those of others until the neighbourhood is full, so work can move"""
+        collab_ids = sorted({collab_id for collab_id, _ in incumbent.values()})
+        self.rng.shuffle(collab_ids)
+        free = set()
+        for collab_id in collab_ids:
+            owned = [task_id for task_id, (assigned, _) in incumbent.items() if assigned == collab_id]
+            if free and len(free) + len(owned) > self.neighbourhood_size:
+                break
+            free.update(owned)
+        return self._sample(sorted(free))
+
+    def _free_time_window(self, tasks: List[Dict], incumbent: Dict[int, Tuple[int, int]]) -> Set[int]:
+        """neighbourhood_size tasks in a row by incumbent start, from a random point in the schedule"""
+        by_start = sorted(incumbent, key=lambda task_id: (incumbent[task_id][1], task_id))
+        first = self.rng.randrange(max(len(by_start) - self.neighbourhood_size, 0) + 1)
+        return set(by_start[first:first + self.neighbourhood_size])
+
+    def _free_random(self, tasks: List[Dict], incumbent: Dict[int, Tuple[int, int]]) -> Set[int]:
+        """A uniform random subset of tasks"""
+        return self._sample(sorted(incumbent))
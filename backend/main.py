@@ -228,6 +228,21 @@ async def executar_cp_stream(params: AlgoritmoParams, db: Session = Depends(get_
                     "ref_date": params.ref_date,
                     "time_limit_seconds": getattr(params, 'time_limit_seconds', 300),
                     "makespan_weight": getattr(params, 'makespan_weight', 150),
+                    "load_balancing_mode": params.load_balancing_mode,
+                    "use_capacity_pools": params.use_capacity_pools,
+                    "warm_start_resultado_id": params.warm_start_resultado_id,
+                    "baseline_resultado_id": params.baseline_resultado_id,
+                    "rolling_window_days": params.rolling_window_days,
+                    "rolling_overlap_days": params.rolling_overlap_days,
+                    "coarse_to_fine": params.coarse_to_fine,
+                    "assignment_sequencing": params.assignment_sequencing,
+                    "lns": params.lns,
+                    "genetic_algorithm": params.genetic_algorithm,
+                    "population_size": params.population_size,
+                    "generations": params.generations,
+                    "ant_colony": params.ant_colony,
+                    "num_ants": params.num_ants,
+                    "aco_iterations": params.aco_iterations,
                     "projeto_ids": params.projeto_ids,
                     "colaborador_ids": params.colaborador_ids,
                     "simulated_members": [m.dict() for m in params.simulated_members] if params.simulated_members else []
@@ -256,6 +271,21 @@ async def executar_cp(params: AlgoritmoParams, db: Session = Depends(get_db)):
             "ref_date": params.ref_date,
             "time_limit_seconds": getattr(params, 'time_limit_seconds', 300),
             "makespan_weight": getattr(params, 'makespan_weight', 150),
+            "load_balancing_mode": params.load_balancing_mode,
+            "use_capacity_pools": params.use_capacity_pools,
+            "warm_start_resultado_id": params.warm_start_resultado_id,
+            "baseline_resultado_id": params.baseline_resultado_id,
+            "rolling_window_days": params.rolling_window_days,
+            "rolling_overlap_days": params.rolling_overlap_days,
+            "coarse_to_fine": params.coarse_to_fine,
+            "assignment_sequencing": params.assignment_sequencing,
+            "lns": params.lns,
+            "genetic_algorithm": params.genetic_algorithm,
+            "population_size": params.population_size,
+            "generations": params.generations,
+            "ant_colony": params.ant_colony,
+            "num_ants": params.num_ants,
+            "aco_iterations": params.aco_iterations,
             "projeto_ids": params.projeto_ids,
             "colaborador_ids": params.colaborador_ids,
             "simulated_members": [m.dict() for m in params.simulated_members] if params.simulated_members else []
@@ -266,7 +296,9 @@ async def executar_cp(params: AlgoritmoParams, db: Session = Depends(get_db)):
             melhor_fitness=result["melhor_fitness"],
             historico_fitness=result["historico_fitness"],
             penalidades=result["penalidades"],
-            ocorrencias_penalidades=result["ocorrencias_penalidades"]
+            ocorrencias_penalidades=result["ocorrencias_penalidades"],
+            warm_start=result.get("warm_start"),
+            incremental=result.get("incremental")
         )
         
     except Exception as e:
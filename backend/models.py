@@ -36,9 +36,26 @@ class AlgoritmoParams(BaseModel):
     # CP specific parameters
     time_limit_seconds: Optional[int] = 300
     makespan_weight: Optional[int] = 150
+    load_balancing_mode: Optional[str] = "l1"  # "l1" or "peak"
+    use_capacity_pools: Optional[bool] = False  # solve interchangeable collaborators as cumulative pools
+    warm_start_resultado_id: Optional[int] = None  # ResultadoSalvo whose roadmap seeds the solver hints
+    baseline_resultado_id: Optional[int] = None  # ResultadoSalvo to re-solve incrementally (unchanged tasks stay put)
+    rolling_window_days: Optional[int] = None  # solve overlapping windows of this many work days (None = one model)
+    rolling_overlap_days: Optional[int] = 30  # work days each window shares with the next
+    coarse_to_fine: Optional[bool] = False  # solve on a weekly grid first, then refine in days
+    assignment_sequencing: Optional[bool] = False  # iterate an assignment model and a sequencing model
+    lns: Optional[bool] = False  # improve a first solution by re-solving freed neighbourhoods
+    genetic_algorithm: Optional[bool] = False  # evolve assignments with the NumPy GA instead of CP-SAT
+    population_size: Optional[int] = 100  # GA individuals per generation
+    generations: Optional[int] = 500  # GA generations (the time limit still applies)
+    ant_colony: Optional[bool] = False  # build assignments with the NumPy ant colony instead of CP-SAT
+    num_ants: Optional[int] = 50  # ACO ants per iteration
+    aco_iterations: Optional[int] = 200  # ACO iterations (the time limit still applies)
 
 class ResultadoTarefa(BaseModel):
     projeto: str
+    etapa_id: Optional[int] = None
+    assinatura: Optional[str] = None
     nome_tarefa: str
     inicio_dias: int
     data_inicio: str
@@ -55,4 +72,6 @@ class ResultadoAlgoritmo(BaseModel):
     melhor_fitness: float
     historico_fitness: List[float]
     penalidades: Dict[str, float]
-    ocorrencias_penalidades: Dict[str, List[Dict]]
\ No newline at end of file
+    ocorrencias_penalidades: Dict[str, List[Dict]]
+    warm_start: Optional[Dict] = None
+    incremental: Optional[Dict] = None
\ No newline at end of file
@@ -0,0 +1,317 @@
+import asyncio
+import time
+from abc import abstractmethod
+from typing import List, Dict, Tuple, AsyncGenerator, Iterator, Optional
+
+import numpy as np
+
+from scheduling_engine import SchedulingEngine, sanitize_for_json
+from algorithm.delta_evaluator import DeltaEvaluator
+from algorithm.list_scheduler import ListScheduler
+from algorithm.precedence_graph import PrecedenceGraph
+
+# Far enough for any list schedule; blocked ranges are only clipped to it, never enumerated
+LIST_SCHEDULE_HORIZON = 1000000
+
+# Streamed runs report about this many iterations
+PROGRESS_EVENTS = 100
+
+# Share of the time limit kept for the local search on the best individual
+LOCAL_SEARCH_TIME_SHARE = 0.1
+
+# CP-SAT options the service passes to every engine; there is no model here to apply them to
+CP_ONLY_OPTIONS = ("parallelization_bonus", "use_capacity_pools", "num_search_workers")
+
+# Penalties of broken calendar or project constraints (the CP model's hard constraints)
+VIOLATION_PENALTIES = ("ausencias", "vacation_conflict", "work_period_violation",
+                       "deadline_violation", "project_start_violation")
+
+
+class PopulationSearch(SchedulingEngine):
+    """
+    Base of the NumPy metaheuristics: assignment matrices scored a batch at a time.
+
+    An individual is a row of collaborator indices, one per task. Fitness is SolutionEvaluator's,
+    computed for a whole batch by evaluate_batch, so the fitness history is on the same scale as
+    the best fitness the run reports. When the search stops, single-task reassignments of the best
+    individual are tried with DeltaEvaluator until none improves or the time limit is reached.
+    The result's schedule is the one SolutionEvaluator times and scores (DeltaEvaluator's), so the
+    reported fitness is that of the returned starts and ends; calendar and project constraints
+    are penalised there, not enforced, and a run that breaks any reports VIOLATED.
+    No CP model is built (nor is OR-Tools needed), so memory stays linear in batch size x tasks.
+
+    Subclasses implement _search: a generator of the best (individual, fitness, makespan) of each
+    iteration, starting with iteration 0 (the initial solutions). The base class stops it at the
+    iteration or time limit and reports like the CP engines.
+    """
+
+    REPORT_KEY = "population_search"
+    LOG_TAG = "SEARCH"
+    ITERATION_LABEL = "Iteração"
+    START_MESSAGE = "Buscando soluções..."
+    # One run over every squad: split runs would stream no iterations and lose the fitness history
+    DECOMPOSABLE = False
+
+    def __init__(self, iterations: int = 500, seed: int = None, **kwargs):
+        super().__init__(**{key: value for key, value in kwargs.items() if key not in CP_ONLY_OPTIONS})
+        self.iterations = iterations
+        self.rng = np.random.default_rng(seed)
+
+    async def run_with_progress(self, tasks: List[Dict], collaborators: List[Dict],
+                                project_deadlines: Dict[str, int] = None,
+                                project_start_dates: Dict[str, int] = None) -> AsyncGenerator[Dict, None]:
+        """Search, with a progress update every few iterations"""
+        try:
+            yield {
+                "type": "progress",
+                "generation": 0,
+                "total_generations": self.iterations,
+                "best_fitness": 999999999,
+                "progress_percent": 10,
+                "message": self.START_MESSAGE
+            }
+            await asyncio.sleep(0.1)
+
+            model_tasks, model_collaborators = self._model_instance(tasks, collaborators)
+            if model_tasks:
+                result = None
+                every = max(1, self.iterations // PROGRESS_EVENTS)
+                for step in self._iterate(model_tasks, model_collaborators, project_deadlines, project_start_dates):
+                    if "result" in step:
+                        result = step["result"]
+                        continue
+                    if step["iteration"] % every:
+                        continue
+                    yield {
+                        "type": "progress",
+                        "generation": step["iteration"],
+                        "total_generations": self.iterations,
+                        "best_fitness": sanitize_for_json(step["best_fitness"]),
+                        "progress_percent": 10 + int(80 * min(step["progress"], 1)),
+                        "message": f"{self.ITERATION_LABEL} {step['iteration']}/{self.iterations}: "
+                                   f"makespan {step['makespan']} dias"
+                    }
+                    await asyncio.sleep(0)
+                result = self._complete_instance(tasks, model_tasks, model_collaborators, result)
+            else:
+                result = self._frozen_result(tasks)
+
+            solution, fitness, solve_info, solver, variables = result
+            for event in self._completion_events(tasks, collaborators, project_deadlines, project_start_dates,
+                                                 solution, solve_info, solver, variables):
+                if event["type"] == "complete" and variables.get('fitness_history'):
+                    event["historico_fitness"] = variables['fitness_history']
+                yield event
+                await asyncio.sleep(0.1)
+
+        except Exception as e:
+            yield self._error_event(e)
+
+    def _solve_model(self, tasks: List[Dict], collaborators: List[Dict],
+                     project_deadlines: Dict[str, int] = None,
+                     project_start_dates: Dict[str, int] = None) -> Tuple[Optional[List[int]], float, Dict, None, Dict]:
+        """Search until the iteration or time limit and return the best individual (solver is always None)"""
+        result = None
+        for step in self._iterate(tasks, collaborators, project_deadlines, project_start_dates):
+            result = step.get("result", result)
+        return result
+
+    def _iterate(self, tasks: List[Dict], collaborators: List[Dict],
+                 project_deadlines: Dict[str, int] = None,
+                 project_start_dates: Dict[str, int] = None) -> Iterator[Dict]:
+        """Yield a progress dict per iteration, then {"result": (solution, fitness, solve_info, None, variables)}"""
+        started_at = time.monotonic()
+        instance = self._prepare(tasks, collaborators, project_deadlines, project_start_dates)
+
+        history = []
+        best, best_iteration, iteration = None, 0, 0
+        for iteration, (individual, fitness, makespan) in enumerate(self._search(instance)):
+            if best is None or fitness < best[1]:
+                best = (individual.copy(), float(fitness), int(makespan))
+                best_iteration = iteration
+            history.append(best[1])
+
+            elapsed = time.monotonic() - started_at
+            if iteration:
+                yield {
+                    "iteration": iteration,
+                    "best_fitness": best[1],
+                    "makespan": best[2],
+                    "progress": max(iteration / max(self.iterations, 1), elapsed / max(self.time_limit_seconds, 1))
+                }
+            if iteration >= self.iterations or elapsed >= self.time_limit_seconds * (1 - LOCAL_SEARCH_TIME_SHARE):
+                break
+
+        delta, local_search = self._local_search(instance, best[0], best[1], started_at + self.time_limit_seconds)
+        if delta.fitness < best[1]:
+            history.append(float(delta.fitness))
+        yield {"result": self._result(instance, tasks, delta, history, iteration, best_iteration,
+                                      local_search, time.monotonic() - started_at)}
+
+    @abstractmethod
+    def _search(self, instance: Dict) -> Iterator[Tuple[np.ndarray, float, int]]:
+        """Best (individual, fitness, makespan) of the initial solutions, then of each iteration"""
+
+    def _search_settings(self) -> Dict:
+        """Engine parameters for the report"""
+        return {}
+
+    def _prepare(self, tasks: List[Dict], collaborators: List[Dict],
+                 project_deadlines: Dict[str, int] = None,
+                 project_start_dates: Dict[str, int] = None) -> Dict:
+        """Arrays individuals are drawn and scored against (raises ValueError on invalid input, like the CP model)"""
+        graph = PrecedenceGraph(tasks)
+        if graph.has_cycle:
+            raise ValueError(f"Dependências cíclicas entre tarefas: {graph.describe_cycle()}")
+        eligible = self._compute_eligibility(tasks, collaborators)
+        for task in tasks:
+            if not eligible[task["task_id"]]:
+                raise ValueError(f"Nenhum colaborador elegível para a tarefa '{task['nome']}' "
+                                 f"do projeto '{task['projeto']}'")
+
+        release_days, latest_ends = self._propagate_time_windows(
+            graph, collaborators, eligible, project_start_dates, project_deadlines
+        )
+        blocked = {c["id"]: self._merge_unavailable_ranges(c, LIST_SCHEDULE_HORIZON) for c in collaborators}
+        greedy = ListScheduler.best_schedule(tasks, collaborators, eligible, blocked, release_days,
+                                             project_deadlines, graph, latest_ends)
+
+        task_index = {task["task_id"]: i for i, task in enumerate(tasks)}
+        collab_index = {c["id"]: k for k, c in enumerate(collaborators)}
+        problem = self.evaluator.compile_problem(tasks, collaborators, project_deadlines, project_start_dates, graph)
+        eligible_idx = [np.array([collab_index[c] for c in eligible[task["task_id"]]]) for task in tasks]
+        width = max(len(options) for options in eligible_idx)
+        eligible_mask = np.zeros((len(tasks), len(collaborators)), dtype=bool)
+        for i, options in enumerate(eligible_idx):
+            eligible_mask[i, options] = True
+
+        return {
+            'graph': graph,
+            'greedy': greedy,
+            'tasks': tasks,
+            'collaborators': collaborators,
+            'project_deadlines': project_deadlines,
+            'project_start_dates': project_start_dates,
+            'problem': problem,
+            'collab_ids': np.array([c["id"] for c in collaborators]),
+            'task_index': task_index,
+            'collab_index': collab_index,
+            'durations': np.array([task["duracao_dias"] for task in tasks], dtype=np.int64),
+            'eligible_idx': eligible_idx,
+            'eligible_mask': eligible_mask,
+            'eligible_table': np.array([np.resize(options, width) for options in eligible_idx]),
+            'eligible_counts': np.array([len(options) for options in eligible_idx])
+        }
+
+    def _random_genes(self, instance: Dict, rows: int) -> np.ndarray:
+        """rows x tasks matrix of uniformly drawn eligible collaborator indices"""
+        counts = instance['eligible_counts']
+        picks = (self.rng.random((rows, len(counts))) * counts).astype(np.int64)
+        return instance['eligible_table'][np.arange(len(counts)), picks]
+
+    def _seed_individuals(self, instance: Dict) -> List[np.ndarray]:
+        """The greedy list schedule's assignment and, over it, the warm start's (when present)"""
+        greedy = instance['greedy']
+        if greedy is None:
+            return []
+
+        task_index, collab_index = instance['task_index'], instance['collab_index']
+        seed = np.empty(len(task_index), dtype=np.int64)
+        for task_id, collab_id in greedy["assignments"].items():
+            seed[task_index[task_id]] = collab_index[collab_id]
+        if not self.warm_start:
+            return [seed]
+
+        warm = seed.copy()
+        for task_id, saved in self.warm_start.items():
+            k = collab_index.get(saved.get("colaborador_id"))
+            if task_id in task_index and k is not None and instance['eligible_mask'][task_index[task_id], k]:
+                warm[task_index[task_id]] = k
+        return [seed, warm]
+
+    def _evaluate(self, instance: Dict, individuals: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Fitness (SolutionEvaluator's, lower is better) and makespan of every individual"""
+        fitness, penalties, _ = self.evaluator.evaluate_batch(
+            instance['collab_ids'][individuals], instance['tasks'], instance['collaborators'],
+            compiled=instance['problem']
+        )
+        return fitness.astype(np.float64), penalties["makespan"] // max(self.makespan_weight, 1)
+
+    def _local_search(self, instance: Dict, individual: np.ndarray, fitness: float,
+                      deadline: float) -> Tuple[DeltaEvaluator, Dict]:
+        """
+        First-improvement reassignment of single tasks, scored incrementally, until a local optimum
+        or the deadline. Returns the DeltaEvaluator left on the improved individual, and a report.
+        """
+        individual = individual.copy()
+        collab_ids = instance['collab_ids']
+        delta = DeltaEvaluator([int(collab_ids[k]) for k in individual], instance['tasks'], instance['collaborators'],
+                               instance['project_deadlines'], instance['project_start_dates'],
+                               self.makespan_weight, instance['graph'])
+        moves, improvements = 0, 0
+        improved = True
+        while improved and time.monotonic() < deadline:
+            improved = False
+            for i in self.rng.permutation(len(individual)):
+                if time.monotonic() >= deadline:
+                    break
+                for k in instance['eligible_idx'][i]:
+                    if k == individual[i]:
+                        continue
+                    moves += 1
+                    if delta.move(int(i), int(collab_ids[k])) < 0:
+                        delta.commit()
+                        individual[i] = k
+                        improvements += 1
+                        improved = True
+                    else:
+                        delta.rollback()
+
+        report = {'moves': moves, 'improvements': improvements, 'fitness_gain': fitness - float(delta.fitness)}
+        return delta, report
+
+    def _result(self, instance: Dict, tasks: List[Dict], delta: DeltaEvaluator, history: List[float],
+                iterations: int, best_iteration: int, local_search: Dict,
+                elapsed: float) -> Tuple[List[int], float, Dict, None, Dict]:
+        """Solver-style result for the best individual, timed and scored by its DeltaEvaluator"""
+        solution = list(delta.solution)
+        makespan = max(delta.ends, default=0)
+
+        loads = {c["id"]: 0 for c in instance['collaborators']}
+        for task, collab_id in zip(tasks, solution):
+            loads[collab_id] += task["duracao_dias"]
+        violations = {key: delta.penalties[key] for key in VIOLATION_PENALTIES if delta.penalties[key]}
+
+        report = dict(
+            self._search_settings(),
+            iterations=iterations,
+            max_iterations=self.iterations,
+            best_iteration=best_iteration,
+            initial_fitness=history[0],
+            best_fitness=history[-1],
+            local_search=local_search,
+            violations=violations
+        )
+        model_stats = {self.REPORT_KEY: report}
+        print(f"[{self.LOG_TAG}] {iterations} iterations in {elapsed:.1f}s: fitness {history[0]} -> "
+              f"{history[-1]} (best at iteration {best_iteration}, local search "
+              f"{local_search['improvements']}/{local_search['moves']} moves), makespan {makespan}")
+
+        solve_info = {
+            # Calendar and project constraints are penalised, not forbidden: say so instead of claiming feasibility
+            'status': 'VIOLATED' if violations else 'FEASIBLE',
+            'makespan': makespan,
+            'solve_time': round(elapsed, 2),
+            'model_stats': model_stats,
+            'collaborator_loads': loads
+        }
+        variables = {
+            'solution_timings': {
+                'starts': {task["task_id"]: delta.starts[i] for i, task in enumerate(tasks)},
+                'ends': {task["task_id"]: delta.ends[i] for i, task in enumerate(tasks)}
+            },
+            'model_stats': model_stats,
+            'precedence_graph': instance['graph'],
+            'fitness_history': [sanitize_for_json(value) for value in history]
+        }
+        return solution, sanitize_for_json(history[-1]), solve_info, None, variables
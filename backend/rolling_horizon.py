@@ -0,0 +1,292 @@
+import asyncio
+import time
+from typing import List, Dict, Tuple, AsyncGenerator, Iterator, Optional
+
+from constraint_programming import ConstraintProgramming, sanitize_for_json
+from algorithm.list_scheduler import ListScheduler
+from algorithm.precedence_graph import PrecedenceGraph
+from algorithm.incremental import IncrementalPlanner
+
+# Far enough for any greedy estimate; blocked ranges are only clipped to it, never enumerated
+ESTIMATE_HORIZON = 1000000
+
+# Shortest time limit a window gets; with less than this left, the remaining tasks are placed greedily
+MIN_WINDOW_SECONDS = 1
+
+
+class RollingHorizonCP(ConstraintProgramming):
+    """
+    CP-SAT over overlapping time windows, for roadmaps too long for a single model.
+
+    Windows of window_days work days advance by window_days - overlap_days. Each window models the
+    pending tasks a greedy list schedule starts inside it; tasks the solver starts before the next
+    window are committed and become blocked ranges (collaborators) and earliest starts (successors)
+    for the windows that follow. The rest of the window is solved again with the next one.
+
+    All windows share time_limit_seconds; once it runs out, the tasks not yet committed are
+    placed by the list scheduler around the committed ones instead of solving more windows. A
+    window the solver finds no solution for is placed the same way, and the roll goes on; the run
+    only fails when the list scheduler cannot place the tasks either.
+    """
+
+    def __init__(self, window_days: int = 120, overlap_days: int = 30, **kwargs):
+        super().__init__(**kwargs)
+        if window_days <= 0 or not 0 <= overlap_days < window_days:
+            raise ValueError(f"Janela inválida: {window_days} dias com sobreposição de {overlap_days} "
+                             f"(a sobreposição deve ser menor que a janela)")
+        self.window_days = window_days
+        self.overlap_days = overlap_days
+        # Plain ConstraintProgramming settings for each window model (hints and frozen tasks are per window)
+        self._window_options = {k: v for k, v in kwargs.items() if k not in ("warm_start", "frozen")}
+
+    def solve_instance(self, tasks: List[Dict], collaborators: List[Dict],
+                       project_deadlines: Dict[str, int] = None,
+                       project_start_dates: Dict[str, int] = None) -> Tuple[Optional[List[int]], float, Dict, None, Dict]:
+        """Solve window after window and return the committed schedule (solver is always None)"""
+        result = None
+        for step in self._solve_windows(tasks, collaborators, project_deadlines, project_start_dates):
+            result = step.get("result", result)
+        return result
+
+    async def run_with_progress(self, tasks: List[Dict], collaborators: List[Dict],
+                                project_deadlines: Dict[str, int] = None,
+                                project_start_dates: Dict[str, int] = None) -> AsyncGenerator[Dict, None]:
+        """Run window by window, with a progress update after each solved window"""
+        try:
+            result = None
+            for step in self._solve_windows(tasks, collaborators, project_deadlines, project_start_dates):
+                if "result" in step:
+                    result = step["result"]
+                    continue
+                yield {
+                    "type": "progress",
+                    "generation": step["window"],
+                    "total_generations": max(step["window"], step["estimated_windows"]),
+                    "best_fitness": 999999999,
+                    "progress_percent": 10 + int(80 * step["committed"] / max(len(tasks), 1)),
+                    "message": f"Janela {step['window']} (dias {step['start']}-{step['end']}): "
+                               f"{step['committed']}/{len(tasks)} tarefas fixadas ({step['status']})"
+                }
+                await asyncio.sleep(0.1)
+
+            solution, fitness, solve_info, solver, variables = result
+            for event in self._completion_events(tasks, collaborators, project_deadlines, project_start_dates,
+                                                 solution, solve_info, solver, variables):
+                yield event
+                await asyncio.sleep(0.1)
+
+        except Exception as e:
+            yield self._error_event(e)
+
+    def _solve_windows(self, tasks: List[Dict], collaborators: List[Dict],
+                       project_deadlines: Dict[str, int] = None,
+                       project_start_dates: Dict[str, int] = None) -> Iterator[Dict]:
+        """Yield a progress dict per window, then {"result": (solution, fitness, solve_info, None, variables)}"""
+        project_deadlines = project_deadlines or {}
+        project_start_dates = project_start_dates or {}
+
+        graph = PrecedenceGraph(tasks)
+        if graph.has_cycle:
+            raise ValueError(f"Dependências cíclicas entre tarefas: {graph.describe_cycle()}")
+        eligible = self._compute_eligibility(tasks, collaborators)
+
+        # Latest ends over the whole roadmap: a window cannot see the successors it must leave room for
+        release_days, latest_ends = self._propagate_time_windows(
+            graph, collaborators, eligible, project_start_dates, project_deadlines
+        )
+
+        # Greedy starts decide which window models each task
+        blocked = {c["id"]: self._merge_unavailable_ranges(c, ESTIMATE_HORIZON) for c in collaborators}
+        greedy = ListScheduler.best_schedule(tasks, collaborators, eligible, blocked, release_days,
+                                             project_deadlines, graph, latest_ends)
+        estimate = greedy["starts"] if greedy is not None else release_days
+        estimated_end = max((estimate[t["task_id"]] + t["duracao_dias"] for t in tasks), default=0)
+
+        step_days = self.window_days - self.overlap_days
+        estimated_windows = -(-estimated_end // step_days)
+
+        # Tasks kept from a baseline roadmap are committed before the first window
+        committed = dict(self.frozen)
+        window_stats = []
+        window_start = 0
+        window_index = 0
+        started_at = time.monotonic()
+
+        while len(committed) < len(tasks):
+            pending = [t for t in graph.ordered_tasks() if t["task_id"] not in committed]
+            remaining_seconds = self.time_limit_seconds - (time.monotonic() - started_at)
+            if remaining_seconds < MIN_WINDOW_SECONDS:
+                placed = self._place_greedily(tasks, collaborators, committed, project_start_dates,
+                                              project_deadlines, latest_ends)
+                if placed is None:
+                    yield {"result": (None, sanitize_for_json(999999999), {
+                        'status': 'INFEASIBLE',
+                        'error': 'Tempo esgotado e a heurística não conseguiu alocar as tarefas restantes',
+                        'solve_time': sum(w['solve_time'] for w in window_stats),
+                        'model_stats': {'rolling_horizon': self._rolling_stats(window_stats)}
+                    }, None, {})}
+                    return
+                placed, status = placed
+                window_stats.append({'start': window_start, 'end': None, 'tasks': len(placed),
+                                     'collaborators': None, 'status': status, 'solve_time': 0})
+                print(f"[CP ROLLING] Time limit reached: {len(placed)} remaining tasks placed by the list scheduler "
+                      f"({status})")
+                committed.update(placed)
+                yield {
+                    "window": window_index + 1,
+                    "estimated_windows": estimated_windows,
+                    "start": window_start,
+                    "end": max((p["fim"] for p in placed.values()), default=window_start),
+                    "committed": len(committed),
+                    "status": status
+                }
+                break
+            window_end = window_start + self.window_days
+            selected = {t["task_id"] for t in pending if estimate[t["task_id"]] < window_end}
+            if not selected:
+                # Nothing estimated in this window: jump to the next pending work
+                window_start = min(estimate[t["task_id"]] for t in pending)
+                continue
+
+            # Pending predecessors of selected tasks are modelled with them (pending = ordered, so one pass)
+            for task in reversed(pending):
+                if task["task_id"] in selected:
+                    selected.update(p for p in graph.predecessors[task["task_id"]] if p not in committed)
+
+            window_index += 1
+            window_tasks = [
+                dict(t, termino_maximo=latest_ends.get(t["task_id"])) for t in pending if t["task_id"] in selected
+            ]
+            context = [t for t in tasks if t["task_id"] in committed] + window_tasks
+            model_tasks, model_collaborators = IncrementalPlanner.subproblem(context, collaborators, committed)
+            projetos = {t["projeto"] for t in model_tasks}
+
+            # Share what is left of the time limit between the windows still expected
+            remaining_windows = max(estimated_windows - window_index + 1, 1)
+            cp = ConstraintProgramming(**dict(
+                self._window_options,
+                time_limit_seconds=min(remaining_seconds, max(MIN_WINDOW_SECONDS, remaining_seconds / remaining_windows)),
+                warm_start={t: h for t, h in self.warm_start.items() if t in selected}
+            ))
+            solution, _, solve_info, solver, variables = cp.solve_instance(
+                model_tasks, model_collaborators,
+                {p: d for p, d in project_deadlines.items() if p in projetos},
+                {p: d for p, d in project_start_dates.items() if p in projetos}
+            )
+            status = solve_info.get("status", "UNKNOWN")
+            window_stats.append({'start': window_start, 'end': window_end, 'tasks': len(model_tasks),
+                                 'collaborators': len(model_collaborators), 'status': status,
+                                 'solve_time': solve_info.get('solve_time', 0)})
+            print(f"[CP ROLLING] Window {window_index} days {window_start}-{window_end}: "
+                  f"{len(model_tasks)} tasks, {len(model_collaborators)} collaborators -> {status}")
+
+            if solution is not None:
+                starts, ends = self.solution_timings(model_tasks, solver, variables)
+            else:
+                # No CP solution (e.g. earlier commits made a deadline unreachable): place the window greedily
+                placed = self._place_greedily(context, collaborators, committed, project_start_dates,
+                                              project_deadlines, latest_ends)
+                if placed is None:
+                    yield {"result": (None, sanitize_for_json(999999999), {
+                        'status': status,
+                        'error': solve_info.get('error', f'Janela {window_index} sem solução ({status})'),
+                        'solve_time': sum(w['solve_time'] for w in window_stats),
+                        'model_stats': {'rolling_horizon': self._rolling_stats(window_stats)}
+                    }, None, {})}
+                    return
+                placed, status = placed
+                window_stats[-1].update(status=status, solver_status=window_stats[-1]['status'])
+                print(f"[CP ROLLING] Window {window_index}: {len(placed)} tasks placed by the list scheduler "
+                      f"({status})")
+                solution = [placed[task["task_id"]]["colaborador_id"] for task in model_tasks]
+                starts = {task_id: p["inicio"] for task_id, p in placed.items()}
+                ends = {task_id: p["fim"] for task_id, p in placed.items()}
+
+            # Commit the early part; the last window (nothing left outside it) is committed whole
+            cutoff = window_start + step_days
+            last_window = len(selected) == len(pending)
+            newly_committed = [
+                (task, collab_id) for task, collab_id in zip(model_tasks, solution)
+                if last_window or starts[task["task_id"]] < cutoff
+            ]
+            if not newly_committed:
+                # Everything slid past the cutoff: commit the earliest task so the roll always advances
+                first = min(range(len(model_tasks)), key=lambda i: starts[model_tasks[i]["task_id"]])
+                newly_committed = [(model_tasks[first], solution[first])]
+            for task, collab_id in newly_committed:
+                committed[task["task_id"]] = {
+                    "colaborador_id": collab_id,
+                    "inicio": starts[task["task_id"]],
+                    "fim": ends[task["task_id"]]
+                }
+
+            yield {
+                "window": window_index,
+                "estimated_windows": estimated_windows,
+                "start": window_start,
+                "end": window_end,
+                "committed": len(committed),
+                "status": status
+            }
+            window_start = cutoff
+
+        solution, starts, ends = IncrementalPlanner.merge(tasks, committed, [], [], {}, {})
+        makespan = max(ends.values(), default=0)
+
+        # The run is as good as its weakest window
+        rank = {'OPTIMAL': 0, 'FEASIBLE': 1, 'HEURISTIC': 2, 'VIOLATED': 3}
+        statuses = [w['status'] for w in window_stats]
+        worst = max(statuses, key=lambda status: rank.get(status, 1), default='OPTIMAL')
+        loads = {c["id"]: 0 for c in collaborators}
+        for task, collab_id in zip(tasks, solution):
+            loads[collab_id] = loads.get(collab_id, 0) + task["duracao_dias"]
+
+        model_stats = {'rolling_horizon': self._rolling_stats(window_stats)}
+        if self.frozen:
+            model_stats['incremental'] = self._incremental_stats(tasks, [t for t in tasks if t["task_id"] not in self.frozen], collaborators)
+        solve_info = {
+            'status': 'FEASIBLE' if worst == 'OPTIMAL' and len(window_stats) > 1 else worst,
+            'makespan': makespan,
+            'solve_time': sum(w['solve_time'] for w in window_stats),
+            'model_stats': model_stats,
+            'collaborator_loads': loads
+        }
+        variables = {
+            'solution_timings': {'starts': starts, 'ends': ends},
+            'model_stats': model_stats,
+            'precedence_graph': graph
+        }
+        yield {"result": (solution, sanitize_for_json(makespan * self.makespan_weight), solve_info, None, variables)}
+
+    def _place_greedily(self, tasks: List[Dict], collaborators: List[Dict], committed: Dict[int, Dict],
+                        project_start_dates: Dict[str, int], project_deadlines: Dict[str, int],
+                        latest_ends: Dict[int, int]) -> Optional[Tuple[Dict[int, Dict], str]]:
+        """
+        List-schedule the uncommitted tasks around the committed ones, within the roadmap's latest ends.
+
+        Returns the placements and their status: HEURISTIC when every deadline and latest end is
+        met, VIOLATED otherwise. None when some task does not fit at all.
+        """
+        rest, rest_collaborators = IncrementalPlanner.subproblem(tasks, collaborators, committed)
+        release_days = {
+            t["task_id"]: max(t.get("inicio_minimo", 0), project_start_dates.get(t["projeto"], 0)) for t in rest
+        }
+        blocked = {c["id"]: self._merge_unavailable_ranges(c, ESTIMATE_HORIZON) for c in rest_collaborators}
+        greedy = ListScheduler.best_schedule(rest, rest_collaborators, self._compute_eligibility(rest, rest_collaborators),
+                                             blocked, release_days, project_deadlines, latest_ends=latest_ends)
+        if greedy is None:
+            return None
+        placed = {
+            task_id: {"colaborador_id": collab_id, "inicio": greedy["starts"][task_id], "fim": greedy["ends"][task_id]}
+            for task_id, collab_id in greedy["assignments"].items()
+        }
+        return placed, 'HEURISTIC' if greedy["feasible"] else 'VIOLATED'
+
+    def _rolling_stats(self, window_stats: List[Dict]) -> Dict:
+        """Window settings and per-window model sizes"""
+        return {
+            'window_days': self.window_days,
+            'overlap_days': self.overlap_days,
+            'windows': len(window_stats),
+            'per_window': window_stats
+        }
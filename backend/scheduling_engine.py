@@ -0,0 +1,400 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import List, Dict, Tuple, AsyncGenerator, Optional
+
+from algorithm.evaluator import SolutionEvaluator
+from algorithm.scheduler import TaskScheduler
+from algorithm.precedence_graph import PrecedenceGraph
+from algorithm.incremental import IncrementalPlanner
+
+def sanitize_for_json(value):
+    """Convert infinite or NaN values to safe numbers for JSON serialization"""
+    if value == float('inf') or value != value:  # NaN check
+        return 999999999
+    return value
+
+# "l1": sum of absolute deviations from the average load; "peak": busiest load above the average
+LOAD_BALANCING_MODES = ("l1", "peak")
+
+class SchedulingEngine(ABC):
+    """
+    What every engine shares, with or without a CP model: objective weights, warm start and frozen
+    tasks, eligibility and time-window propagation, the incremental subproblem, and the result
+    and streamed events built from a (solution, fitness, solve_info, solver, variables) tuple.
+    
+    Engines implement _solve_model; solver is None when they build no CP-SAT model, and the
+    schedule then comes from variables['solution_timings'].
+    """
+    
+    # Whether the service may split independent squads into separate runs of this engine
+    DECOMPOSABLE = True
+    
+    def __init__(self, makespan_weight: int = 200, time_limit_seconds: int = 600,
+                 load_balancing_weight: int = 50, load_balancing_mode: str = "l1",
+                 roadmap_end_day: Optional[int] = None,
+                 warm_start: Optional[Dict[int, Dict]] = None,
+                 frozen: Optional[Dict[int, Dict]] = None):
+        if load_balancing_mode not in LOAD_BALANCING_MODES:
+            raise ValueError(f"load_balancing_mode inválido: {load_balancing_mode} (use {', '.join(LOAD_BALANCING_MODES)})")
+        
+        self.evaluator = SolutionEvaluator(makespan_weight)
+        self.scheduler = TaskScheduler()
+        self.time_limit_seconds = time_limit_seconds
+        self.makespan_weight = makespan_weight
+        self.load_balancing_weight = load_balancing_weight
+        self.load_balancing_mode = load_balancing_mode
+        self.warm_start = warm_start or {}  # task_id -> {"colaborador_id", "inicio"} from a saved roadmap
+        self.frozen = frozen or {}  # task_id -> {"colaborador_id", "inicio", "fim"} kept from a baseline roadmap
+        self.roadmap_end_day = roadmap_end_day  # exclusive work-day end of the PeriodoRoadmap, if any
+        
+        # Internal state for solver and variables (not serialized)
+        self._last_solver = None
+        self._last_variables = None
+    
+    def get_last_solver_info(self):
+        """Get the last solver and variables for internal use"""
+        return self._last_solver, self._last_variables
+    
+    @staticmethod
+    def _compute_eligibility(tasks: List[Dict], collaborators: List[Dict]) -> Dict[int, List[int]]:
+        """Map each task to the collaborators that have its skills AND position (or its fixed collaborator, if qualified)"""
+        eligible = {}
+        for task in tasks:
+            required_skills = task["habilidades_necessarias"]
+            required_position = task["cargo_necessario"]
+            eligible[task["task_id"]] = [
+                collab["id"] for collab in collaborators
+                if collab["cargo"] == required_position and required_skills.issubset(set(collab["habilidades"]))
+            ]
+            if task.get("colaborador_fixo") is not None:
+                eligible[task["task_id"]] = [c for c in eligible[task["task_id"]] if c == task["colaborador_fixo"]]
+        return eligible
+    
+    @staticmethod
+    def _propagate_time_windows(graph: PrecedenceGraph, collaborators: List[Dict], eligible: Dict[int, List[int]],
+                                project_start_dates: Dict[str, int] = None,
+                                project_deadlines: Dict[str, int] = None) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """
+        Earliest start (head) and latest end (tail) of each task, ignoring resource contention.
+        
+        Heads come from the task's own earliest start ("inicio_minimo"), project start dates, the
+        earliest start date among the task's eligible collaborators and predecessor chains; tails
+        from the task's own latest end ("termino_maximo"), project deadlines, the latest end date
+        among eligible collaborators and successor chains. Tasks without a tail are left out of
+        the second dict. Raises ValueError when some head + duration already exceeds its tail.
+        """
+        collab_map = {c["id"]: c for c in collaborators}
+        tasks = graph.tasks
+        order = graph.ordered_tasks()
+        task_map = graph.task_map
+        
+        heads = {}
+        for task in order:
+            task_id = task["task_id"]
+            head = task.get("inicio_minimo", 0)
+            if project_start_dates and task["projeto"] in project_start_dates:
+                head = max(head, project_start_dates[task["projeto"]])
+            # Only a collaborator who can do the task constrains it; one without a start date frees it
+            collab_starts = [max(collab_map[c].get("inicio") or 0, 0) for c in eligible.get(task_id, [])]
+            if collab_starts:
+                head = max(head, min(collab_starts))
+            for pred_id in graph.predecessors[task_id]:
+                if pred_id in heads:
+                    head = max(head, heads[pred_id] + task_map[pred_id]["duracao_dias"])
+            heads[task_id] = head
+        
+        tails = {}
+        for task in reversed(order):
+            task_id = task["task_id"]
+            tail = None
+            if project_deadlines and task["projeto"] in project_deadlines:
+                tail = project_deadlines[task["projeto"]]
+            if task.get("termino_maximo") is not None:
+                tail = task["termino_maximo"] if tail is None else min(tail, task["termino_maximo"])
+            collab_ends = [collab_map[c].get("termino") for c in eligible.get(task_id, [])]
+            if collab_ends and all(end is not None for end in collab_ends):
+                tail = max(collab_ends) if tail is None else min(tail, max(collab_ends))
+            for succ_id in graph.successors[task_id]:
+                if succ_id in tails:
+                    succ_latest_start = tails[succ_id] - task_map[succ_id]["duracao_dias"]
+                    tail = succ_latest_start if tail is None else min(tail, succ_latest_start)
+            if tail is not None:
+                tails[task_id] = tail
+        
+        # Report a project whose own deadline is out of reach first: clearer than a derived tail
+        for proj_name, deadline_day in (project_deadlines or {}).items():
+            proj_ends = [heads[t["task_id"]] + t["duracao_dias"] for t in tasks if t["projeto"] == proj_name]
+            if proj_ends and max(proj_ends) > deadline_day:
+                raise ValueError(
+                    f"Prazo impossível para o projeto '{proj_name}': termina no mínimo no dia {max(proj_ends)}, "
+                    f"mas o prazo é o dia {deadline_day}"
+                )
+        
+        for task in order:
+            task_id = task["task_id"]
+            earliest_end = heads[task_id] + task["duracao_dias"]
+            if task_id in tails and earliest_end > tails[task_id]:
+                raise ValueError(
+                    f"Prazo impossível: a tarefa '{task['nome']}' do projeto '{task['projeto']}' "
+                    f"termina no mínimo no dia {earliest_end}, mas precisa terminar até o dia {tails[task_id]} "
+                    f"(prazos, datas de início e dependências não cabem nem com equipe ilimitada)"
+                )
+        
+        return heads, tails
+    
+    @classmethod
+    def _merge_unavailable_ranges(cls, collab: Dict, max_horizon: int) -> List[Tuple[int, int]]:
+        """Merge absence days, vacation periods and frozen work into sorted [start, end) ranges within the horizon"""
+        ranges = [(day, day + 1) for day in collab.get("ausencias", set())]
+        for ferias_item in collab.get("ferias", []):
+            if isinstance(ferias_item, (tuple, list)) and len(ferias_item) == 2:
+                ranges.append((ferias_item[0], ferias_item[1]))
+        ranges.extend(collab.get("bloqueios", []))
+        return cls._merge_ranges(ranges, max_horizon)
+    
+    @classmethod
+    def _collaborator_blocked_ranges(cls, collab: Dict, max_horizon: int) -> List[Tuple[int, int]]:
+        """Absences, vacations and the days outside the work period, merged within the horizon"""
+        ranges = cls._merge_unavailable_ranges(collab, max_horizon)
+        if collab.get("inicio") is not None and collab["inicio"] > 0:
+            ranges.append((0, collab["inicio"]))
+        if collab.get("termino") is not None and collab["termino"] < max_horizon:
+            ranges.append((collab["termino"], max_horizon))
+        return cls._merge_ranges(ranges, max_horizon)
+    
+    @staticmethod
+    def _merge_ranges(ranges: List[Tuple[int, int]], max_horizon: int) -> List[Tuple[int, int]]:
+        """Sort, clip to [0, max_horizon) and merge overlapping or touching [start, end) ranges"""
+        merged = []
+        for start, end in sorted(ranges):
+            start, end = max(start, 0), min(end, max_horizon)
+            if start >= end:
+                continue
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+    
+    def _model_instance(self, tasks: List[Dict], collaborators: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Tasks and collaborators to model: all of them, or the subproblem left around the frozen tasks"""
+        if not self.frozen:
+            return tasks, collaborators
+        
+        model_tasks, model_collaborators = IncrementalPlanner.subproblem(tasks, collaborators, self.frozen)
+        print(f"[CP INCREMENTAL] {len(self.frozen)}/{len(tasks)} tasks frozen, re-solving {len(model_tasks)} tasks "
+              f"with {len(model_collaborators)}/{len(collaborators)} collaborators")
+        return model_tasks, model_collaborators
+    
+    def _incremental_stats(self, tasks: List[Dict], model_tasks: List[Dict], model_collaborators: List[Dict]) -> Dict:
+        """Size of the re-solved subproblem against the full instance"""
+        return {
+            'frozen_tasks': len(self.frozen),
+            'resolved_tasks': len(model_tasks),
+            'total_tasks': len(tasks),
+            'resolved_collaborators': len(model_collaborators)
+        }
+    
+    def _merge_frozen(self, tasks: List[Dict], model_tasks: List[Dict], solution: List[int],
+                      solve_info: Dict, solver: Optional['cp_model.CpSolver'], variables: Dict) -> List[int]:
+        """Complete a subproblem solution with the frozen tasks; exact timings go to variables['solution_timings']"""
+        starts, ends = self.solution_timings(model_tasks, solver, variables)
+        solution, starts, ends = IncrementalPlanner.merge(tasks, self.frozen, model_tasks, solution, starts, ends)
+        variables['solution_timings'] = {'starts': starts, 'ends': ends}
+        # The compiled graph only covers the subproblem; the evaluator compiles the full one
+        variables['precedence_graph'] = None
+        
+        solve_info['makespan'] = max(ends.values(), default=0)
+        loads = solve_info.setdefault('collaborator_loads', {})
+        for task_id, placement in self.frozen.items():
+            collab_id = placement["colaborador_id"]
+            loads[collab_id] = loads.get(collab_id, 0) + placement["fim"] - placement["inicio"]
+        return solution
+    
+    def _frozen_result(self, tasks: List[Dict]) -> Tuple[List[int], float, Dict, None, Dict]:
+        """Nothing changed since the baseline: every task keeps its frozen placement"""
+        solution, starts, ends = IncrementalPlanner.merge(tasks, self.frozen, [], [], {}, {})
+        makespan = max(ends.values(), default=0)
+        variables = {
+            'solution_timings': {'starts': starts, 'ends': ends},
+            'model_stats': {'incremental': self._incremental_stats(tasks, [], [])}
+        }
+        solve_info = {
+            'status': 'FROZEN',
+            'makespan': makespan,
+            'solve_time': 0,
+            'num_branches': 0,
+            'num_conflicts': 0,
+            'model_stats': variables['model_stats']
+        }
+        print(f"[CP INCREMENTAL] All {len(tasks)} tasks unchanged since the baseline, nothing to solve")
+        return solution, sanitize_for_json(makespan * self.makespan_weight), solve_info, None, variables
+    
+    def solve_instance(self, tasks: List[Dict], collaborators: List[Dict],
+                       project_deadlines: Dict[str, int] = None,
+                       project_start_dates: Dict[str, int] = None) -> Tuple[Optional[List[int]], float, Dict, Optional['cp_model.CpSolver'], Dict]:
+        """Build and solve the model (over the tasks left to re-solve, when some are frozen); raises on invalid input"""
+        model_tasks, model_collaborators = self._model_instance(tasks, collaborators)
+        if not model_tasks:
+            return self._frozen_result(tasks)
+        
+        result = self._solve_model(model_tasks, model_collaborators, project_deadlines, project_start_dates)
+        return self._complete_instance(tasks, model_tasks, model_collaborators, result)
+    
+    def _complete_instance(self, tasks: List[Dict], model_tasks: List[Dict], model_collaborators: List[Dict],
+                           result: Tuple) -> Tuple[Optional[List[int]], float, Dict, Optional['cp_model.CpSolver'], Dict]:
+        """Put the frozen tasks back into a result over the modelled tasks (unchanged without a baseline)"""
+        solution, fitness, solve_info, solver, variables = result
+        if self.frozen:
+            variables.setdefault('model_stats', {})['incremental'] = self._incremental_stats(tasks, model_tasks, model_collaborators)
+        if solution is not None and self.frozen:
+            solution = self._merge_frozen(tasks, model_tasks, solution, solve_info, solver, variables)
+        return solution, fitness, solve_info, solver, variables
+    
+    @abstractmethod
+    def _solve_model(self, tasks: List[Dict], collaborators: List[Dict],
+                     project_deadlines: Dict[str, int] = None,
+                     project_start_dates: Dict[str, int] = None) -> Tuple[Optional[List[int]], float, Dict, Optional['cp_model.CpSolver'], Dict]:
+        """Solve the given tasks: (solution, fitness, solve_info, solver or None, variables)"""
+    
+    @staticmethod
+    def solution_timings(tasks: List[Dict], solver: Optional['cp_model.CpSolver'],
+                         variables: Dict) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """Work-day starts and ends of a solution: merged timings, solver values or the heuristic fallback"""
+        if variables.get('solution_timings'):
+            return variables['solution_timings']['starts'], variables['solution_timings']['ends']
+        if solver is not None:
+            starts = {t["task_id"]: solver.Value(variables['task_starts'][t["task_id"]]) for t in tasks}
+            ends = {t["task_id"]: solver.Value(variables['task_ends'][t["task_id"]]) for t in tasks}
+            return starts, ends
+        heuristic = variables['heuristic_solution']
+        return heuristic["starts"], heuristic["ends"]
+    
+    async def _run_off_loop(self, message: str, tasks: List[Dict], collaborators: List[Dict],
+                            project_deadlines: Dict[str, int] = None,
+                            project_start_dates: Dict[str, int] = None) -> AsyncGenerator[Dict, None]:
+        """Streamed run for engines without intermediate events: solve_instance in a thread, then the usual completion"""
+        try:
+            yield {
+                "type": "progress",
+                "generation": 1,
+                "total_generations": 1,
+                "best_fitness": 999999999,
+                "progress_percent": 10,
+                "message": message
+            }
+            await asyncio.sleep(0.1)
+            
+            loop = asyncio.get_running_loop()
+            solution, fitness, solve_info, solver, variables = await loop.run_in_executor(
+                None, self.solve_instance, tasks, collaborators, project_deadlines, project_start_dates
+            )
+            for event in self._completion_events(tasks, collaborators, project_deadlines, project_start_dates,
+                                                 solution, solve_info, solver, variables):
+                yield event
+                await asyncio.sleep(0.1)
+            
+        except Exception as e:
+            yield self._error_event(e)
+    
+    def _completion_events(self, tasks: List[Dict], collaborators: List[Dict],
+                           project_deadlines: Dict[str, int], project_start_dates: Dict[str, int],
+                           solution: Optional[List[int]], solve_info: Dict,
+                           solver: Optional['cp_model.CpSolver'], variables: Dict) -> List[Dict]:
+        """Final progress and complete events of a streamed run (stores solver and variables on success)"""
+        if solution is None:
+            # Clear internal state on failure
+            self._last_solver = None
+            self._last_variables = None
+            
+            return [{
+                "type": "complete",
+                "best_solution": None,
+                "best_fitness": sanitize_for_json(999999999),
+                "best_penalties": {},
+                "best_violations": {},
+                "solve_info": solve_info,
+                "error": f"Nenhuma solução encontrada ({solve_info.get('status', 'UNKNOWN')})"
+            }]
+        
+        # Evaluate with standard evaluator for consistency
+        eval_fitness, penalties, violations = self.evaluator.evaluate(
+            solution, tasks, collaborators, project_deadlines, project_start_dates,
+            variables.get('precedence_graph')
+        )
+        
+        # Ensure fitness is a valid number
+        eval_fitness = sanitize_for_json(eval_fitness)
+        
+        # Store solver and variables for internal use
+        self._last_solver = solver
+        self._last_variables = variables
+        
+        return [
+            {
+                "type": "progress",
+                "generation": 1,
+                "total_generations": 1, 
+                "best_fitness": eval_fitness,
+                "progress_percent": 90,
+                "message": f"Solução encontrada ({solve_info.get('status', 'UNKNOWN')})"
+            },
+            {
+                "type": "complete",
+                "best_solution": solution,
+                "best_fitness": eval_fitness,
+                "best_penalties": penalties,
+                "best_violations": violations,
+                "solve_info": solve_info
+            }
+        ]
+    
+    def _error_event(self, error: Exception) -> Dict:
+        """Complete event for a streamed run that raised (clears the stored solver state)"""
+        self._last_solver = None
+        self._last_variables = None
+        
+        return {
+            "type": "complete",
+            "best_solution": None,
+            "best_fitness": sanitize_for_json(999999999),
+            "best_penalties": {},
+            "best_violations": {},
+            "solve_info": {"status": "ERROR", "solve_time": 0},
+            "error": f"Erro na execução do CP: {str(error)}"
+        }
+    
+    def run(self, tasks: List[Dict], collaborators: List[Dict], 
+           project_deadlines: Dict[str, int] = None,
+           project_start_dates: Dict[str, int] = None) -> Tuple[List[int], float, List[float], Dict, Dict, Optional['cp_model.CpSolver'], Dict]:
+        """Run CP algorithm (synchronous version)"""
+        
+        try:
+            # Create and solve model
+            solution, fitness, solve_info, solver, variables = self.solve_instance(
+                tasks, collaborators, project_deadlines, project_start_dates
+            )
+            
+            if solution is not None:
+                # Evaluate with standard evaluator for consistency
+                eval_fitness, penalties, violations = self.evaluator.evaluate(
+                    solution, tasks, collaborators, project_deadlines, project_start_dates,
+                    variables.get('precedence_graph')
+                )
+                
+                # Ensure fitness is a valid number
+                eval_fitness = sanitize_for_json(eval_fitness)
+                
+                # CP doesn't have generations, so return single fitness value
+                # (engines that evolve a population report their own history)
+                fitness_history = variables.get('fitness_history') or [eval_fitness]
+                
+                return solution, eval_fitness, fitness_history, penalties, violations, solver, variables
+            else:
+                return [], sanitize_for_json(999999999), [sanitize_for_json(999999999)], {}, {}, None, {}
+                
+        except Exception as e:
+            print(f"Erro no CP: {e}")
+            import traceback
+            traceback.print_exc()
+            return [], sanitize_for_json(999999999), [sanitize_for_json(999999999)], {}, {}, None, {}
@@ -1,12 +1,39 @@
 import datetime
 import asyncio
-from typing import List, Dict, AsyncGenerator
+import os
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, AsyncGenerator, Optional, Tuple
 from sqlalchemy.orm import Session
-from constraint_programming import ConstraintProgramming
+from constraint_programming import ConstraintProgramming, solve_component, sanitize_for_json
+from scheduling_engine import SchedulingEngine
 from algorithm.constraints import ConstraintValidator
+from algorithm.incremental import IncrementalPlanner
 from utils.result_saver import ResultSaver
 from db import crud
 
+# Alternative engines by request flag, in priority order: (module, class, extra options from the params).
+# Long roadmaps: solve overlapping time windows, or weeks refined into days, instead of one daily model;
+# or split assignment from sequencing, or improve by LNS; or evolve assignments with the genetic
+# algorithm or an ant colony, which build no CP model at all. Modules are imported on first use.
+ENGINES = {
+    "rolling_window_days": ("rolling_horizon", "RollingHorizonCP", lambda params: dict(
+        window_days=params["rolling_window_days"],
+        overlap_days=params.get("rolling_overlap_days") or 0
+    )),
+    "coarse_to_fine": ("coarse_to_fine", "CoarseToFineCP", None),
+    "assignment_sequencing": ("assignment_sequencing", "AssignmentSequencingCP", None),
+    "lns": ("large_neighbourhood", "LargeNeighbourhoodCP", None),
+    "genetic_algorithm": ("genetic_algorithm", "GeneticAlgorithm", lambda params: dict(
+        population_size=params.get("population_size") or 100,
+        generations=params.get("generations") or 500
+    )),
+    "ant_colony": ("ant_colony_optimization", "AntColonyOptimization", lambda params: dict(
+        num_ants=params.get("num_ants") or 50,
+        iterations=params.get("aco_iterations") or 200
+    ))
+}
+
 class CPService:
     def __init__(self):
         self.cp = ConstraintProgramming(
@@ -16,6 +43,7 @@ class CPService:
             parallelization_bonus=100
         )
         self.result_saver = ResultSaver()
+        self._components_variables = None  # merged variables of the last decomposed stream run
     
     def load_data_from_db(self, db: Session, ref_date: datetime.date = None):
         """Load collaborators and projects from database"""
@@ -149,6 +177,7 @@ class CPService:
                     "task_id": task_id_counter,
                     "projeto": projeto["nome"],
                     "projeto_id": projeto["id"],
+                    "etapa_id": etapa["id"],
                     "nome": etapa["nome"],
                     "duracao_dias": etapa["duracao_dias"],
                     "cargo_necessario": etapa["cargo_necessario"],
@@ -201,6 +230,270 @@ class CPService:
         
         return filtered_colaboradores, filtered_projetos
     
+    def resolve_roadmap_end_day(self, db: Session, projetos: List[Dict], ref_date: datetime.date,
+                                ano: int = None) -> Optional[int]:
+        """Exclusive work-day end of the PeriodoRoadmap matching the run (explicit ano or the projects' common ano)"""
+        if ano is None:
+            anos = {p.get("ano") for p in projetos}
+            if len(anos) != 1 or None in anos:
+                return None
+            ano = anos.pop()
+        
+        periodo = crud.get_periodo_roadmap_by_ano(db, ano)
+        if not periodo or periodo.termino < ref_date:
+            return None
+        
+        from algorithm.scheduler import TaskScheduler
+        return TaskScheduler.calendar_date_to_work_day(periodo.termino, ref_date) + 1
+    
+    def resolve_warm_start(self, db: Session, resultado_id: Optional[int], tarefas_globais: List[Dict],
+                           ref_date: datetime.date) -> Dict[int, Dict]:
+        """Solver hints (task_id -> colaborador_id/inicio) taken from a saved result, if one was requested"""
+        if not resultado_id:
+            return {}
+        
+        resultado = crud.get_resultado_salvo(db, resultado_id)
+        if not resultado:
+            raise ValueError(f"Resultado salvo {resultado_id} não encontrado para warm start")
+        
+        hints = self.map_warm_start(resultado.tarefas or [], tarefas_globais, ref_date)
+        print(f"[CP] Warm start from resultado {resultado_id}: {len(hints)}/{len(tarefas_globais)} tasks matched "
+              f"({len(resultado.tarefas or [])} saved)")
+        return hints
+    
+    def resolve_baseline(self, db: Session, resultado_id: Optional[int], tarefas_globais: List[Dict],
+                         colaboradores: List[Dict], ref_date: datetime.date) -> Dict[int, Dict]:
+        """Frozen placements (task_id -> colaborador_id/inicio/fim) of the tasks unchanged since a saved result"""
+        if not resultado_id:
+            return {}
+        
+        resultado = crud.get_resultado_salvo(db, resultado_id)
+        if not resultado:
+            raise ValueError(f"Resultado salvo {resultado_id} não encontrado para re-otimização incremental")
+        
+        frozen = IncrementalPlanner.freeze_unchanged(tarefas_globais, colaboradores, resultado.tarefas or [], ref_date)
+        print(f"[CP] Incremental re-solve from resultado {resultado_id}: {len(frozen)}/{len(tarefas_globais)} tasks unchanged")
+        return frozen
+    
+    @staticmethod
+    def map_warm_start(saved_tarefas: List[Dict], tarefas_globais: List[Dict],
+                       ref_date: datetime.date) -> Dict[int, Dict]:
+        """Match saved tarefas to the current tasks by etapa (project + task name for older saves)"""
+        from algorithm.scheduler import TaskScheduler
+        
+        by_etapa = {t["etapa_id"]: t for t in saved_tarefas if t.get("etapa_id") is not None}
+        by_name = {(t.get("projeto"), t.get("nome_tarefa")): t for t in saved_tarefas}
+        
+        hints = {}
+        for task in tarefas_globais:
+            saved = by_etapa.get(task.get("etapa_id")) or by_name.get((task["projeto"], task["nome"]))
+            if saved is None:
+                continue
+            
+            # Re-derive the work day from the calendar date, so a different ref_date still lines up;
+            # tasks that started before the new ref_date only keep their collaborator
+            inicio = None
+            if saved.get("data_inicio"):
+                start_date = datetime.datetime.strptime(saved["data_inicio"], "%d/%m/%Y").date()
+                if start_date >= ref_date:
+                    inicio = TaskScheduler.calendar_date_to_work_day(start_date, ref_date)
+            elif saved.get("inicio_dias") is not None:
+                inicio = saved["inicio_dias"]
+            
+            hints[task["task_id"]] = {"colaborador_id": saved.get("colaborador_id"), "inicio": inicio}
+        return hints
+    
+    @staticmethod
+    def _build_engine(params: Dict, cp_options: Dict, warm_start: Dict[int, Dict],
+                      frozen: Dict[int, Dict]) -> SchedulingEngine:
+        """The engine the params ask for (plain CP by default); its extra options are added to cp_options"""
+        engine = ConstraintProgramming
+        for flag, (module_name, class_name, options) in ENGINES.items():
+            if params.get(flag):
+                engine = getattr(importlib.import_module(module_name), class_name)
+                if options is not None:
+                    cp_options.update(options(params))
+                break
+        return engine(**cp_options, warm_start=warm_start, frozen=frozen)
+    
+    @staticmethod
+    def split_components(tarefas_globais: List[Dict], colaboradores: List[Dict]) -> List[Tuple[List[Dict], List[Dict]]]:
+        """
+        Connected components of the task/collaborator eligibility graph (plus precedence edges).
+        
+        Components share no eligible collaborator, so each one can be solved on its own.
+        Collaborators eligible for no task are left out; a task without any eligible
+        collaborator keeps the whole instance together (the single model reports it).
+        """
+        eligible = ConstraintProgramming._compute_eligibility(tarefas_globais, colaboradores)
+        if any(not eligible[t["task_id"]] for t in tarefas_globais):
+            return [(tarefas_globais, colaboradores)]
+        
+        # Union-find over task and collaborator nodes
+        parent = {}
+        
+        def find(node):
+            parent.setdefault(node, node)
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+        
+        def union(a, b):
+            parent[find(a)] = find(b)
+        
+        task_ids = {t["task_id"] for t in tarefas_globais}
+        for task in tarefas_globais:
+            node = ("t", task["task_id"])
+            find(node)
+            for collab_id in eligible[task["task_id"]]:
+                union(node, ("c", collab_id))
+            for pred_id in task.get("predecessoras", []):
+                if pred_id in task_ids:
+                    union(node, ("t", pred_id))
+        
+        groups = {}
+        for task in tarefas_globais:
+            groups.setdefault(find(("t", task["task_id"])), ([], []))[0].append(task)
+        for colaborador in colaboradores:
+            root = find(("c", colaborador["id"]))
+            if root in groups:
+                groups[root][1].append(colaborador)
+        return list(groups.values())
+    
+    def solve_components(self, components: List[Tuple[List[Dict], List[Dict]]], tarefas_globais: List[Dict],
+                         colaboradores: List[Dict], project_deadlines: Dict[str, int],
+                         project_start_dates: Dict[str, int], cp_options: Dict,
+                         warm_start: Dict[int, Dict], frozen: Dict[int, Dict], engine: type = ConstraintProgramming) -> Tuple:
+        """
+        Solve each component as its own CP-SAT model in a process pool and merge the results.
+        
+        Returns the same tuple as ConstraintProgramming.run (solver is None; the merged timings are in
+        variables['solution_timings'] and the overall solve info in variables['solve_info']).
+        """
+        cpu_count = os.cpu_count() or 1
+        workers = min(len(components), cpu_count)
+        # Components beyond the pool size run in later rounds: split the time limit between rounds
+        # so the whole run keeps the requested wall time. Each model keeps at least the usual
+        # 4 search threads and gets more when cores are spare.
+        rounds = -(-len(components) // workers)
+        options = dict(
+            cp_options,
+            time_limit_seconds=max(1, cp_options.get("time_limit_seconds", 600) // rounds),
+            num_search_workers=max(4, cpu_count // workers)
+        )
+        print(f"[CP] {len(components)} independent components "
+              f"({', '.join(f'{len(t)} tasks/{len(c)} collaborators' for t, c in components)}), {workers} processes")
+        
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for component_tasks, component_collabs in components:
+                task_ids = {t["task_id"] for t in component_tasks}
+                projetos = {t["projeto"] for t in component_tasks}
+                futures.append(pool.submit(
+                    solve_component, component_tasks, component_collabs,
+                    {p: d for p, d in project_deadlines.items() if p in projetos},
+                    {p: d for p, d in project_start_dates.items() if p in projetos},
+                    dict(options,
+                         warm_start={t: h for t, h in warm_start.items() if t in task_ids},
+                         frozen={t: f for t, f in frozen.items() if t in task_ids}),
+                    engine
+                ))
+            results = [future.result() for future in futures]
+        
+        statuses = [result["solve_info"].get("status") for result in results]
+        model_stats = {'decomposition': {
+            'components': len(components),
+            'processes': workers,
+            'time_limit_per_component': options["time_limit_seconds"],
+            'tasks_per_component': [len(t) for t, _ in components],
+            'collaborators_per_component': [len(c) for _, c in components],
+            'statuses': statuses
+        }}
+        
+        failed = [result for result in results if result["solution"] is None]
+        if failed:
+            print(f"[CP] {len(failed)}/{len(components)} components without a solution: {failed[0].get('error')}")
+            solve_info = {'status': failed[0]["solve_info"].get("status"), 'error': failed[0].get("error"),
+                          'solve_time': 0, 'model_stats': model_stats}
+            return [], sanitize_for_json(999999999), [sanitize_for_json(999999999)], {}, {}, None, {
+                'solve_info': solve_info, 'model_stats': model_stats
+            }
+        
+        assignments, starts, ends, loads = {}, {}, {}, {}
+        for (component_tasks, _), result in zip(components, results):
+            assignments.update({t["task_id"]: c for t, c in zip(component_tasks, result["solution"])})
+            starts.update(result["starts"])
+            ends.update(result["ends"])
+            loads.update(result["solve_info"].get("collaborator_loads", {}))
+            # Add up the per-component warm start / incremental reports
+            for key in ("warm_start", "incremental"):
+                report = result["solve_info"].get("model_stats", {}).get(key)
+                if report:
+                    merged = model_stats.setdefault(key, {})
+                    for field, value in report.items():
+                        merged[field] = merged.get(field, 0) + value
+        best_solution = [assignments[t["task_id"]] for t in tarefas_globais]
+        
+        best_fitness, penalties, violations = self.cp.evaluator.evaluate(
+            best_solution, tarefas_globais, colaboradores, project_deadlines, project_start_dates
+        )
+        best_fitness = sanitize_for_json(best_fitness)
+        
+        # The run is as good as its weakest component
+        rank = {'OPTIMAL': 0, 'FROZEN': 0, 'FEASIBLE': 1, 'HEURISTIC': 2}
+        worst = max(statuses, key=lambda status: rank.get(status, 1))
+        solve_info = {
+            'status': 'OPTIMAL' if rank.get(worst) == 0 else worst,
+            'makespan': max(ends.values(), default=0),
+            'solve_time': max(result["solve_info"].get("solve_time", 0) for result in results),
+            'model_stats': model_stats,
+            'collaborator_loads': loads
+        }
+        variables = {
+            'solution_timings': {'starts': starts, 'ends': ends},
+            'model_stats': model_stats,
+            'solve_info': solve_info
+        }
+        return best_solution, best_fitness, [best_fitness], penalties, violations, None, variables
+    
+    async def stream_components(self, components: List[Tuple[List[Dict], List[Dict]]], *args) -> AsyncGenerator[Dict, None]:
+        """Progress events around solve_components, run off the event loop"""
+        yield {
+            "type": "progress",
+            "generation": 1,
+            "total_generations": 1,
+            "best_fitness": 999999999,
+            "progress_percent": 30,
+            "message": f"Resolvendo {len(components)} grupos independentes em paralelo..."
+        }
+        
+        loop = asyncio.get_running_loop()
+        best_solution, best_fitness, _, penalties, violations, _, variables = await loop.run_in_executor(
+            None, self.solve_components, components, *args
+        )
+        self._components_variables = variables
+        
+        if best_solution:
+            yield {
+                "type": "complete",
+                "best_solution": best_solution,
+                "best_fitness": best_fitness,
+                "best_penalties": penalties,
+                "best_violations": violations,
+                "solve_info": variables["solve_info"]
+            }
+        else:
+            yield {
+                "type": "complete",
+                "best_solution": None,
+                "best_fitness": sanitize_for_json(999999999),
+                "best_penalties": {},
+                "best_violations": {},
+                "solve_info": variables["solve_info"],
+                "error": f"Nenhuma solução encontrada ({variables['solve_info'].get('status', 'UNKNOWN')})"
+            }
+    
     def add_simulated_members(self, colaboradores: List[Dict], simulated_members: List[Dict], db: Session, ref_date: datetime.date) -> List[Dict]:
         """Add simulated team members to collaborators list"""
         if not simulated_members:
@@ -334,34 +627,86 @@ class CPService:
             print(f"[CP DEBUG] Project start dates (work days): {project_start_dates}")
             print(f"[CP DEBUG] Project deadlines: {project_deadlines}")
             
+            # Sign every task, so a saved result can later be diffed for an incremental re-solve
+            IncrementalPlanner.sign_tasks(tarefas_globais, project_deadlines, project_start_dates)
+            
             # Configure CP algorithm with enhanced parameters (streaming)
             time_limit = params.get("time_limit_seconds", 600)  # Increased default
             makespan_weight = params.get("makespan_weight", 200)  # Increased focus on makespan
             load_balancing_weight = params.get("load_balancing_weight", 50)  # New parameter
+            load_balancing_mode = params.get("load_balancing_mode") or "l1"
+            use_capacity_pools = bool(params.get("use_capacity_pools", False))
+            
+            # Seed the solver with a saved roadmap, when requested
+            warm_start = self.resolve_warm_start(db, params.get("warm_start_resultado_id"), tarefas_globais, ref_date)
             
-            self.cp = ConstraintProgramming(
+            # Keep the tasks unchanged since a baseline result where they are, when requested
+            frozen = self.resolve_baseline(
+                db, params.get("baseline_resultado_id"), tarefas_globais, colaboradores, ref_date
+            )
+            
+            # Cap the CP horizon with the roadmap period, when one is registered
+            roadmap_end_day = self.resolve_roadmap_end_day(db, projetos, ref_date, ano)
+            
+            cp_options = dict(
                 makespan_weight=makespan_weight,
                 time_limit_seconds=time_limit,
                 load_balancing_weight=load_balancing_weight,
-                parallelization_bonus=100
+                parallelization_bonus=100,
+                roadmap_end_day=roadmap_end_day,
+                load_balancing_mode=load_balancing_mode,
+                use_capacity_pools=use_capacity_pools
             )
             
+            self.cp = self._build_engine(params, cp_options, warm_start, frozen)
+            
+            # Squads that share no eligible collaborator: one model per component, solved in parallel
+            # (engines that stream their own iterations run whole, so progress and history stay intact)
+            components = [(tarefas_globais, colaboradores)]
+            if self.cp.DECOMPOSABLE:
+                components = self.split_components(tarefas_globais, colaboradores)
+            
             # Run algorithm with progress
-            async for event in self.cp.run_with_progress(
-                tarefas_globais, colaboradores, project_deadlines, project_start_dates
-            ):
+            if len(components) > 1:
+                events = self.stream_components(
+                    components, tarefas_globais, colaboradores, project_deadlines, project_start_dates,
+                    cp_options, warm_start, frozen, type(self.cp)
+                )
+            else:
+                events = self.cp.run_with_progress(
+                    tarefas_globais, colaboradores, project_deadlines, project_start_dates
+                )
+            
+            async for event in events:
                 if event.get("type") == "complete":
                     if event.get("best_solution"):
                         print("[CP] Algorithm complete, building schedule")
                         
-                        # Get solver and variables from CP instance
-                        solver, variables = self.cp.get_last_solver_info()
+                        # Get solver and variables from CP instance (merged variables when decomposed)
+                        if len(components) > 1:
+                            solver, variables = None, self._components_variables
+                        else:
+                            solver, variables = self.cp.get_last_solver_info()
                         
-                        if solver is not None and variables:
+                        if variables and variables.get("solution_timings"):
+                            print("Using merged schedule timings (incremental or decomposed run)")
+                            timings = variables["solution_timings"]
+                            schedule = self.cp.scheduler.build_schedule_from_work_days(
+                                event["best_solution"], tarefas_globais, colaboradores, ref_date,
+                                timings["starts"], timings["ends"]
+                            )
+                        elif solver is not None and variables:
                             print("Using CP-specific schedule building with exact timing")
                             schedule = self.cp.scheduler.build_schedule_from_cp_solution(
                                 event["best_solution"], tarefas_globais, colaboradores, ref_date, solver, variables, project_start_dates
                             )
+                        elif variables and variables.get("heuristic_solution"):
+                            print("Using heuristic schedule (solver stopped without a solution)")
+                            heuristic = variables["heuristic_solution"]
+                            schedule = self.cp.scheduler.build_schedule_from_work_days(
+                                event["best_solution"], tarefas_globais, colaboradores, ref_date,
+                                heuristic["starts"], heuristic["ends"]
+                            )
                         else:
                             print("Using standard schedule building (fallback)")
                             schedule = self.cp.scheduler.build_schedule(
@@ -375,6 +720,15 @@ class CPService:
                         yield final_event
                     else:
                         yield event
+                elif event.get("heuristic_solution"):
+                    # Instant first solution: send it with its schedule so the client can show it
+                    heuristic = event["heuristic_solution"]
+                    heuristic_event = event.copy()
+                    heuristic_event["schedule"] = self.cp.scheduler.build_schedule_from_work_days(
+                        heuristic["solution"], tarefas_globais, colaboradores, ref_date,
+                        heuristic["starts"], heuristic["ends"]
+                    )
+                    yield heuristic_event
                 else:
                     yield event
                 
@@ -452,22 +806,55 @@ class CPService:
             print(f"[CP DEBUG] Project start dates (work days): {project_start_dates}")
             print(f"[CP DEBUG] Project deadlines: {project_deadlines}")
             
+            # Sign every task, so a saved result can later be diffed for an incremental re-solve
+            IncrementalPlanner.sign_tasks(tarefas_globais, project_deadlines, project_start_dates)
+            
             # Configure CP algorithm with enhanced parameters (synchronous)
             time_limit = params.get("time_limit_seconds", 600)  # Increased default
             makespan_weight = params.get("makespan_weight", 200)  # Increased focus on makespan
             load_balancing_weight = params.get("load_balancing_weight", 50)  # New parameter
+            load_balancing_mode = params.get("load_balancing_mode") or "l1"
+            use_capacity_pools = bool(params.get("use_capacity_pools", False))
+            
+            # Seed the solver with a saved roadmap, when requested
+            warm_start = self.resolve_warm_start(db, params.get("warm_start_resultado_id"), tarefas_globais, ref_date)
+            
+            # Keep the tasks unchanged since a baseline result where they are, when requested
+            frozen = self.resolve_baseline(
+                db, params.get("baseline_resultado_id"), tarefas_globais, colaboradores, ref_date
+            )
+            
+            # Cap the CP horizon with the roadmap period, when one is registered
+            roadmap_end_day = self.resolve_roadmap_end_day(db, projetos, ref_date, ano)
             
-            self.cp = ConstraintProgramming(
+            cp_options = dict(
                 makespan_weight=makespan_weight,
                 time_limit_seconds=time_limit,
                 load_balancing_weight=load_balancing_weight,
-                parallelization_bonus=100
+                parallelization_bonus=100,
+                roadmap_end_day=roadmap_end_day,
+                load_balancing_mode=load_balancing_mode,
+                use_capacity_pools=use_capacity_pools
             )
             
+            self.cp = self._build_engine(params, cp_options, warm_start, frozen)
+            
+            # Squads that share no eligible collaborator: one model per component, solved in parallel
+            # (engines that stream their own iterations run whole, so progress and history stay intact)
+            components = [(tarefas_globais, colaboradores)]
+            if self.cp.DECOMPOSABLE:
+                components = self.split_components(tarefas_globais, colaboradores)
+            
             # Run algorithm
-            result = self.cp.run(
-                tarefas_globais, colaboradores, project_deadlines, project_start_dates
-            )
+            if len(components) > 1:
+                result = self.solve_components(
+                    components, tarefas_globais, colaboradores, project_deadlines, project_start_dates,
+                    cp_options, warm_start, frozen, type(self.cp)
+                )
+            else:
+                result = self.cp.run(
+                    tarefas_globais, colaboradores, project_deadlines, project_start_dates
+                )
             
             if len(result) == 7:  # New format with solver and variables
                 best_solution, best_fitness, fitness_history, penalties, violations, solver, variables = result
@@ -479,11 +866,25 @@ class CPService:
                 raise ValueError("Nenhuma solução viável encontrada pelo CP")
             
             # Build schedule using CP-specific method if solver is available
-            if solver is not None and variables:
+            if variables and variables.get("solution_timings"):
+                print("Using merged schedule timings (incremental or decomposed run)")
+                timings = variables["solution_timings"]
+                schedule = self.cp.scheduler.build_schedule_from_work_days(
+                    best_solution, tarefas_globais, colaboradores, ref_date,
+                    timings["starts"], timings["ends"]
+                )
+            elif solver is not None and variables:
                 print("Using CP-specific schedule building with exact timing")
                 schedule = self.cp.scheduler.build_schedule_from_cp_solution(
                     best_solution, tarefas_globais, colaboradores, ref_date, solver, variables, project_start_dates
                 )
+            elif variables and variables.get("heuristic_solution"):
+                print("Using heuristic schedule (solver stopped without a solution)")
+                heuristic = variables["heuristic_solution"]
+                schedule = self.cp.scheduler.build_schedule_from_work_days(
+                    best_solution, tarefas_globais, colaboradores, ref_date,
+                    heuristic["starts"], heuristic["ends"]
+                )
             else:
                 print("Using standard schedule building (fallback)")
                 schedule = self.cp.scheduler.build_schedule(
@@ -624,7 +1025,9 @@ class CPService:
                 "melhor_fitness": best_fitness,
                 "historico_fitness": fitness_history,
                 "penalidades": final_penalties,
-                "ocorrencias_penalidades": final_violations
+                "ocorrencias_penalidades": final_violations,
+                "warm_start": (variables or {}).get("model_stats", {}).get("warm_start"),
+                "incremental": (variables or {}).get("model_stats", {}).get("incremental")
             }
             
         except Exception as e:
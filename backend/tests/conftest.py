@@ -0,0 +1,69 @@
+import os
+import random
+import sys
+
+import pytest
+
+# The backend modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SKILLS = {"Dev": "Python", "QA": "Testes", "Analista": "Análise"}
+
+
+def make_instance(num_projects: int = 3, stages: int = 4, num_collaborators: int = 9,
+                  seed: int = 0, absences: bool = False):
+    """Chained projects cycling through the three cargos; every cargo has several collaborators"""
+    rnd = random.Random(seed)
+    cargos = list(SKILLS)
+    collaborators = [
+        {"id": i + 1, "nome": f"C{i + 1}", "cargo": cargos[i % 3], "habilidades": {SKILLS[cargos[i % 3]]},
+         "ausencias": set(rnd.sample(range(60), 3)) if absences and i % 2 else set(),
+         "ferias": [], "inicio": None, "termino": None}
+        for i in range(num_collaborators)
+    ]
+    tasks = []
+    for project in range(num_projects):
+        previous = None
+        for stage in range(stages):
+            task_id = len(tasks) + 1
+            cargo = cargos[stage % 3]
+            tasks.append({"task_id": task_id, "projeto": f"P{project}", "nome": f"P{project}E{stage}",
+                          "duracao_dias": rnd.randint(2, 8), "cargo_necessario": cargo,
+                          "habilidades_necessarias": {SKILLS[cargo]},
+                          "predecessoras": [previous] if previous else []})
+            previous = task_id
+    return tasks, collaborators
+
+
+def make_random_instance(seed: int, num_projects: int = 6, stages: int = 8, num_collaborators: int = 8):
+    """Random DAG projects over two cargos, with absences, vacations, work periods and zero-day tasks"""
+    rnd = random.Random(seed)
+    skills = ["Análise", "Dev", "Teste", "Infra"]
+    cargos = ["A", "B"]
+    collaborators = [
+        {"id": 100 + 7 * k, "nome": f"C{k}", "cargo": rnd.choice(cargos),
+         "habilidades": set(rnd.sample(skills, rnd.randint(1, 3))),
+         "ausencias": set(rnd.sample(range(200), rnd.randint(0, 15))),
+         "ferias": [(s, s + rnd.randint(1, 10)) for s in rnd.sample(range(200), rnd.randint(0, 3))],
+         "inicio": rnd.choice([None, 0, 5, 20]), "termino": rnd.choice([None, 80, 150])}
+        for k in range(num_collaborators)
+    ]
+    tasks = []
+    for project in range(num_projects):
+        previous = []
+        for _ in range(stages):
+            task_id = len(tasks) + 1
+            tasks.append({"task_id": task_id, "projeto": f"P{project}", "nome": f"T{task_id}",
+                          "duracao_dias": rnd.randint(0, 6), "cargo_necessario": rnd.choice(cargos),
+                          "habilidades_necessarias": set(rnd.sample(skills, rnd.randint(0, 2))),
+                          "predecessoras": rnd.sample(previous, min(len(previous), rnd.randint(0, 2)))})
+            previous.append(task_id)
+    rnd.shuffle(tasks)
+    deadlines = {f"P{p}": rnd.randint(10, 60) for p in range(0, num_projects, 2)}
+    start_dates = {f"P{p}": rnd.randint(0, 10) for p in range(1, num_projects, 2)}
+    return tasks, collaborators, deadlines, start_dates
+
+
+@pytest.fixture
+def instance():
+    return make_instance()
@@ -0,0 +1,60 @@
+import io
+import contextlib
+import random
+
+import pytest
+
+from constraint_programming import ConstraintProgramming
+from conftest import make_instance
+
+
+def _member_overlaps(solution, tasks, starts, ends):
+    """Pairs of tasks that share a collaborator and overlap in time"""
+    by_collaborator = {}
+    for task, collab_id in zip(tasks, solution):
+        if ends[task["task_id"]] > starts[task["task_id"]]:
+            by_collaborator.setdefault(collab_id, []).append((starts[task["task_id"]], ends[task["task_id"]], task["task_id"]))
+    overlaps = []
+    for intervals in by_collaborator.values():
+        intervals.sort()
+        overlaps += [(a[2], b[2]) for a, b in zip(intervals, intervals[1:]) if b[0] < a[1]]
+    return overlaps
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_pool_members_never_overlap(seed):
+    # Tasks packed onto a 3-member pool so that at most 3 run at once, as the cumulative guarantees
+    rnd = random.Random(seed)
+    members = [7, 8, 9]
+    tasks, starts, ends = [], {}, {}
+    lanes = [0, 0, 0]
+    for task_id in range(1, 31):
+        lane = rnd.randrange(3)
+        start = lanes[lane] + rnd.randint(0, 2)
+        lanes[lane] = start + rnd.randint(1, 5)
+        tasks.append({"task_id": task_id, "duracao_dias": lanes[lane] - start})
+        starts[task_id], ends[task_id] = start, lanes[lane]
+    rnd.shuffle(tasks)
+    solution = [7] * len(tasks)
+
+    assigned = ConstraintProgramming._assign_pool_members(solution, tasks, starts, ends, {7: members})
+
+    assert set(assigned) <= set(members)
+    assert not _member_overlaps(assigned, tasks, starts, ends)
+
+
+def test_pooled_solve_gives_members_disjoint_intervals():
+    pytest.importorskip("ortools.sat.python.cp_model")
+    tasks, collaborators = make_instance(num_projects=4, stages=4, num_collaborators=6, seed=1)
+    cp = ConstraintProgramming(use_capacity_pools=True, time_limit_seconds=10)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        model, variables = cp.create_cp_model(tasks, collaborators)
+        solution, _, _, solver = cp.solve_cp_model(model, variables, tasks)
+
+    assert variables['capacity_pools']
+    assert solution is not None
+    assert set(solution) <= {c["id"] for c in collaborators}
+    starts = {t["task_id"]: solver.Value(variables['task_starts'][t["task_id"]]) for t in tasks}
+    ends = {t["task_id"]: solver.Value(variables['task_ends'][t["task_id"]]) for t in tasks}
+    assert not _member_overlaps(solution, tasks, starts, ends)
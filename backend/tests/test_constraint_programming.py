@@ -0,0 +1,16 @@
+import pytest
+
+from constraint_programming import ConstraintProgramming
+
+
+def test_empty_input_is_rejected_before_building_anything(instance, monkeypatch):
+    tasks, collaborators = instance
+    # Any pool, graph or heuristic work would reach the eligibility computation first
+    monkeypatch.setattr(ConstraintProgramming, "_compute_eligibility",
+                        lambda *args: pytest.fail("model work started on empty input"))
+    cp = ConstraintProgramming(use_capacity_pools=True)
+
+    with pytest.raises(ValueError, match="No tasks"):
+        cp.create_cp_model([], collaborators)
+    with pytest.raises(ValueError, match="No collaborators"):
+        cp.create_cp_model(tasks, [])
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from algorithm.delta_evaluator import DeltaEvaluator
+from algorithm.evaluator import SolutionEvaluator
+from conftest import make_random_instance
+
+
+def _setup(seed, with_projects=True):
+    tasks, collaborators, deadlines, start_dates = make_random_instance(seed)
+    if not with_projects:
+        deadlines, start_dates = None, None
+    rnd = random.Random(seed)
+    ids = [c["id"] for c in collaborators]
+    solution = [rnd.choice(ids) for _ in tasks]
+    delta = DeltaEvaluator(solution, tasks, collaborators, deadlines, start_dates, 200)
+
+    def evaluate(candidate):
+        return SolutionEvaluator(200).evaluate(list(candidate), tasks, collaborators, deadlines, start_dates)[:2]
+
+    return rnd, ids, delta, evaluate
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("with_projects", [True, False])
+def test_moves_and_swaps_track_evaluate(seed, with_projects):
+    rnd, ids, delta, evaluate = _setup(seed, with_projects)
+    assert (delta.fitness, delta.penalties) == evaluate(delta.solution)
+
+    for _ in range(60):
+        before = list(delta.solution)
+        before_fitness, before_penalties = evaluate(before)
+        if rnd.random() < 0.5:
+            change = delta.move(rnd.randrange(len(before)), rnd.choice(ids))
+        else:
+            change = delta.swap(rnd.randrange(len(before)), rnd.randrange(len(before)))
+
+        fitness, penalties = evaluate(delta.solution)
+        assert (delta.fitness, delta.penalties) == (fitness, penalties)
+        assert change == fitness - before_fitness
+
+        if rnd.random() < 0.5:
+            delta.rollback()
+            assert delta.solution == before
+            assert (delta.fitness, delta.penalties) == (before_fitness, before_penalties)
+        else:
+            delta.commit()
+            assert (delta.fitness, delta.penalties) == (fitness, penalties)
+
+
+def test_commit_keeps_the_move_and_rollback_is_then_a_no_op():
+    _, ids, delta, evaluate = _setup(11)
+    target = next(c for c in ids if c != delta.solution[0])
+
+    delta.move(0, target)
+    delta.commit()
+    delta.rollback()
+
+    assert delta.solution[0] == target
+    assert (delta.fitness, delta.penalties) == evaluate(delta.solution)
+
+
+def test_a_second_change_needs_commit_or_rollback_first():
+    _, ids, delta, _ = _setup(12)
+    delta.move(0, ids[0])
+
+    with pytest.raises(ValueError):
+        delta.swap(0, 1)
+    delta.rollback()
+    delta.swap(0, 1)
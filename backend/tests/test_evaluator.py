@@ -0,0 +1,45 @@
+import random
+
+import numpy as np
+import pytest
+
+from algorithm.evaluator import SolutionEvaluator
+from conftest import make_random_instance
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("with_projects", [True, False])
+def test_evaluate_batch_matches_evaluate(seed, with_projects):
+    tasks, collaborators, deadlines, start_dates = make_random_instance(seed)
+    if not with_projects:
+        deadlines, start_dates = None, None
+    rnd = random.Random(seed)
+    ids = [c["id"] for c in collaborators]
+    solutions = np.array([[rnd.choice(ids) for _ in tasks] for _ in range(12)])
+    evaluator = SolutionEvaluator(200)
+
+    fitness, penalties, details = evaluator.evaluate_batch(solutions, tasks, collaborators, deadlines,
+                                                           start_dates, details_for=[0, 5])
+
+    for row, solution in enumerate(solutions):
+        expected_fitness, expected_penalties, expected_details = evaluator.evaluate(
+            list(solution), tasks, collaborators, deadlines, start_dates)
+        assert fitness[row] == expected_fitness
+        assert {key: penalties[key][row] for key in expected_penalties} == expected_penalties
+        if row in details:
+            assert details[row] == expected_details
+
+
+def test_evaluate_batch_reuses_a_compiled_problem():
+    tasks, collaborators, deadlines, start_dates = make_random_instance(7)
+    rnd = random.Random(7)
+    ids = [c["id"] for c in collaborators]
+    solutions = np.array([[rnd.choice(ids) for _ in tasks] for _ in range(5)])
+    evaluator = SolutionEvaluator(200)
+    compiled = evaluator.compile_problem(tasks, collaborators, deadlines, start_dates)
+
+    fitness, _, _ = evaluator.evaluate_batch(solutions, tasks, collaborators, deadlines, start_dates,
+                                             compiled=compiled)
+
+    assert list(fitness) == [evaluator.evaluate(list(s), tasks, collaborators, deadlines, start_dates)[0]
+                             for s in solutions]
@@ -0,0 +1,28 @@
+import io
+import contextlib
+import time
+
+import pytest
+
+pytest.importorskip("ortools.sat.python.cp_model")
+
+from large_neighbourhood import LargeNeighbourhoodCP
+from conftest import make_instance
+
+
+def test_proven_infeasible_model_is_not_searched():
+    # One collaborator per cargo and every project due at its summed durations: the chains fit,
+    # the shared collaborators do not
+    tasks, collaborators = make_instance(num_collaborators=3)
+    deadlines = {}
+    for task in tasks:
+        deadlines[task["projeto"]] = deadlines.get(task["projeto"], 0) + task["duracao_dias"]
+    lns = LargeNeighbourhoodCP(time_limit_seconds=20)
+
+    started_at = time.monotonic()
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution, _, solve_info, _, _ = lns.solve_instance(tasks, collaborators, deadlines)
+
+    assert solution is None
+    assert solve_info['status'] == 'INFEASIBLE'
+    assert time.monotonic() - started_at < 10
@@ -0,0 +1,67 @@
+from algorithm.list_scheduler import ListScheduler
+from algorithm.precedence_graph import PrecedenceGraph
+from conftest import make_instance
+
+
+def _dev(collab_id, **fields):
+    return dict({"id": collab_id, "nome": f"C{collab_id}", "cargo": "Dev", "habilidades": {"Python"},
+                 "ausencias": set(), "ferias": [], "inicio": None, "termino": None}, **fields)
+
+
+def _task(task_id, duration, predecessors=(), **fields):
+    return dict({"task_id": task_id, "projeto": "P", "nome": f"T{task_id}", "duracao_dias": duration,
+                 "cargo_necessario": "Dev", "habilidades_necessarias": {"Python"},
+                 "predecessoras": list(predecessors)}, **fields)
+
+
+def test_schedule_respects_precedences_blocks_and_single_occupancy():
+    tasks, collaborators = make_instance(seed=3)
+    eligible = {task["task_id"]: [c["id"] for c in collaborators if c["cargo"] == task["cargo_necessario"]]
+                for task in tasks}
+    blocked = {collaborators[0]["id"]: [(0, 4)], collaborators[3]["id"]: [(2, 9)]}
+
+    result = ListScheduler.schedule(tasks, collaborators, eligible, blocked)
+
+    assert result is not None and result["feasible"]
+    starts, ends = result["starts"], result["ends"]
+    for task in tasks:
+        assert result["assignments"][task["task_id"]] in eligible[task["task_id"]]
+        assert all(starts[task["task_id"]] >= ends[p] for p in task["predecessoras"])
+    for collab_id in {c["id"] for c in collaborators}:
+        intervals = sorted((starts[t], ends[t]) for t, c in result["assignments"].items() if c == collab_id)
+        intervals += blocked.get(collab_id, [])
+        intervals.sort()
+        assert all(a_end <= b_start for (_, a_end), (b_start, _) in zip(intervals, intervals[1:]))
+    assert result["makespan"] == max(ends.values())
+
+
+def test_schedule_returns_none_when_a_task_cannot_be_placed():
+    tasks = [_task(1, 5)]
+
+    assert ListScheduler.schedule(tasks, [_dev(1, termino=3)], {1: [1]}) is None
+    assert ListScheduler.schedule(tasks, [_dev(1)], {1: []}) is None
+    assert ListScheduler.schedule([_task(1, 1, [2]), _task(2, 1, [1])], [_dev(1)], {1: [1], 2: [1]}) is None
+
+
+def test_feasible_flag_checks_project_deadlines_and_task_tails():
+    tasks = [_task(1, 4), _task(2, 4, [1])]
+    collaborators, eligible = [_dev(1)], {1: [1], 2: [1]}
+
+    assert ListScheduler.schedule(tasks, collaborators, eligible, project_deadlines={"P": 8})["feasible"]
+    assert not ListScheduler.schedule(tasks, collaborators, eligible, project_deadlines={"P": 7})["feasible"]
+    assert not ListScheduler.schedule(tasks, collaborators, eligible, latest_ends={1: 3})["feasible"]
+
+
+def test_best_schedule_prefers_a_rule_that_meets_the_tails():
+    # One collaborator: the short task must come first to meet its termino_maximo,
+    # which input (topological) order and longest path both get wrong
+    tasks = [_task(1, 10), _task(2, 10), _task(3, 10), _task(4, 2, termino_maximo=2)]
+    graph = PrecedenceGraph(tasks)
+    latest_ends = {4: 2}
+
+    result = ListScheduler.best_schedule(tasks, [_dev(1)], {t["task_id"]: [1] for t in tasks},
+                                         graph=graph, latest_ends=latest_ends)
+
+    assert result["feasible"]
+    assert result["rule"] == "earliest_deadline"
+    assert result["ends"][4] == 2
@@ -0,0 +1,34 @@
+import io
+import contextlib
+
+import pytest
+
+from algorithm.evaluator import SolutionEvaluator
+from ant_colony_optimization import AntColonyOptimization
+from genetic_algorithm import GeneticAlgorithm
+from conftest import make_random_instance
+
+
+@pytest.mark.parametrize("engine", [
+    GeneticAlgorithm(population_size=20, generations=15, seed=1, time_limit_seconds=30),
+    AntColonyOptimization(num_ants=10, iterations=15, seed=1, time_limit_seconds=30),
+], ids=["genetic_algorithm", "ant_colony"])
+def test_reported_fitness_is_that_of_the_returned_schedule(engine):
+    tasks, collaborators, deadlines, start_dates = make_random_instance(4, num_projects=4, stages=6)
+    # Every task needs some eligible collaborator: drop the skill requirements
+    for task in tasks:
+        task["habilidades_necessarias"] = set()
+        task["cargo_necessario"] = collaborators[task["task_id"] % 2]["cargo"]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution, fitness, solve_info, solver, variables = engine.solve_instance(tasks, collaborators, deadlines,
+                                                                                start_dates)
+
+    expected_fitness, penalties, _ = SolutionEvaluator(engine.makespan_weight).evaluate(
+        solution, tasks, collaborators, deadlines, start_dates)
+    assert fitness == expected_fitness == variables['fitness_history'][-1]
+    ends = variables['solution_timings']['ends']
+    assert solve_info['makespan'] == max(ends.values()) == penalties["makespan"] // engine.makespan_weight
+    assert (solve_info['status'] == 'VIOLATED') == any(
+        penalties[key] for key in ("ausencias", "vacation_conflict", "work_period_violation",
+                                   "deadline_violation", "project_start_violation"))
@@ -0,0 +1,46 @@
+from algorithm.precedence_graph import PrecedenceGraph
+
+
+def _task(task_id, predecessors=(), name=None):
+    return {"task_id": task_id, "nome": name or f"T{task_id}", "duracao_dias": 1, "predecessoras": list(predecessors)}
+
+
+def test_topological_order_is_stable_on_input_order():
+    graph = PrecedenceGraph([_task(3, [2]), _task(1), _task(2, [1]), _task(4)])
+
+    assert not graph.has_cycle
+    assert graph.order == [1, 2, 3, 4]
+    assert graph.levels == {1: 0, 2: 1, 3: 2, 4: 0}
+
+
+def test_cycle_is_detected_and_described():
+    graph = PrecedenceGraph([_task(1, [3], "A"), _task(2, [1], "B"), _task(3, [2], "C"), _task(4, [3], "D")])
+
+    assert graph.has_cycle
+    assert sorted(graph.cycle) == [1, 2, 3]
+    assert graph.describe_cycle().count("->") == 3
+    # Tasks on or behind the cycle still follow, so every task stays reachable
+    assert sorted(graph.order) == [1, 2, 3, 4]
+
+
+def test_unknown_duplicate_and_self_predecessors_are_ignored():
+    graph = PrecedenceGraph([_task(1, [1, 99]), _task(2, [1, 1])])
+
+    assert graph.predecessors == {1: [], 2: [1]}
+    assert not graph.has_cycle
+
+
+def test_transitive_reduction_drops_implied_edges():
+    # 1 -> 2 -> 3 -> 4, plus 1 -> 3, 1 -> 4 and 2 -> 4 implied by the chain
+    graph = PrecedenceGraph([_task(1), _task(2, [1]), _task(3, [1, 2]), _task(4, [1, 2, 3])])
+
+    assert graph.reduced_predecessors == {1: [], 2: [1], 3: [2], 4: [3]}
+    assert graph.edge_count == 6
+    assert graph.reduced_edge_count == 3
+
+
+def test_transitive_reduction_keeps_parallel_branches():
+    # Diamond: 1 -> {2, 3} -> 4, nothing implied
+    graph = PrecedenceGraph([_task(1), _task(2, [1]), _task(3, [1]), _task(4, [2, 3])])
+
+    assert graph.reduced_predecessors == graph.predecessors
@@ -0,0 +1,49 @@
+import io
+import contextlib
+
+from constraint_programming import ConstraintProgramming
+from rolling_horizon import RollingHorizonCP
+from conftest import make_instance
+
+
+def _dev_task(task_id, duration):
+    return {"task_id": task_id, "projeto": "P", "nome": f"T{task_id}", "duracao_dias": duration,
+            "cargo_necessario": "Dev", "habilidades_necessarias": {"Python"}, "predecessoras": []}
+
+
+DEV = {"id": 1, "nome": "C1", "cargo": "Dev", "habilidades": {"Python"}, "ausencias": set(), "ferias": [],
+       "inicio": None, "termino": None}
+
+
+def test_windows_without_a_cp_solution_are_placed_greedily(monkeypatch):
+    tasks, collaborators = make_instance(num_projects=4, stages=6, seed=2)
+    monkeypatch.setattr(ConstraintProgramming, "solve_instance",
+                        lambda self, *args: (None, 999999999, {'status': 'INFEASIBLE'}, None, {}))
+    rolling = RollingHorizonCP(window_days=20, overlap_days=5, time_limit_seconds=60)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution, _, solve_info, _, variables = rolling.solve_instance(tasks, collaborators)
+
+    windows = solve_info['model_stats']['rolling_horizon']['per_window']
+    assert len(windows) > 1
+    assert all(w['status'] == 'HEURISTIC' and w['solver_status'] == 'INFEASIBLE' for w in windows)
+    assert solve_info['status'] == 'HEURISTIC'
+
+    starts, ends = variables['solution_timings']['starts'], variables['solution_timings']['ends']
+    for task in tasks:
+        assert all(starts[task["task_id"]] >= ends[p] for p in task["predecessoras"])
+    for collab_id in set(solution):
+        intervals = sorted((starts[t["task_id"]], ends[t["task_id"]]) for t, c in zip(tasks, solution) if c == collab_id)
+        assert all(a_end <= b_start for (_, a_end), (b_start, _) in zip(intervals, intervals[1:]))
+
+
+def test_greedy_placement_respects_latest_ends():
+    tasks = [_dev_task(1, 10), _dev_task(2, 10), _dev_task(3, 10), _dev_task(4, 2)]
+    rolling = RollingHorizonCP()
+
+    placed, status = rolling._place_greedily(tasks, [DEV], {}, {}, {}, {4: 2})
+    assert status == 'HEURISTIC'
+    assert placed[4]["fim"] == 2
+
+    _, status = rolling._place_greedily(tasks, [DEV], {}, {}, {}, {4: 1})
+    assert status == 'VIOLATED'
@@ -0,0 +1,51 @@
+import io
+import contextlib
+
+import pytest
+
+cp_model = pytest.importorskip("ortools.sat.python.cp_model")
+
+from constraint_programming import ConstraintProgramming
+from conftest import make_instance
+
+
+def _hint_is_feasible(model: "cp_model.CpModel") -> bool:
+    solver = cp_model.CpSolver()
+    solver.parameters.fix_variables_to_their_hinted_value = True
+    solver.parameters.max_time_in_seconds = 10
+    return solver.Solve(model) in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+
+def _hinted_model(cp: ConstraintProgramming, tasks, collaborators):
+    with contextlib.redirect_stdout(io.StringIO()):
+        model, variables = cp.create_cp_model(tasks, collaborators)
+        cp._add_search_hints(model, variables, tasks)
+    return model, variables
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_heuristic_hint_respects_symmetry_breaking(seed):
+    tasks, collaborators = make_instance(seed=seed, absences=bool(seed % 2))
+    model, variables = _hinted_model(ConstraintProgramming(break_symmetry=True), tasks, collaborators)
+
+    assert variables['model_stats']['symmetry_groups']
+    assert _hint_is_feasible(model)
+
+
+def test_warm_start_hint_respects_symmetry_breaking(instance):
+    tasks, collaborators = instance
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, variables = ConstraintProgramming().create_cp_model(tasks, collaborators)
+    heuristic = variables['heuristic_solution']
+
+    # The same schedule with every symmetry group's labels reversed
+    reverse = {}
+    for group in variables['model_stats']['symmetry_groups']:
+        reverse.update(zip(group, reversed(group)))
+    warm_start = {
+        task_id: {"colaborador_id": reverse.get(collab_id, collab_id), "inicio": heuristic["starts"][task_id]}
+        for task_id, collab_id in heuristic["assignments"].items()
+    }
+    model, _ = _hinted_model(ConstraintProgramming(warm_start=warm_start), tasks, collaborators)
+
+    assert _hint_is_feasible(model)